@@ -0,0 +1,170 @@
+"""Content-addressed store of parse results.
+
+Parse results are stored once per distinct source content (and parse mode)
+under `blobs/<ab>/<content hash><variant><suffix>`, so vendored copies of a
+module, side-by-side checkouts and files switching back and forth between
+branches share one parse. The parse cache maps every source path to its blob
+and serves as the path manifest; blobs no path refers to any more are only
+removed by collect_garbage().
+"""
+
+import os
+from typing import Any, Iterator, Optional, Set, Tuple
+
+from CodingAgent.inspector.cache import ParseCache
+from CodingAgent.inspector.locking import EnvironmentLock
+from CodingAgent.inspector.storage import EnvironmentStorage, load_environ_file
+
+BLOB_DIR_NAME = "blobs"
+# per-path environment files written before parse results were shared
+LEGACY_PREFIX = "environ_"
+
+
+def blob_variant(compact: bool = False, outline: bool = False) -> str:
+    """Get the part of the blob name that tells parse modes apart.
+
+    Args:
+        compact: Whether the result is in the compact format.
+        outline: Whether the result is an outline; outlines have no compact form.
+
+    Returns:
+        "" for full results, "-compact" or "-outline" otherwise.
+    """
+    if outline:
+        return "-outline"
+    return "-compact" if compact else ""
+
+
+def load_blob(blob_path: str, file_path: Optional[str] = None) -> Any:
+    """Load a parse result from the store.
+
+    Args:
+        blob_path: Path of the blob, written by any storage backend.
+        file_path: Source path the result is loaded for. The stored result
+            names the file it was first parsed from, which is replaced.
+
+    Returns:
+        The parse result.
+    """
+    return _for_path(load_environ_file(blob_path), file_path)
+
+
+def _for_path(result: Any, file_path: Optional[str]) -> Any:
+    if file_path is not None and isinstance(result, dict) and "file_path" in result:
+        result["file_path"] = file_path
+    return result
+
+
+class BlobStore:
+    """Parse results of one environment directory, keyed by content hash."""
+
+    def __init__(self, environ_path: str, storage: EnvironmentStorage):
+        """Initialize the BlobStore.
+
+        Args:
+            environ_path: Path to the environment directory.
+            storage: Storage backend used to write blobs.
+        """
+        self.environ_path = environ_path
+        self.root = os.path.join(environ_path, BLOB_DIR_NAME)
+        self.storage = storage
+
+    def path_for(self, content_hash: str, variant: str = "") -> str:
+        """Get the blob path of a parse result.
+
+        Args:
+            content_hash: Hash of the parsed source content.
+            variant: Parse mode, see blob_variant().
+
+        Returns:
+            Path of the blob, which need not exist yet.
+        """
+        return os.path.join(
+            self.root, content_hash[:2], f"{content_hash}{variant}{self.storage.suffix}"
+        )
+
+    def write(self, result: Any, blob_path: str) -> None:
+        """Store a parse result, replacing the blob atomically.
+
+        Args:
+            result: Parse result to store.
+            blob_path: Path returned by path_for().
+        """
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        self.storage.dump(result, blob_path)
+
+    def load(self, blob_path: str, file_path: Optional[str] = None) -> Any:
+        """Load a parse result written with the store's backend.
+
+        Args:
+            blob_path: Path of the blob.
+            file_path: Source path the result is loaded for.
+
+        Returns:
+            The parse result.
+        """
+        return _for_path(self.storage.load(blob_path), file_path)
+
+
+def _iter_stored_files(environ_path: str) -> Iterator[os.DirEntry]:
+    """Yield every blob and legacy per-path environment file."""
+    with os.scandir(environ_path) as entries:
+        for entry in entries:
+            if entry.name.startswith(LEGACY_PREFIX) and entry.is_file():
+                yield entry
+    stack = [os.path.join(environ_path, BLOB_DIR_NAME)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        # includes leftovers of interrupted atomic writes
+                        yield entry
+        except FileNotFoundError:
+            continue
+
+
+def collect_garbage(environ_path: str, dry_run: bool = False) -> Tuple[int, int]:
+    """Delete the blobs no indexed file refers to any more.
+
+    Runs under the environment lock, so no index generation can add a
+    reference while blobs are removed.
+
+    Args:
+        environ_path: Path to the environment directory.
+        dry_run: Whether to only count the unreferenced blobs.
+
+    Returns:
+        Tuple of (number of files, bytes) removed, or that would be removed.
+    """
+    if not os.path.isdir(environ_path):
+        return 0, 0
+    removed, freed = 0, 0
+    with EnvironmentLock(environ_path):
+        cache = ParseCache(environ_path)
+        cache.load()
+        referenced: Set[str] = {
+            os.path.abspath(cache.environ_file(entry)) for entry in cache.entries.values()
+        }
+        for entry in list(_iter_stored_files(environ_path)):
+            if os.path.abspath(entry.path) in referenced:
+                continue
+            try:
+                size = entry.stat(follow_symlinks=False).st_size
+                if not dry_run:
+                    os.remove(entry.path)
+            except OSError:
+                continue
+            removed += 1
+            freed += size
+        if not dry_run:
+            # drop the fan-out directories left empty
+            root = os.path.join(environ_path, BLOB_DIR_NAME)
+            for directory in os.listdir(root) if os.path.isdir(root) else []:
+                try:
+                    os.rmdir(os.path.join(root, directory))
+                except OSError:
+                    pass
+    return removed, freed
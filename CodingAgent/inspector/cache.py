@@ -0,0 +1,308 @@
+"""Incremental parse cache for the environment store."""
+
+import os
+import json
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from CodingAgent.inspector.locking import atomic_write
+
+CACHE_FILE_NAME = "cache.json"
+CACHE_VERSION = 2
+
+
+def hash_content(data: bytes) -> str:
+    """Return the content hash used to detect changed files.
+
+    Args:
+        data: Raw file content.
+
+    Returns:
+        Hex digest of the content.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_chunks(chunks: Iterable[bytes]) -> str:
+    """Return the content hash of a file read in pieces.
+
+    Args:
+        chunks: Consecutive pieces of the file content.
+
+    Returns:
+        Hex digest of the content, equal to hash_content of the joined pieces.
+    """
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CacheStats:
+    """Per-run statistics of the parse cache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.reparsed = 0
+        # parse results taken from the blob of an identical file
+        self.shared = 0
+        self.deleted = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        """Return the statistics as a plain dictionary."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reparsed": self.reparsed,
+            "shared": self.shared,
+            "deleted": self.deleted,
+        }
+
+    def __str__(self) -> str:
+        return ", ".join(f"{key}={value}" for key, value in self.as_dict().items())
+
+
+class ParseCache:
+    """Records content hash, mtime and size of every parsed file.
+
+    Entries are keyed by the absolute source path and point at the environment
+    file holding the parse result, so unchanged files can skip parsing. That
+    path is stored relative to the environment directory, so the environment
+    stays usable when it is moved or mounted elsewhere.
+    """
+
+    def __init__(self, environ_path: str, options: Optional[Dict[str, Any]] = None):
+        """Initialize the ParseCache.
+
+        Args:
+            environ_path: Path to the environment directory holding the cache file.
+            options: Parse options the results depend on; entries recorded with
+                different options are discarded on load.
+        """
+        self.environ_path = environ_path
+        self.cache_path = os.path.join(environ_path, CACHE_FILE_NAME)
+        self.options = options if options is not None else {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # git baseline of the last complete run, see CodingAgent.inspector.git_state
+        self.git: Optional[Dict[str, Any]] = None
+        # [mtime_ns, size, is_binary] of files whose type had to be sniffed
+        self.verdicts: Dict[str, List[Any]] = {}
+        self.stats = CacheStats()
+        # identity of the cache file as last loaded or saved by this process
+        self._disk_state: Optional[Tuple[int, int, int]] = None
+
+    def _file_state(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.cache_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def changed_on_disk(self) -> bool:
+        """Check whether another process replaced the cache file since it was loaded.
+
+        Returns:
+            True if the cache file differs from the one last loaded or saved.
+        """
+        return self._file_state() != self._disk_state
+
+    def load(self) -> None:
+        """Load cache entries from disk, starting empty if the cache is unusable."""
+        self.entries = {}
+        self.git = None
+        self.verdicts = {}
+        self.stats = CacheStats()
+        self._disk_state = self._file_state()
+        if self._disk_state is None:
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: Could not load parse cache {self.cache_path}: {e}")
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        self.entries = data.get("entries", {})
+        for entry in self.entries.values():
+            if os.path.isabs(entry["environ_file"]):
+                # recorded before environment files were stored relative
+                entry["environ_file"] = self._relative(entry["environ_file"])
+        self.git = data.get("git")
+        self.verdicts = data.get("verdicts", {})
+        if data.get("options") != self.options:
+            self.git = None
+            # keep the entries so their files get replaced, but never reuse them
+            for entry in self.entries.values():
+                entry["hash"] = entry["mtime_ns"] = None
+
+    def save(self) -> None:
+        """Write cache entries to disk."""
+        with atomic_write(self.cache_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": CACHE_VERSION,
+                    "options": self.options,
+                    "entries": self.entries,
+                    "git": self.git,
+                    "verdicts": self.verdicts,
+                },
+                file,
+                ensure_ascii=False,
+                sort_keys=True,
+            )
+        self._disk_state = self._file_state()
+
+    def _relative(self, environ_file: str) -> str:
+        return os.path.relpath(environ_file, self.environ_path)
+
+    def environ_file(self, entry: Dict[str, Any]) -> str:
+        """Get the path of the environment file an entry points at.
+
+        Args:
+            entry: Cache entry of a source file.
+
+        Returns:
+            Path to the environment file, below the environment directory.
+        """
+        return os.path.join(self.environ_path, entry["environ_file"])
+
+    def is_fresh(self, path: str, stat: os.stat_result, environ_file: str) -> bool:
+        """Check whether the entry of a file is valid judging by stat data alone.
+
+        Args:
+            path: Absolute path of the source file.
+            stat: Current stat result of the source file.
+            environ_file: Environment file the result is expected in.
+
+        Returns:
+            True if mtime and size are unchanged and the environment file exists.
+        """
+        entry = self.entries.get(path)
+        return (
+            entry is not None
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and entry["size"] == stat.st_size
+            and entry["environ_file"] == self._relative(environ_file)
+            and os.path.exists(environ_file)
+        )
+
+    def is_valid(self, path: str, environ_file: str) -> bool:
+        """Check whether the entry of a file can be reused if its content is unchanged.
+
+        Args:
+            path: Absolute path of the source file.
+            environ_file: Environment file the result is expected in.
+
+        Returns:
+            True if the entry was recorded with the current options and the
+            environment file exists.
+        """
+        entry = self.entries.get(path)
+        return (
+            entry is not None
+            and entry["hash"] is not None
+            and entry["environ_file"] == self._relative(environ_file)
+            and os.path.exists(environ_file)
+        )
+
+    def matches(self, path: str, content_hash: str, environ_file: str) -> bool:
+        """Check whether the entry of a file was recorded for the same content.
+
+        Args:
+            path: Absolute path of the source file.
+            content_hash: Hash of the current file content.
+            environ_file: Environment file the result is expected in.
+
+        Returns:
+            True if the content is unchanged and the environment file exists.
+        """
+        entry = self.entries.get(path)
+        return (
+            entry is not None
+            and entry["hash"] == content_hash
+            and entry["environ_file"] == self._relative(environ_file)
+            and os.path.exists(environ_file)
+        )
+
+    def record(
+        self,
+        path: str,
+        stat: os.stat_result,
+        content_hash: str,
+        environ_file: str,
+        **extra: Any,
+    ) -> None:
+        """Record the current state of a parsed file.
+
+        Extra data derived from the content (e.g. imports) is kept from the
+        previous entry as long as the content hash is unchanged.
+
+        Args:
+            path: Absolute path of the source file.
+            stat: Stat result of the source file.
+            content_hash: Hash of the parsed content.
+            environ_file: Path to the environment file holding the parse result.
+            **extra: Additional data to store with the entry.
+        """
+        previous = self.entries.get(path)
+        entry = {
+            "hash": content_hash,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "environ_file": self._relative(environ_file),
+        }
+        if previous is not None and previous["hash"] == content_hash:
+            for key, value in previous.items():
+                entry.setdefault(key, value)
+        entry.update(extra)
+        self.entries[path] = entry
+
+    def prune(self, keep: set) -> None:
+        """Drop entries of files no longer indexed.
+
+        Their parse results may be shared with other files, so they stay in
+        the blob store until garbage is collected.
+
+        Args:
+            keep: Set of source paths that are still part of the index.
+        """
+        for path in [p for p in self.entries if p not in keep]:
+            del self.entries[path]
+            self.stats.deleted += 1
+
+    def verdict(self, path: str, stat: os.stat_result) -> Optional[bool]:
+        """Get the recorded binary verdict of a sniffed file.
+
+        Args:
+            path: Absolute path of the file.
+            stat: Current stat result of the file.
+
+        Returns:
+            Whether the file is binary, or None if it was not sniffed in its
+            current state.
+        """
+        verdict = self.verdicts.get(path)
+        if verdict is None or verdict[0] != stat.st_mtime_ns or verdict[1] != stat.st_size:
+            return None
+        return verdict[2]
+
+    def record_verdict(self, path: str, stat: os.stat_result, is_binary: bool) -> None:
+        """Record the binary verdict of a sniffed file.
+
+        Args:
+            path: Absolute path of the file.
+            stat: Stat result of the file when it was sniffed.
+            is_binary: Whether the file is binary.
+        """
+        self.verdicts[path] = [stat.st_mtime_ns, stat.st_size, is_binary]
+
+    def retain_verdicts(self, keep: Iterable[str]) -> None:
+        """Drop the verdicts of files that were not seen.
+
+        Args:
+            keep: Paths of all sniffed files that still exist.
+        """
+        keep = set(keep)
+        self.verdicts = {path: v for path, v in self.verdicts.items() if path in keep}
@@ -0,0 +1,114 @@
+"""Text/binary classification of files without reading them where possible."""
+
+import os
+import codecs
+from typing import Optional
+
+# bytes read when a file has to be sniffed
+SNIFF_SIZE = 1024
+
+TEXT_EXTENSIONS = frozenset(
+    {
+        # python and its tooling
+        ".py", ".pyi", ".pyx", ".pxd", ".pyw", ".ipynb", ".cfg", ".ini", ".toml", ".in",
+        # docs and data
+        ".md", ".markdown", ".rst", ".txt", ".adoc", ".tex", ".csv", ".tsv",
+        ".json", ".jsonl", ".yaml", ".yml", ".xml", ".html", ".htm", ".css", ".scss", ".svg",
+        # other languages
+        ".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".hh", ".cu", ".m", ".mm",
+        ".java", ".kt", ".kts", ".scala", ".groovy", ".gradle", ".go", ".rs", ".swift",
+        ".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".vue", ".svelte",
+        ".rb", ".php", ".pl", ".pm", ".lua", ".r", ".jl", ".dart", ".cs", ".fs", ".hs", ".ex", ".exs",
+        ".sh", ".bash", ".zsh", ".fish", ".ps1", ".bat", ".cmd",
+        ".sql", ".proto", ".graphql", ".cmake", ".mk", ".dockerfile", ".tf", ".nix",
+        ".lock", ".env", ".properties", ".conf", ".patch", ".diff",
+    }
+)
+
+BINARY_EXTENSIONS = frozenset(
+    {
+        # compiled and native code
+        ".pyc", ".pyo", ".pyd", ".so", ".dylib", ".dll", ".exe", ".o", ".obj", ".a", ".lib",
+        ".class", ".jar", ".war", ".wasm", ".bin", ".dat",
+        # archives
+        ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar", ".tar", ".whl", ".egg",
+        # media and documents
+        ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tif", ".tiff", ".psd",
+        ".mp3", ".wav", ".flac", ".ogg", ".mp4", ".mov", ".avi", ".mkv", ".webm",
+        ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".odt",
+        ".ttf", ".otf", ".woff", ".woff2", ".eot",
+        # data and model files
+        ".db", ".sqlite", ".sqlite3", ".pkl", ".pickle", ".npy", ".npz", ".h5", ".hdf5",
+        ".parquet", ".feather", ".arrow", ".pt", ".pth", ".ckpt", ".onnx", ".safetensors",
+        ".msgpack", ".marshal",
+    }
+)
+
+# extensionless files that are always text
+TEXT_NAMES = frozenset(
+    {
+        "Makefile", "Dockerfile", "Containerfile", "Jenkinsfile", "Vagrantfile", "Procfile",
+        "LICENSE", "LICENCE", "COPYING", "NOTICE", "AUTHORS", "README", "CHANGELOG", "MANIFEST",
+        ".gitignore", ".gitattributes", ".gitmodules", ".dockerignore", ".editorconfig",
+        ".probecodeignore",
+    }
+)
+
+
+def classify_name(name: str, size: Optional[int] = None) -> Optional[bool]:
+    """Classify a file by its name and size alone.
+
+    Args:
+        name: File name.
+        size: File size in bytes, if already known.
+
+    Returns:
+        True if the file is binary, False if it is text, None if it has to be sniffed.
+    """
+    if size == 0:
+        return False
+    extension = os.path.splitext(name)[1].lower()
+    if extension in TEXT_EXTENSIONS:
+        return False
+    if extension in BINARY_EXTENSIONS:
+        return True
+    if name in TEXT_NAMES:
+        return False
+    return None
+
+
+def is_binary_data(chunk: bytes, final: bool = True) -> bool:
+    """Check the beginning of a file for binary content.
+
+    Args:
+        chunk: First bytes of the file.
+        final: Whether the chunk is the whole file; otherwise a multi-byte
+            character cut off at its end is not an error.
+
+    Returns:
+        True if the chunk contains a NUL byte or is not valid UTF-8.
+    """
+    if b"\0" in chunk:
+        return True
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(chunk, final)
+        return False
+    except UnicodeDecodeError:
+        return True
+
+
+def sniff_binary(path: str) -> bool:
+    """Read the beginning of a file and check it for binary content.
+
+    Args:
+        path: Path to the file.
+
+    Returns:
+        True if the file is binary or unreadable.
+    """
+    try:
+        with open(path, "rb") as file:
+            chunk = file.read(SNIFF_SIZE + 1)
+    except OSError:
+        return True
+    return is_binary_data(chunk[:SNIFF_SIZE], final=len(chunk) <= SNIFF_SIZE)
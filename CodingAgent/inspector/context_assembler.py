@@ -0,0 +1,287 @@
+"""Token-budgeted assembly of the project context for the model.
+
+Instead of concatenating every file, files are ranked against the user
+query with what indexing already produced: top-level names from the
+manifest, symbol matches from the symbol index, path components, term hits
+in the content and the import graph. The best files are included in full
+while the budget allows, the symbols matching the query are cut out of
+files too large for that, and every other file is represented by a one-line
+outline of its definitions. The output is built from a list of parts and
+joined once, so assembly is linear in the size of the project.
+"""
+
+import re
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from CodingAgent.inspector.import_graph import ImportGraph
+from CodingAgent.inspector.symbol_index import SymbolIndex
+from CodingAgent.inspector.tokens import approximate_tokens
+
+DEFAULT_TOKEN_BUDGET = 32000
+# share of the budget held back so low-ranked files still get an outline
+OUTLINE_SHARE = 0.25
+SYSTEM_PREAMBLE = "You are good at coding."
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_STOPWORDS = frozenset(
+    {
+        "the", "and", "for", "with", "that", "this", "from", "into", "what", "where",
+        "when", "which", "who", "how", "why", "does", "are", "was", "were", "has", "have",
+        "not", "all", "any", "can", "use", "used", "using", "file", "files", "code",
+        "function", "class", "method", "please", "show", "find", "explain", "about",
+    }
+)
+
+
+def query_terms(query: Optional[str]) -> List[str]:
+    """Split a query into lowercase search terms.
+
+    Identifiers are split at underscores, dots and case changes, so
+    "FileContentReader.get_content" gives "file", "content", "reader", "get".
+
+    Args:
+        query: Free text query, may be None.
+
+    Returns:
+        Distinct terms of at least three characters, stopwords removed.
+    """
+    if not query:
+        return []
+    terms = dict.fromkeys(word.lower() for word in _WORD.findall(query))
+    return [term for term in terms if len(term) >= 3 and term not in _STOPWORDS]
+
+
+def _name_terms(name: str) -> List[str]:
+    return [word.lower() for word in _WORD.findall(name)]
+
+
+def render_file(path: str, content: str) -> str:
+    """Render the full text of a file."""
+    return f"\n\nFile: {path}\n\n=====BEGIN=====\n{content}\n=====END=====\n"
+
+
+def render_outline(path: str, record: Optional[Dict[str, Any]]) -> str:
+    """Render the one-line outline of a file from its manifest record."""
+    if not record:
+        return f"\n- {path}"
+    names = ", ".join(record.get("names", []))
+    return f"\n- {path} ({record.get('size', 0)} bytes, {record.get('status', 'parsed')}): {names}"
+
+
+class ContextAssembler:
+    """Ranks the indexed files against a query and packs them into a token budget."""
+
+    def __init__(
+        self,
+        contents: List[Tuple[str, str]],
+        manifest: Optional[Dict[str, Any]] = None,
+        import_graph: Optional[ImportGraph] = None,
+        symbol_index: Optional[SymbolIndex] = None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        count_tokens: Callable[[str], int] = approximate_tokens,
+        file_tokens: Optional[Dict[str, int]] = None,
+    ):
+        """Initialize the ContextAssembler.
+
+        Args:
+            contents: (path, content) pairs of the indexed files.
+            manifest: Manifest of the environment, see
+                CodingAgent.inspector.manifest; gives the outlines and names.
+            import_graph: Import graph; files many others import rank higher
+                and files imported by relevant ones inherit some relevance.
+            symbol_index: Symbol index, used to rank symbols against the
+                query and to cut them out of files too large to include.
+            token_budget: Maximum number of tokens of the assembled context.
+            count_tokens: Function counting the tokens of a text, e.g. a
+                CodingAgent.inspector.tokens.TokenCounter.
+            file_tokens: Known token counts of file contents, which spare
+                counting the files again.
+        """
+        self.contents = contents
+        self.records: Dict[str, Dict[str, Any]] = (manifest or {}).get("files", {})
+        self.import_graph = import_graph
+        self.symbol_index = symbol_index
+        self.token_budget = token_budget
+        self.count_tokens = count_tokens
+        self.file_tokens = file_tokens if file_tokens is not None else {}
+
+    @classmethod
+    def from_reader(cls, reader: Any, **kwargs: Any) -> "ContextAssembler":
+        """Create an assembler over the index of an entered FileContentReader.
+
+        The assembler reads the index of the reader in place; while a watcher
+        may refresh it, use it under the reader's index lock, as
+        make_context_builder does.
+
+        Args:
+            reader: FileContentReader whose contents are loaded.
+            **kwargs: token_budget, see __init__.
+
+        Returns:
+            The ContextAssembler.
+        """
+        return cls(
+            reader.get_content(update=False),
+            manifest=reader.manifest,
+            import_graph=reader.import_graph,
+            symbol_index=reader.symbol_index,
+            count_tokens=reader.token_counter,
+            file_tokens=reader.token_counts,
+            **kwargs,
+        )
+
+    def _symbol_matches(self, terms: List[str]) -> Dict[str, List[Tuple[float, Dict[str, Any]]]]:
+        """Find the symbols matching any query term, grouped by file."""
+        matches: Dict[str, List[Tuple[float, Dict[str, Any]]]] = {}
+        if self.symbol_index is None:
+            return matches
+        for term in terms:
+            for rank, symbol in enumerate(self.symbol_index.search(term, limit=50)):
+                # earlier results are better bm25 matches
+                matches.setdefault(symbol["path"], []).append((1.0 / (1 + rank), symbol))
+        return matches
+
+    def rank(
+        self, query: Optional[str] = None
+    ) -> Tuple[List[Tuple[float, str, str]], Dict[str, List[Tuple[float, Dict[str, Any]]]]]:
+        """Score every file against a query.
+
+        Args:
+            query: The user query; without one, files are ranked by how many
+                other files import them.
+
+        Returns:
+            Tuple of (score, path, content) sorted best first, and the
+            matching symbols of every file.
+        """
+        terms = query_terms(query)
+        symbols = self._symbol_matches(terms)
+        scores: Dict[str, float] = {}
+        for path, content in self.contents:
+            record = self.records.get(path, {})
+            score = 0.0
+            if terms:
+                names = {word for name in record.get("names", []) for word in _name_terms(name)}
+                parts = set(_name_terms(path))
+                lowered = content.lower()
+                for term in terms:
+                    if term in names:
+                        score += 4.0
+                    if term in parts:
+                        score += 2.0
+                    hits = lowered.count(term)
+                    if hits:
+                        score += math.log1p(hits)
+                score += 3.0 * sum(weight for weight, _ in symbols.get(path, []))
+            scores[path] = score
+        if self.import_graph is not None:
+            graph = self.import_graph
+            bonus: Dict[str, float] = {}
+            for module, path in graph.modules.items():
+                # widely imported modules are central to the project
+                bonus[path] = bonus.get(path, 0.0) + 0.1 * math.log1p(len(graph.reverse.get(module, ())))
+                if scores.get(path):
+                    for dependency in graph.forward.get(module, ()):
+                        target = graph.modules[dependency]
+                        bonus[target] = bonus.get(target, 0.0) + 0.25 * scores[path]
+            for path, value in bonus.items():
+                if path in scores:
+                    scores[path] += value
+        ranked = sorted(
+            ((scores[path], path, content) for path, content in self.contents),
+            key=lambda item: (-item[0], len(item[2]), item[1]),
+        )
+        return ranked, symbols
+
+    def _render_symbols(
+        self, path: str, content: str, matches: Iterable[Tuple[float, Dict[str, Any]]]
+    ) -> str:
+        """Render the source of the matching symbols of a file, best first."""
+        lines = content.split("\n")
+        parts, seen = [f"\n\nFile: {path} (matching symbols only)\n"], set()
+        for _, symbol in sorted(matches, key=lambda match: -match[0]):
+            start, end = symbol.get("line_start"), symbol.get("line_end")
+            if not start or not end or (start, end) in seen:
+                continue
+            seen.add((start, end))
+            snippet = "\n".join(lines[start - 1:end])
+            parts.append(f"\n# lines {start}-{end}\n=====BEGIN=====\n{snippet}\n=====END=====\n")
+        return "".join(parts) if len(parts) > 1 else ""
+
+    def assemble(self, query: Optional[str] = None, preamble: str = SYSTEM_PREAMBLE) -> str:
+        """Build the context for a query within the token budget.
+
+        Args:
+            query: The user query, may be None.
+            preamble: Text the context starts with.
+
+        Returns:
+            The assembled context.
+        """
+        ranked, symbols = self.rank(query)
+        parts = [preamble]
+        remaining = self.token_budget - self.count_tokens(preamble)
+        outlines = [render_outline(path, self.records.get(path)) for _, path, _ in ranked]
+        outline_costs = [self.count_tokens(outline) for outline in outlines]
+        reserve = min(sum(outline_costs), int(self.token_budget * OUTLINE_SHARE))
+        outline_header = "\n\nOther files (path, size, parse status: top-level definitions):"
+        omitted_note = "\n\n{} more file(s) left out to fit the context budget."
+        remaining -= self.count_tokens(outline_header)
+        remaining -= self.count_tokens(omitted_note.format(len(ranked)))
+        full, partial, outlined, omitted = [], [], [], 0
+        for index, (_, path, content) in enumerate(ranked):
+            reserve = max(reserve - outline_costs[index], 0)
+            block = render_file(path, content)
+            if path in self.file_tokens:
+                cost = self.file_tokens[path] + self.count_tokens(render_file(path, ""))
+            else:
+                cost = self.count_tokens(block)
+            if cost <= remaining - reserve:
+                full.append(block)
+                remaining -= cost
+                continue
+            if path in symbols:
+                block = self._render_symbols(path, content, symbols[path])
+                cost = self.count_tokens(block)
+                if block and cost <= remaining - reserve:
+                    partial.append(block)
+                    remaining -= cost
+                    continue
+            if outline_costs[index] <= remaining:
+                outlined.append(outlines[index])
+                remaining -= outline_costs[index]
+            else:
+                omitted += 1
+        parts += full + partial
+        if outlined:
+            parts.append(outline_header)
+            parts += outlined
+        if omitted:
+            parts.append(omitted_note.format(omitted))
+        return "".join(parts)
+
+
+def make_context_builder(
+    reader: Any, token_budget: int = DEFAULT_TOKEN_BUDGET, preamble: str = SYSTEM_PREAMBLE
+) -> Callable[[str], str]:
+    """Create the function a chat builds its system message with for every query.
+
+    Args:
+        reader: Entered FileContentReader; with a watcher running, every query
+            sees the files as they are at that moment.
+        token_budget: Maximum number of tokens of the context.
+        preamble: Text the context starts with.
+
+    Returns:
+        Maps a user query to the context of the files most relevant to it.
+    """
+
+    def build(query: str) -> str:
+        # a watcher refreshes manifest, import graph and symbol index in place
+        # on its own thread, so they are only read while holding the index lock
+        with reader._index_lock:
+            assembler = ContextAssembler.from_reader(reader, token_budget=token_budget)
+            return assembler.assemble(query, preamble=preamble)
+
+    return build
@@ -3,16 +3,143 @@
 import os
 import sys
 import json
+import asyncio
+import time
 import shutil
-import fnmatch
+import itertools
+import threading
 
 sys.path.append(os.getcwd())
-from typing import Optional, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, Optional, List, Set, Tuple, Union
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # add analyze tools
 from CodingAgent.config import load_config
-from CodingAgent.pyparser.parser import PythonStructureParser, parse_python_file
+from CodingAgent.pyparser.parser import (
+    PythonStructureParser,
+    load_source,
+    parse_python_file,
+)
+from CodingAgent.pyparser.outline import OUTLINE_THRESHOLD, parse_python_outline
+from CodingAgent.inspector.blob_store import BlobStore, blob_variant
+from CodingAgent.inspector.cache import CacheStats, ParseCache, hash_chunks, hash_content
+from CodingAgent.inspector.classify import (
+    SNIFF_SIZE,
+    classify_name,
+    is_binary_data,
+    sniff_binary,
+)
+from CodingAgent.inspector.git_state import GitState, mark_dirty
+from CodingAgent.inspector.manifest import (
+    build_manifest,
+    summarize_symbols,
+    update_manifest,
+    write_manifest,
+)
+from CodingAgent.inspector.matcher import PathMatcher
+from CodingAgent.inspector.ignore import IgnoreRules, IgnoreTree
+from CodingAgent.inspector.locking import LOCK_FILE_NAME, EnvironmentLock, atomic_write
+from CodingAgent.inspector.storage import get_storage
+from CodingAgent.inspector.symbol_index import SYMBOL_INDEX_FILE_NAME, SymbolIndex
+from CodingAgent.inspector.tokens import TokenCounter
+from CodingAgent.inspector.watcher import FileWatcher
+from CodingAgent.inspector.import_graph import (
+    IMPORT_GRAPH_FILE_NAME,
+    ImportGraph,
+    extract_imports,
+)
+
+# files classified ahead of the consumer, and threads sniffing them
+SNIFF_WINDOW = 256
+SNIFF_THREADS = 8
+
+# files larger than this are only read up to it and indexed in outline form
+MAX_FILE_SIZE = 8 << 20
+# pieces in which the rest of an oversized file is hashed
+READ_CHUNK_SIZE = 1 << 20
+SIZE_REPORT_FILE_NAME = "size_report.json"
+# seconds between two writes of the cache, manifest and import graph while
+# refreshing files; whatever is left is written when the reader is closed
+FLUSH_INTERVAL = 30.0
+
+
+def _parse_file_worker(
+    path: str,
+    source: Optional[bytes] = None,
+    compact: bool = False,
+    outline: bool = False,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Parse a single file, capturing failures instead of raising them.
+
+    Defined at module level so it can be shipped to worker processes.
+
+    Args:
+        path: Absolute path of the source file.
+        source: Already loaded content of the file.
+        compact: Whether to produce the compact, span-based result format.
+        outline: Whether to only scan the file for an outline of its
+            definitions instead of parsing it fully.
+
+    Returns:
+        Tuple of (parse result, error message).
+    """
+    try:
+        if outline:
+            return parse_python_outline(file_path=path, source=source), None
+        return parse_python_file(file_path=path, source=source, compact=compact), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _decode_text(data: bytes) -> str:
+    """Decode file bytes the way text-mode reading with ignored errors would.
+
+    Args:
+        data: Raw file content.
+
+    Returns:
+        Decoded text with universal newlines.
+    """
+    text = data.decode("utf-8", errors="ignore")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+class IndexedFile:
+    """A file that went through the indexing pipeline.
+
+    Attributes:
+        path: Absolute path of the source file.
+        content: Decoded text of the file.
+        environ_file: Path to the environment file holding the parse result.
+        status: "hit" if a stored result was reused, including one parsed for
+            an identical file, "parsed" or "failed".
+        result: Parse result, only set for files parsed in this run.
+        truncated: Whether content holds only part of the file (or nothing),
+            because of the per-file or total size budget.
+        tokens: Number of tokens of content.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        content: str,
+        environ_file: str,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+    ):
+        self.path = path
+        self.content = content
+        self.environ_file = environ_file
+        self.status = status
+        self.result = result
+        self.truncated = False
+        self.tokens = 0
+        self._pending: Optional[Tuple[Optional[bytes], os.stat_result, str]] = None
 
 
 class AbstractContentProvider(ABC):
@@ -41,6 +168,20 @@ class FileContentReader(AbstractContentProvider):
         file_path: str = None,
         include_list: Optional[List[str]] = None,
         exclude_list: Optional[List[str]] = None,
+        incremental: bool = False,
+        workers: int = 1,
+        compact: bool = False,
+        storage: str = "json",
+        symbol_index: bool = False,
+        import_graph: bool = False,
+        outline_threshold: Optional[int] = OUTLINE_THRESHOLD,
+        git_aware: bool = True,
+        follow_symlinks: bool = True,
+        gitignore: bool = False,
+        max_file_size: Optional[int] = MAX_FILE_SIZE,
+        max_total_size: Optional[int] = None,
+        io_workers: int = 1,
+        token_counter: Optional[TokenCounter] = None,
     ):
         """Initialize the FileContentReader.
 
@@ -48,6 +189,41 @@ class FileContentReader(AbstractContentProvider):
             file_path: Path to the directory to read files from. Defaults to current working directory.
             include_list: List of file patterns to include.
             exclude_list: List of file patterns to exclude.
+            incremental: Whether to keep the environment between runs and only
+                re-parse files whose content changed.
+            workers: Number of worker processes used for parsing. 1 parses
+                serially in the current process.
+            compact: Whether to store parse results in the compact format,
+                which keeps the file source once and references it by span.
+            storage: Name of the storage backend for environment files, see
+                CodingAgent.inspector.storage.STORAGE_BACKENDS.
+            symbol_index: Whether to maintain a SQLite symbol index with full-text
+                search next to the environment files.
+            import_graph: Whether to resolve module-level imports into an import
+                graph of the repository, stored next to the environment files.
+            outline_threshold: Size in bytes from which files are only scanned for
+                an outline of their definitions (names, signatures, docstrings and
+                line ranges, no source code). None always parses fully.
+            git_aware: Whether to ask git which files changed since the last
+                run inside a git work tree, so files whose mtime changed (e.g.
+                after a fresh checkout) are not hashed again. Outside git,
+                changed files are found by content hash.
+            follow_symlinks: Whether to descend into symlinked directories.
+                Every directory is visited at most once either way.
+            gitignore: Whether to skip files and directories ignored by the
+                .gitignore and .probecodeignore files of the tree (and
+                .git/info/exclude), on top of the exclude patterns.
+            max_file_size: Size in bytes above which files are never read whole:
+                only this many bytes are read, the rest is hashed in chunks,
+                and they are indexed in outline form, streamed from disk. Their
+                content is not kept. None reads every file whole.
+            max_total_size: Budget in bytes for the content kept by a full run;
+                once spent, later files are still indexed but their content is
+                cut or left empty. None keeps all content.
+            io_workers: Number of threads reading files ahead of the parser.
+                Worth raising on high-latency filesystems such as NFS.
+            token_counter: Counts the tokens of every indexed file; the counts
+                are kept in the parse cache. Defaults to approximate counts.
 
         Raises:
             ValueError: If file_path is not a valid directory.
@@ -58,22 +234,215 @@ class FileContentReader(AbstractContentProvider):
         self.total_file_path = file_path
         self.include_list = include_list if include_list is not None else []
         self.exclude_list = exclude_list if exclude_list is not None else []
+        self._include = PathMatcher(self.include_list)
+        self._exclude = PathMatcher(self.exclude_list)
+        # "dir/*" excludes every file below dir, so dir is not walked at all
+        self._prune = PathMatcher(
+            pat[:-2] for pat in self.exclude_list if pat.endswith("/*") and len(pat) > 2
+        )
+        self._root_prefix = os.path.join(file_path, "")
+        self.follow_symlinks = follow_symlinks
+        self._ignore_tree = IgnoreTree(file_path) if gitignore else None
         self._contents: Optional[List[Tuple[str, str]]] = None
         self.files_filtered: Optional[List[str]] = None
+        self.incremental = incremental
+        self.workers = max(1, workers)
+        self.io_workers = max(1, io_workers)
+        self.token_counter = token_counter if token_counter is not None else TokenCounter()
+        # tokens of the content of every indexed file
+        self.token_counts: Dict[str, int] = {}
+        self.compact = compact
+        self.outline_threshold = outline_threshold
+        self.max_file_size = max_file_size
+        self.max_total_size = max_total_size
+        # files whose content was cut or left out in the last run
+        self.size_report: Dict[str, List[Dict[str, Any]]] = {"truncated": [], "skipped": []}
+        self._content_bytes = 0
+        # compact results are written without whitespace by the json backend
+        self.storage = get_storage(storage, pretty=not compact)
         self.config = load_config()
 
         # feat: loading for environments
         # self.environment is where the stores the code, in the current working directory
         self.environ_path = os.path.join(os.getcwd(), ".environment")
-        if os.path.exists(self.environ_path) and os.listdir(self.environ_path):
+        if (
+            not incremental
+            and os.path.exists(self.environ_path)
+            and os.listdir(self.environ_path)
+        ):
             print(
                 f"INFO: The environment path {self.environ_path} has been created and has contents in it! You can delete it manually for updating code status or using update flag while reading content."
             )
         os.makedirs(self.environ_path, exist_ok=True)
-        # todo add smarter judgement for rewriting files for updating codes.
+        self.cache = ParseCache(
+            self.environ_path,
+            options={
+                "compact": compact,
+                "outline_threshold": outline_threshold,
+                "max_file_size": max_file_size,
+            },
+        )
+        # parse results shared by all files with the same content
+        self.blobs = BlobStore(self.environ_path, self.storage)
+        # blobs of files waiting to be parsed in the current run
+        self._blobs_pending: Set[str] = set()
+        # manifest of the indexed files, see CodingAgent.inspector.manifest
+        self.manifest: Dict[str, Any] = {}
+        self.use_symbol_index = symbol_index
+        self.symbol_index: Optional[SymbolIndex] = None
+        self.use_import_graph = import_graph
+        self.import_graph: Optional[ImportGraph] = None
+        self.git_aware = git_aware
+        self._git_state: Optional[GitState] = None
+        # files git reports unchanged since the baseline of the last run
+        self._git_unchanged: Set[str] = set()
+        self._refreshed: Set[str] = set()
+        # files classified by sniffing during the current full walk
+        self._sniffed: Set[str] = set()
+        # serializes indexing between the caller and a running watcher
+        self._index_lock = threading.RLock()
+        # serializes index generations of all processes sharing the environment
+        self._environ_lock = EnvironmentLock(self.environ_path)
+        self._cache_loaded = False
+        # refreshes whose cache, manifest and import graph are not written yet
+        self._unflushed = False
+        self._flushed_at = 0.0
+        # files are filtered on the first get_content, iter_index streams instead
+
+    def _iter_all_files(self) -> Iterator[str]:
+        """Lazily walk the directory, skipping excluded directories.
+
+        Yields:
+            Absolute file paths.
+        """
+        for entry in self._iter_file_entries():
+            yield entry.path
+
+    def _iter_file_entries(self) -> Iterator[os.DirEntry]:
+        """Walk the directory with os.scandir, depth first in sorted order.
+
+        Directories matched by an exclude pattern ending in "/*" are pruned
+        before descending into them, as every file below would be excluded
+        anyway. File types come from the directory listing, so files and
+        directories are not stat'ed; the DirEntry objects keep any stat
+        result for later use. Symlinked directories are walked after all real
+        ones, and directories already visited (by device and inode) are
+        skipped, so files keep their real path where they have one and
+        symlink loops end.
+
+        Yields:
+            DirEntry of every file, in the same order as a sorted os.walk.
+        """
+        root = self.total_file_path
+        try:
+            root_stat = os.stat(root)
+        except OSError:
+            return
+        visited = {(root_stat.st_dev, root_stat.st_ino)}
+        ignore_tree = self._ignore_tree
+        root_rules = ignore_tree.root_rules if ignore_tree is not None else None
+        stack = [(root, root_stat.st_dev, root_rules)]
+        linked = deque()
+        while stack or linked:
+            if not stack:
+                path, key, rules = linked.popleft()
+                if key in visited:
+                    continue
+                visited.add(key)
+                stack.append((path, key[0], rules))
+            directory, device, rules = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            if ignore_tree is not None:
+                rel_dir = self._ignore_path(directory) if directory != root else ""
+                rules = rules.extend(
+                    ignore_tree.load(directory, rel_dir, [entry.name for entry in entries])
+                )
+            subdirs = []
+            for entry in entries:
+                try:
+                    if entry.is_symlink():
+                        if not self.follow_symlinks or not entry.is_dir():
+                            if entry.is_file() and not self._is_ignored(entry, rules, False):
+                                yield entry
+                            continue
+                        if self._is_ignored(entry, rules, True) or self._is_pruned_dir(entry.path):
+                            continue
+                        # the only case that needs a stat, to find the target
+                        stat = entry.stat()
+                        linked.append((entry.path, (stat.st_dev, stat.st_ino), rules))
+                        continue
+                    elif entry.is_dir(follow_symlinks=False):
+                        # inode() comes with the listing; without symlinks the
+                        # device only changes at mount points, which cannot loop
+                        key = (device, entry.inode())
+                    else:
+                        if entry.is_file(follow_symlinks=False) and not self._is_ignored(
+                            entry, rules, False
+                        ):
+                            yield entry
+                        continue
+                except OSError:
+                    continue
+                if (
+                    key in visited
+                    or self._is_ignored(entry, rules, True)
+                    or self._is_pruned_dir(entry.path)
+                ):
+                    continue
+                visited.add(key)
+                subdirs.append((entry.path, key[0], rules))
+            stack.extend(reversed(subdirs))
+
+    def _ignore_path(self, path: str) -> str:
+        """Get the "/"-separated path relative to the root used by ignore files."""
+        rel_path = self._relative_path(path)
+        return rel_path if os.sep == "/" else rel_path.replace(os.sep, "/")
 
-        # Initialize
-        self.filter_files()
+    def _is_ignored(self, entry: os.DirEntry, rules: Optional[IgnoreRules], is_dir: bool) -> bool:
+        """Check a walked entry against the ignore files of its directory.
+
+        Args:
+            entry: The file or directory.
+            rules: Ignore rules of the directory, None if ignore files are off.
+            is_dir: Whether the entry is walked as a directory.
+
+        Returns:
+            True if the entry is ignored.
+        """
+        if rules is None:
+            return False
+        if is_dir and entry.name == ".git":
+            return True
+        return rules.is_ignored(self._ignore_path(entry.path), is_dir)
+
+    def _is_pruned_dir(self, path: str) -> bool:
+        """Check whether every file below a directory is excluded.
+
+        Args:
+            path: Absolute path of the directory.
+
+        Returns:
+            True if an exclude pattern "<dir pattern>/*" matches the directory.
+        """
+        return bool(self._prune) and self._prune.match(self._relative_path(path))
+
+    def _relative_path(self, path: str) -> str:
+        """Get the path of a file relative to the directory being read.
+
+        Args:
+            path: Path of the file, as produced by the walk or given by the caller.
+
+        Returns:
+            The relative path; paths from the walk are sliced instead of
+            going through os.path.relpath.
+        """
+        if path.startswith(self._root_prefix):
+            return path[len(self._root_prefix):]
+        return os.path.relpath(path, self.total_file_path)
 
     def _all_files(self) -> List[str]:
         """Get absolute paths of all files in the directory.
@@ -81,11 +450,58 @@ class FileContentReader(AbstractContentProvider):
         Returns:
             List of absolute file paths.
         """
-        matches = []
-        for root, _, files in os.walk(self.total_file_path):
-            for f in files:
-                matches.append(os.path.join(root, f))
-        return matches
+        return list(self._iter_all_files())
+
+    def _iter_candidates(self) -> Iterator[str]:
+        """Lazily walk the directory, applying include and exclude patterns per file.
+
+        Yields:
+            Absolute paths of files passing the patterns.
+        """
+        for entry in self._iter_candidate_entries():
+            yield entry.path
+
+    def _iter_candidate_entries(self) -> Iterator[os.DirEntry]:
+        """Lazily walk the directory, applying include and exclude patterns per file.
+
+        Yields:
+            DirEntry of every file passing the patterns.
+        """
+        for entry in self._iter_file_entries():
+            # ignore files were already applied while descending
+            if self._matches_patterns(entry.path):
+                yield entry
+
+    def _matches_patterns(self, path: str) -> bool:
+        """Check a file against the include and exclude patterns.
+
+        Args:
+            path: Absolute path of the file.
+
+        Returns:
+            True if the file is included and not excluded.
+        """
+        rel_path = self._relative_path(path)
+        if rel_path.startswith(os.pardir):
+            return False
+        if self._include and not self._include.match(rel_path):
+            return False
+        return not (self._exclude and self._exclude.match(rel_path))
+
+    def _is_candidate(self, path: str) -> bool:
+        """Check a file found outside the walk against patterns and ignore files.
+
+        Args:
+            path: Absolute path of the file.
+
+        Returns:
+            True if the file is included, not excluded and not ignored.
+        """
+        if not self._matches_patterns(path):
+            return False
+        return self._ignore_tree is None or not self._ignore_tree.is_ignored(
+            self._ignore_path(path)
+        )
 
     def _match_patterns(self, files: List[str], patterns: List[str]) -> List[str]:
         """Return files that match any of the patterns.
@@ -97,34 +513,133 @@ class FileContentReader(AbstractContentProvider):
         Returns:
             List of matching file paths.
         """
-        matched = set()
-        for pat in patterns:
-            for f in files:
-                rel_path = os.path.relpath(f, self.total_file_path)
-                if fnmatch.fnmatch(rel_path, pat):
-                    matched.add(f)
-        return list(matched)
+        matcher = PathMatcher(patterns)
+        return [f for f in files if matcher.match(self._relative_path(f))]
+
+    def _read_file(
+        self, path: str
+    ) -> Optional[Tuple[bytes, os.stat_result, Optional[str]]]:
+        """Read the raw bytes and stat of a file with a single open.
+
+        Files above max_file_size are only read up to the limit; the rest is
+        hashed in fixed-size chunks and never held in memory.
+
+        Args:
+            path: Path to the file to read.
+
+        Returns:
+            Tuple of (file bytes, stat result, content hash if the bytes are
+            only the head of the file), or None if the file is unreadable.
+        """
+        try:
+            if self.max_file_size is None:
+                return (*load_source(path), None)
+            with open(path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                # the size only decides how to read, the bytes read decide the
+                # rest, as the file may change between the stat and the read
+                if stat.st_size <= self.max_file_size:
+                    data = file.read()
+                else:
+                    data = file.read(self.max_file_size + 1)
+                content_hash = None
+                if len(data) > self.max_file_size:
+                    rest = iter(lambda: file.read(READ_CHUNK_SIZE), b"")
+                    content_hash = hash_chunks(itertools.chain([data], rest))
+                    data = data[: self.max_file_size]
+                if file.tell() != stat.st_size:
+                    stat = os.fstat(file.fileno())
+                return data, stat, content_hash
+        except (OSError, ValueError):
+            return None
 
-    def _is_binary_file(self, path: str) -> bool:
+    def _is_binary_file(self, path: str, data: Optional[bytes] = None) -> bool:
         """Check if a file is a binary file.
 
         Args:
             path: Path to the file to check.
+            data: Already loaded content of the file, to avoid reading it again.
 
         Returns:
             True if the file is binary, False otherwise.
         """
+        if data is None:
+            return sniff_binary(path)
+        return is_binary_data(data[:SNIFF_SIZE], final=len(data) <= SNIFF_SIZE)
+
+    def _iter_text_files(
+        self, files: Iterable[Union[os.DirEntry, str]], window: int = SNIFF_WINDOW
+    ) -> Iterator[str]:
+        """Drop binary files from a stream of files, keeping the order.
+
+        Most files are classified by their extension without touching them.
+        The others are stat'ed (DirEntry objects reuse their stat result) and
+        looked up in the verdicts recorded by earlier runs; only files that
+        are new or changed since are sniffed, in a thread pool working up to
+        `window` files ahead.
+
+        Args:
+            files: Walked DirEntry objects or absolute paths.
+            window: Maximum number of files classified ahead of the consumer.
+
+        Yields:
+            Absolute paths of the text files.
+        """
+        pending = deque()
+        executor = None
         try:
-            with open(path, "rb") as f:
-                chunk = f.read(1024)
-            # Check for null byte
-            if b"\0" in chunk:
-                return True
-            # Try to decode as utf-8
-            chunk.decode("utf-8")
-            return False
-        except (UnicodeDecodeError, OSError):
-            return True
+            for item in files:
+                if isinstance(item, str):
+                    path, name = item, os.path.basename(item)
+                else:
+                    path, name = item.path, item.name
+                stat = None
+                verdict = classify_name(name)
+                if verdict is None:
+                    try:
+                        stat = os.stat(path) if isinstance(item, str) else item.stat()
+                    except OSError:
+                        continue
+                    verdict = classify_name(name, stat.st_size)
+                if verdict is None:
+                    self._sniffed.add(path)
+                    verdict = self.cache.verdict(path, stat)
+                    if verdict is None:
+                        if executor is None:
+                            executor = ThreadPoolExecutor(max_workers=SNIFF_THREADS)
+                        verdict = executor.submit(self._is_binary_file, path)
+                pending.append((path, stat, verdict))
+                while pending and (
+                    len(pending) > window or not isinstance(pending[0][2], Future)
+                ):
+                    path = self._settle_verdict(*pending.popleft())
+                    if path is not None:
+                        yield path
+            while pending:
+                path = self._settle_verdict(*pending.popleft())
+                if path is not None:
+                    yield path
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def _settle_verdict(
+        self, path: str, stat: Optional[os.stat_result], verdict: Union[bool, Future]
+    ) -> Optional[str]:
+        """Wait for the classification of a file, recording sniffed verdicts.
+
+        Args:
+            path: Absolute path of the file.
+            stat: Stat result of the file, set for files that were sniffed.
+            verdict: Whether the file is binary, or a future resolving to it.
+
+        Returns:
+            The path if the file is text, None if it is binary.
+        """
+        if isinstance(verdict, Future):
+            verdict = verdict.result()
+            self.cache.record_verdict(path, stat, verdict)
+        return None if verdict else path
 
     def filter_files(self) -> List[str]:
         """Filter files with include then exclude patterns.
@@ -132,73 +647,725 @@ class FileContentReader(AbstractContentProvider):
         Returns:
             List of filtered file paths.
         """
-        all_files = self._all_files()
+        with self._index_lock:
+            self._load_cache()
+            self._sniffed = set()
+            # Step 1 and 2: include and exclude, in one pass during the walk
+            # Step 3: skip binary files, without opening most of them
+            self.files_filtered = sorted(
+                self._iter_text_files(self._iter_candidate_entries())
+            )
+        return self.files_filtered
+
+    def _load_cache(self) -> None:
+        """Load the parse cache on first use, or when another process replaced it.
+
+        Later runs keep the cache in memory as long as no other process
+        indexed into the same environment in between.
+        """
+        if not self._cache_loaded or self.cache.changed_on_disk():
+            self.cache.load()
+            self._cache_loaded = True
+            # derived from the cache that was replaced, rebuilt by the next run
+            self.manifest, self.import_graph = {}, None
+            self._unflushed = False
+
+    def _is_outline(self, stat: os.stat_result) -> bool:
+        """Check whether a file of this size is only parsed into an outline.
+
+        Args:
+            stat: Stat result of the file.
+
+        Returns:
+            True if the file is oversized or reaches the outline threshold.
+        """
+        return (self.max_file_size is not None and stat.st_size > self.max_file_size) or (
+            self.outline_threshold is not None and stat.st_size >= self.outline_threshold
+        )
+
+    def _environ_file_path(self, content_hash: str, stat: os.stat_result) -> str:
+        """Get the environment file (blob) storing the parse result of a content.
+
+        Args:
+            content_hash: Hash of the source content.
+            stat: Stat result of the source file, which decides the parse mode.
+
+        Returns:
+            Path to the blob, with the suffix of the storage backend.
+        """
+        outline = self._is_outline(stat)
+        return self.blobs.path_for(content_hash, blob_variant(self.compact, outline))
+
+    def _write_environ_file(
+        self, result: Optional[Dict[str, Any]], environ_file_path: str
+    ) -> None:
+        """Dump a parse result into its environment file.
+
+        Args:
+            result: Parse result of the source file.
+            environ_file_path: Path to the environment file.
+        """
+        self.blobs.write(result, environ_file_path)
+
+    def _index_symbols(
+        self,
+        path: str,
+        content_hash: str,
+        environ_file_path: str,
+        result: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Bring the symbol index entry of a file up to date.
+
+        Args:
+            path: Absolute path of the source file.
+            content_hash: Hash of the file content.
+            environ_file_path: Path to the environment file of the source file.
+            result: Fresh parse result; loaded from the environment file if the
+                index is outdated and no result is given.
+        """
+        if self.symbol_index is None:
+            return
+        if result is None:
+            if self.symbol_index.file_hash(path) == content_hash:
+                return
+            result = self.blobs.load(environ_file_path, path)
+        self.symbol_index.upsert_file(path, result, content_hash)
+
+    def _entry_imports(self, path: str, entry: Dict[str, Any]) -> List[Any]:
+        """Get the imports of a cached file, extracting them on first use.
+
+        Args:
+            path: Absolute path of the source file.
+            entry: Cache entry of the file.
+
+        Returns:
+            Raw imports of the file, see CodingAgent.inspector.import_graph.
+        """
+        if "imports" not in entry:
+            # cached before the import graph was enabled
+            entry["imports"] = extract_imports(
+                self.blobs.load(self.cache.environ_file(entry), path)
+            )
+        return entry["imports"]
+
+    def _entry_symbols(self, path: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the symbol summary the manifest lists to a cache entry if missing.
+
+        Args:
+            path: Absolute path of the source file.
+            entry: Cache entry of the file.
+
+        Returns:
+            The cache entry.
+        """
+        if "symbols" not in entry:
+            # cached before the manifest listed symbols, or shared with an identical file
+            try:
+                result = self.blobs.load(self.cache.environ_file(entry), path)
+            except OSError:
+                return entry
+            entry["symbols"] = summarize_symbols(result)
+        return entry
+
+    def _build_import_graph(self) -> ImportGraph:
+        """Build the import graph from the imports kept in the cache.
+
+        Returns:
+            The import graph of all indexed files.
+        """
+        files = [(path, self._entry_imports(path, entry)) for path, entry in self.cache.entries.items()]
+        return ImportGraph.build(self.total_file_path, files)
+
+    def _build_manifest(self) -> Dict[str, Any]:
+        """Build the manifest of all indexed files from the cache.
+
+        Returns:
+            The manifest, see CodingAgent.inspector.manifest.
+        """
+        files = [(path, self._entry_symbols(path, entry)) for path, entry in self.cache.entries.items()]
+        return build_manifest(self.total_file_path, sorted(files))
+
+    def _clean_environment(self) -> None:
+        """Delete the environment before a full (non-incremental) rebuild.
+
+        The lock file is kept, as other processes may be waiting on it.
+        """
+        if not os.path.exists(self.environ_path):
+            print(f"Folder '{self.environ_path}' does not exist.")
+            return
+        with self._index_lock, self._environ_lock:
+            if self.symbol_index is not None:
+                # its database is deleted below
+                self.symbol_index.close()
+                self.symbol_index = None
+            try:
+                with os.scandir(self.environ_path) as entries:
+                    for entry in entries:
+                        if entry.name == LOCK_FILE_NAME:
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            shutil.rmtree(entry.path)
+                        else:
+                            os.remove(entry.path)
+                self._cache_loaded = False
+            except OSError as e:
+                print(f"Error: Could not delete folder {self.environ_path}: {e}")
+
+    def _iter_read(
+        self, paths: Iterable[str]
+    ) -> Iterator[Tuple[str, Optional[Tuple[bytes, os.stat_result, Optional[str]]]]]:
+        """Read files in order, overlapping opens and reads with io_workers > 1.
+
+        With more than one I/O worker, up to four reads per worker are in
+        flight in a thread pool, which hides the round trips of high-latency
+        filesystems such as NFS.
+
+        Args:
+            paths: Absolute paths of the files to read.
+
+        Yields:
+            Tuples of (path, result of _read_file), in the order given.
+        """
+        if self.io_workers <= 1:
+            for path in paths:
+                yield path, self._read_file(path)
+            return
+        window = deque()
+        executor = ThreadPoolExecutor(max_workers=self.io_workers)
+        try:
+            for path in paths:
+                window.append((path, executor.submit(self._read_file, path)))
+                if len(window) >= self.io_workers * 4:
+                    path, future = window.popleft()
+                    yield path, future.result()
+            while window:
+                path, future = window.popleft()
+                yield path, future.result()
+        finally:
+            executor.shutdown(cancel_futures=True)
 
-        # Step 1: include
-        if self.include_list:
-            included = self._match_patterns(all_files, self.include_list)
+    def _prepare_file(
+        self,
+        path: str,
+        loaded: Optional[Tuple[bytes, os.stat_result, Optional[str]]],
+        partial: bool = False,
+    ) -> Optional[IndexedFile]:
+        """Decide whether the cached parse result of a read file can be reused.
+
+        Args:
+            path: Absolute path of the source file, already classified as text.
+            loaded: Result of _read_file for the file.
+            partial: Whether the file is refreshed outside a full run, which
+                leaves the total size budget alone.
+
+        Returns:
+            The IndexedFile, with status "hit" or "pending", or None if the file
+            is unreadable or binary.
+        """
+        if loaded is None:
+            print(f"Error: Could not read file '{path}'")
+            return None
+        data, stat, head_hash = loaded
+        if self._is_binary_file(path, data):
+            # a text extension does not vouch for the content, the bytes are here anyway
+            self._sniffed.add(path)
+            self.cache.record_verdict(path, stat, True)
+            return None
+        stats = self.cache.stats
+        content, truncated = self._budget_content(
+            path, data, stat, head_only=head_hash is not None, total=not partial
+        )
+        item = IndexedFile(path, content, None, "hit")
+        item.truncated = truncated
+        entry = self.cache.entries.get(path)
+        if entry is not None and entry["hash"] is not None:
+            item.environ_file = self._environ_file_path(entry["hash"], stat)
+            if self.cache.is_fresh(path, stat, item.environ_file):
+                stats.hits += 1
+                self._index_symbols(path, entry["hash"], item.environ_file)
+                return item
+            if path in self._git_unchanged and self.cache.is_valid(path, item.environ_file):
+                # only the stat data is outdated, e.g. after a checkout
+                stats.hits += 1
+                content_hash = entry["hash"]
+                self.cache.record(path, stat, content_hash, item.environ_file)
+                self._index_symbols(path, content_hash, item.environ_file)
+                return item
+        content_hash = head_hash or hash_content(data)
+        item.environ_file = self._environ_file_path(content_hash, stat)
+        if self.cache.matches(path, content_hash, item.environ_file):
+            stats.hits += 1
+            self.cache.record(path, stat, content_hash, item.environ_file)
+            self._index_symbols(path, content_hash, item.environ_file)
+            return item
+        if item.environ_file in self._blobs_pending or os.path.exists(item.environ_file):
+            # the same content was parsed for another file, or in an earlier run
+            stats.shared += 1
+            item.status = "shared"
+            item._pending = (None, stat, content_hash)
+            return item
+        if path in self.cache.entries:
+            stats.reparsed += 1
         else:
-            included = all_files  # Default to all files
+            stats.misses += 1
+        item.status = "pending"
+        self._blobs_pending.add(item.environ_file)
+        # oversized files are streamed from disk by the outline parser
+        item._pending = (None if head_hash else data, stat, content_hash)
+        return item
+
+    def _budget_content(
+        self,
+        path: str,
+        data: bytes,
+        stat: os.stat_result,
+        head_only: bool = False,
+        total: bool = True,
+    ) -> Tuple[str, bool]:
+        """Cut the content of a file to the per-file and total size budgets.
+
+        Files above max_file_size keep no content at all, so a few generated
+        giants cannot use up the total budget ahead of the real sources.
+
+        Args:
+            path: Absolute path of the file.
+            data: Bytes read from the file, at most max_file_size of them.
+            stat: Stat result of the file.
+            head_only: Whether data is only the head of a file above max_file_size.
+            total: Whether to charge the content to the total budget.
+
+        Returns:
+            Tuple of (decoded content that is kept, whether it was cut); cut
+            files are recorded in size_report with every budget they exceed.
+        """
+        kept, reasons = data, []
+        if head_only:
+            kept = b""
+            reasons.append("file_limit")
+        if total and self.max_total_size is not None:
+            remaining = max(self.max_total_size - self._content_bytes, 0)
+            if len(data) > remaining:
+                kept = kept[:remaining]
+                reasons.append("total_budget")
+        self._content_bytes += len(kept)
+        if reasons:
+            entry = {"path": path, "size": stat.st_size, "kept": len(kept), "reasons": reasons}
+            self.size_report["truncated" if kept else "skipped"].append(entry)
+        return _decode_text(kept), bool(reasons)
+
+    def _complete_file(self, item: IndexedFile, parsed: Any) -> IndexedFile:
+        """Persist the parse result of a pending file.
+
+        Args:
+            item: The IndexedFile to complete.
+            parsed: A (result, error) tuple or a future resolving to one, or
+                None for cache hits.
+
+        Returns:
+            The completed IndexedFile.
+        """
+        if item.status == "shared":
+            _, stat, content_hash = item._pending
+            item._pending = None
+            if not os.path.exists(item.environ_file):
+                # the identical file ahead of it failed to parse
+                item.status = "failed"
+                return item
+            item.status = "hit"
+            self.cache.record(item.path, stat, content_hash, item.environ_file)
+            self._index_symbols(item.path, content_hash, item.environ_file)
+            return item
+        if item.status != "pending":
+            return item
+        if isinstance(parsed, Future):
+            try:
+                parsed = parsed.result()
+            except BrokenProcessPool:
+                parsed = self._parse_isolated(item)
+        result, error = parsed
+        _, stat, content_hash = item._pending
+        item._pending = None
+        path, environ_file_path = item.path, item.environ_file
+        item.result = result
+        if error is not None:
+            # not stored, so the file is retried on the next run
+            print(f"Error: Failed to parse file '{path}': {error}")
+            item.status = "failed"
+            return item
+        self._write_environ_file(result, environ_file_path)
+        item.status = "parsed"
+        extra = {"symbols": summarize_symbols(result)}
+        if self.use_import_graph:
+            extra["imports"] = extract_imports(result)
+        self.cache.record(path, stat, content_hash, environ_file_path, **extra)
+        self._index_symbols(path, content_hash, environ_file_path, result)
+        return item
+
+    def _parse_isolated(self, item: IndexedFile) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Parse a pending file in a process of its own.
+
+        Used for the files in flight when a worker process died, e.g. crashed
+        or was killed while parsing one of them: only that file fails again.
+
+        Args:
+            item: The pending IndexedFile.
+
+        Returns:
+            Tuple of (parse result, error message).
+        """
+        data, stat, _ = item._pending
+        args = (item.path, data, self.compact, self._is_outline(stat))
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                return executor.submit(_parse_file_worker, *args).result()
+            except BrokenProcessPool:
+                return None, "BrokenProcessPool: the parser process died"
 
-        # Step 2: exclude
-        if self.exclude_list:
-            excluded = set(self._match_patterns(all_files, self.exclude_list))
-            final_files = [f for f in included if f not in excluded]
+    def _count_tokens(self, item: IndexedFile) -> IndexedFile:
+        """Count the tokens of an indexed file, reusing the count in its cache entry.
+
+        Args:
+            item: The completed IndexedFile.
+
+        Returns:
+            The IndexedFile, with tokens set.
+        """
+        entry = self.cache.entries.get(item.path)
+        if item.truncated or entry is None or entry["hash"] is None:
+            item.tokens = self.token_counter.count(item.content)
         else:
-            final_files = included
+            # dropped with the entry's other derived data when the content changes
+            counts = entry.setdefault("tokens", {})
+            item.tokens = counts.get(self.token_counter.name)
+            if item.tokens is None:
+                item.tokens = self.token_counter.count(item.content, entry["hash"])
+                counts[self.token_counter.name] = item.tokens
+        self.token_counts[item.path] = item.tokens
+        return item
 
-        # Step 3: Skip binary files
-        final_files = [f for f in final_files if not self._is_binary_file(f)]
+    def _finish_index(self, keep: Optional[set]) -> None:
+        """Write the cache, indexes and manifest after a full run.
 
-        self.files_filtered = sorted(final_files)
-        return self.files_filtered
+        Args:
+            keep: Paths of all indexed files, or None if indexing stopped early,
+                in which case nothing is pruned and the import graph is not rebuilt.
+        """
+        if keep is not None:
+            self.cache.prune(keep)
+            if self.use_import_graph:
+                self.import_graph = self._build_import_graph()
+            self.cache.git = self._git_state.baseline() if self._git_state else None
+            self.cache.retain_verdicts(self._sniffed)
+        self._git_state, self._git_unchanged = None, set()
+        self.manifest = self._build_manifest()
+        if self.symbol_index is not None:
+            if keep is not None:
+                self.symbol_index.retain(self.cache.entries)
+            self.symbol_index.commit()
+        self._flush()
+        self._write_size_report()
+        if self.incremental:
+            print(f"INFO: Environment cache stats: {self.cache.stats}")
+
+    def _finish_refresh(self, removed: Set[str]) -> None:
+        """Patch the cache, indexes and manifest for the files of a refresh.
+
+        Only the refreshed files are touched, so a refresh costs the same in
+        small and large repositories. The cache, manifest and import graph
+        are written back at most once every FLUSH_INTERVAL seconds.
+
+        Args:
+            removed: Paths of the files that left the index.
+        """
+        for path in removed:
+            if self.cache.entries.pop(path, None) is not None:
+                self.cache.stats.deleted += 1
+            if self.symbol_index is not None:
+                self.symbol_index.remove_file(path)
+        if self.symbol_index is not None:
+            self.symbol_index.commit()
+        mark_dirty(self.cache.git, self.total_file_path, self._refreshed)
+        changed = [
+            (path, self.cache.entries[path])
+            for path in sorted(self._refreshed)
+            if path in self.cache.entries
+        ]
+        if self.manifest:
+            files = [(path, self._entry_symbols(path, entry)) for path, entry in changed]
+            update_manifest(self.manifest, files, removed)
+        else:
+            self.manifest = self._build_manifest()
+        if self.use_import_graph:
+            if self.import_graph is not None:
+                files = [(path, self._entry_imports(path, entry)) for path, entry in changed]
+                self.import_graph.update(self.total_file_path, files, removed)
+            else:
+                self.import_graph = self._build_import_graph()
+        self._unflushed = True
+        if time.monotonic() - self._flushed_at >= FLUSH_INTERVAL:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write the cache, import graph and manifest to the environment."""
+        self.cache.save()
+        if self.import_graph is not None:
+            self.import_graph.save(os.path.join(self.environ_path, IMPORT_GRAPH_FILE_NAME))
+        write_manifest(self.manifest, self.environ_path)
+        self._unflushed = False
+        self._flushed_at = time.monotonic()
+
+    def _write_size_report(self) -> None:
+        """Store and announce the files the size budgets cut or left out."""
+        report_path = os.path.join(self.environ_path, SIZE_REPORT_FILE_NAME)
+        truncated, skipped = self.size_report["truncated"], self.size_report["skipped"]
+        if not truncated and not skipped:
+            if os.path.exists(report_path):
+                os.remove(report_path)
+            return
+        with atomic_write(report_path, "w", encoding="utf-8") as file:
+            json.dump(self.size_report, file, indent=2, ensure_ascii=False)
+        print(
+            f"INFO: Size budget truncated {len(truncated)} and skipped {len(skipped)} "
+            f"file(s), see {report_path}"
+        )
+
+    def _index_stream(
+        self,
+        paths: Iterable[str],
+        max_pending: Optional[int] = None,
+        removed: Optional[Set[str]] = None,
+    ) -> Iterator[IndexedFile]:
+        """Read, parse and persist files one by one, in the order given.
+
+        With more than one worker, up to `max_pending` files are read ahead and
+        parsed in a process pool while earlier results are consumed.
+
+        Args:
+            paths: Absolute paths of the text files to index.
+            max_pending: Maximum number of files held in memory ahead of the consumer.
+            removed: If given, only `paths` are updated and these files are dropped
+                from the index; all other indexed files are kept as they are.
+
+        Yields:
+            IndexedFile for every readable text file.
+        """
+        partial = removed is not None
+        with self._index_lock, self._environ_lock:
+            # waits for other processes, then picks up the results they stored
+            self._load_cache()
+            if not partial:
+                self.cache.stats = CacheStats()
+            if self.use_symbol_index and self.symbol_index is None:
+                self.symbol_index = SymbolIndex(
+                    os.path.join(self.environ_path, SYMBOL_INDEX_FILE_NAME)
+                )
+            self._blobs_pending = set()
+            if not partial:
+                self.token_counts = {}
+                self.size_report = {"truncated": [], "skipped": []}
+                self._content_bytes = 0
+                # a non-incremental run starts from an empty environment
+                # and leaves no cache a baseline could be stored with
+                self._git_state = (
+                    GitState.capture(self.total_file_path, self._is_candidate)
+                    if self.git_aware and self.incremental
+                    else None
+                )
+                if self._git_state is not None:
+                    self._git_unchanged = self._git_state.unchanged_files(self.cache.git)
+            self._refreshed = set(removed) if partial else set()
+            max_pending = max_pending or self.workers * 4
+            # a refresh of a few files is parsed without starting a process pool
+            workers = min(self.workers, len(paths)) if partial else self.workers
+            executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+            window = deque()
+            seen = set()
+            completed = False
+            try:
+                for path, loaded in self._iter_read(paths):
+                    item = self._prepare_file(path, loaded, partial)
+                    if item is None:
+                        if partial and path in self.cache.entries:
+                            # became unreadable
+                            removed.add(path)
+                        continue
+                    seen.add(path)
+                    self._refreshed.add(path)
+                    parsed = None
+                    if item.status == "pending":
+                        data, stat, _ = item._pending
+                        args = (path, data, self.compact, self._is_outline(stat))
+                        if executor is None:
+                            parsed = _parse_file_worker(*args)
+                        else:
+                            try:
+                                parsed = executor.submit(_parse_file_worker, *args)
+                            except BrokenProcessPool:
+                                # a worker died, the files in flight are parsed again
+                                # one by one when they are completed
+                                executor.shutdown(wait=False)
+                                executor = ProcessPoolExecutor(max_workers=workers)
+                                parsed = executor.submit(_parse_file_worker, *args)
+                    window.append((item, parsed))
+                    while window and (executor is None or len(window) > max_pending):
+                        yield self._count_tokens(self._complete_file(*window.popleft()))
+                while window:
+                    yield self._count_tokens(self._complete_file(*window.popleft()))
+                completed = True
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+                if partial:
+                    self._finish_refresh(removed if completed else set())
+                else:
+                    self._finish_index(seen if completed else None)
+
+    def iter_index(
+        self, update: bool = True, max_pending: Optional[int] = None
+    ) -> Iterator[IndexedFile]:
+        """Stream the repository through walk, filter, read, parse and persist.
+
+        Unlike get_content, nothing is collected: files are discovered while
+        walking and each one is yielded as soon as it is indexed, so memory
+        stays bounded by `max_pending` files regardless of the repository size.
+        The generator only advances when the consumer asks for the next file.
+        Stale entries are pruned once the generator is exhausted.
+
+        Args:
+            update: Whether to refresh the environment before indexing.
+            max_pending: Maximum number of files read ahead of the consumer,
+                defaults to four per worker.
+
+        Yields:
+            IndexedFile for every indexed file, in walk order.
+        """
+        if update and not self.incremental:
+            self._clean_environment()
+        self._sniffed = set()
+        yield from self._index_stream(
+            self._iter_text_files(self._iter_candidate_entries()),
+            max_pending=max_pending,
+        )
 
     def get_content(self, update=True) -> List[Tuple[str, str]]:
         """Read file contents (skipping binary files).
 
+        In incremental mode the environment is kept and only files whose
+        content changed since the last run are parsed again; entries of
+        removed files are deleted.
+
+        Args:
+            update: Whether to refresh the environment before reading.
+
         Returns:
             List of tuples containing (file_path, file_content).
         """
         # cleam environment path
-        if update:
-            if os.path.exists(self.environ_path):
-                try:
-                    shutil.rmtree(self.environ_path)
-                    os.makedirs(self.environ_path,exist_ok=True)
-                except OSError as e:
-                    print(f"Error: Could not delete folder {self.environ_path}: {e}")
-            else:
-                print(f"Folder '{self.environ_path}' does not exist.")
+        if update and not self.incremental:
+            self._clean_environment()
 
         if self._contents is None:
-            self._contents = []
-            self.json_file = []
-            for path in self.files_filtered:
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    file_content: str = f.read()
-                    self._contents.append((path, file_content))
-                    new_path = path[:-3].replace(os.sep, "@")
-
-                    environ_file_path = os.path.join(
-                        self.environ_path, f"environ_{new_path}.json"
-                    )
-                    self.json_file.append(environ_file_path)
-                    with open(environ_file_path, "w", encoding="utf-8") as environ_file:
-                        result = parse_python_file(file_path=path)
-                        json.dump(
-                            result,
-                            environ_file,
-                            indent=2,
-                            ensure_ascii=False,
-                            sort_keys=True,
-                        )
-            with open(os.path.join(self.environ_path, "config.json"), "w") as file:
-                json.dump(
-                    self.json_file, file, indent=2, ensure_ascii=False, sort_keys=True
-                )
+            if self.files_filtered is None:
+                self.filter_files()
+            self._contents = [
+                (item.path, item.content)
+                for item in self._index_stream(self.files_filtered)
+            ]
 
         return self._contents
 
+    def refresh(self, paths: Iterable[str]) -> List[IndexedFile]:
+        """Bring the index up to date for a set of changed files.
+
+        Only the given files are read and, if their content changed, parsed
+        again; files that no longer exist are dropped from the environment.
+        The cache, symbol index, import graph and manifest are updated, as are
+        the contents returned by get_content if they were loaded.
+
+        Args:
+            paths: Paths of files that were created, modified or deleted.
+
+        Returns:
+            IndexedFile for every changed file that still exists.
+        """
+        existing, removed = [], set()
+        for path in sorted({os.path.abspath(p) for p in paths}):
+            if not self._is_candidate(path):
+                continue
+            if os.path.isfile(path):
+                existing.append(path)
+            else:
+                removed.add(path)
+        if not existing and not removed:
+            return []
+        with self._index_lock, self._environ_lock:
+            self._load_cache()
+            text_files = list(self._iter_text_files(existing))
+            # files that turned binary leave the index
+            removed.update(set(existing).difference(text_files))
+            for path in removed:
+                self.cache.verdicts.pop(path, None)
+            items = list(self._index_stream(text_files, removed=removed))
+            if self._contents is not None:
+                contents = dict(self._contents)
+                for path in removed:
+                    contents.pop(path, None)
+                    self.token_counts.pop(path, None)
+                contents.update((item.path, item.content) for item in items)
+                self._contents = sorted(contents.items())
+                self.files_filtered = [path for path, _ in self._contents]
+        return items
+
+    def watch(
+        self,
+        debounce: float = 0.5,
+        backend: Optional[str] = None,
+        poll_interval: float = 1.0,
+    ) -> FileWatcher:
+        """Keep the index live by re-indexing files as they change on disk.
+
+        Changes are picked up on a background thread and handed to refresh()
+        in debounced batches, so the environment stays current while the
+        caller keeps working with it. Stop the returned watcher when done.
+
+        Args:
+            debounce: Seconds without changes before a batch is re-indexed.
+            backend: "inotify", "poll", or None to use inotify where available.
+            poll_interval: Seconds between two scans of the polling backend.
+
+        Returns:
+            The started FileWatcher.
+        """
+        environ_path = os.path.abspath(self.environ_path)
+
+        def on_change(paths: Optional[Set[str]]) -> None:
+            if paths is None:
+                # events were lost, fall back to a full incremental pass
+                with self._index_lock:
+                    items = list(self.iter_index(update=False))
+                    if self._contents is not None:
+                        self._contents = [(item.path, item.content) for item in items]
+                        self.files_filtered = [item.path for item in items]
+                return
+            changed = self.refresh(paths)
+            if changed:
+                print(f"INFO: Re-indexed {len(changed)} changed file(s).")
+
+        watcher = FileWatcher(
+            self.total_file_path,
+            on_change,
+            debounce=debounce,
+            backend=backend,
+            poll_interval=poll_interval,
+            ignore_dir=lambda path: os.path.abspath(path) == environ_path
+            or self._is_pruned_dir(path)
+            or (
+                self._ignore_tree is not None
+                and self._ignore_tree.is_ignored(self._ignore_path(path), True)
+            ),
+        )
+        return watcher.start()
+
     def __enter__(self) -> "FileContentReader":
         """Enter the context manager.
 
@@ -221,11 +1388,140 @@ class FileContentReader(AbstractContentProvider):
             False to propagate exceptions.
         """
         self._contents = None
+        if self._unflushed:
+            with self._index_lock, self._environ_lock:
+                # unless another process indexed since, which covers these files
+                if self._unflushed and not self.cache.changed_on_disk():
+                    self._flush()
+        if self.symbol_index is not None:
+            self.symbol_index.close()
+            self.symbol_index = None
         if exc_type:
             print(f"An exception occurred: {exc_val}")
         return False
 
 
+class AsyncFileContentReader(FileContentReader):
+    """FileContentReader for event loops, e.g. the async chat loop of the agent.
+
+    Blocking calls run on a dedicated worker thread, so the loop keeps serving
+    while a large or slow (network mounted) project is read, and file reads
+    overlap in a pool of io_workers threads. aiter_index() streams on a thread
+    of its own. These threads, a watcher and the context assembly of the chat
+    all take turns on the index lock of the reader.
+    """
+
+    def __init__(self, file_path: Optional[str] = None, *args, io_workers: int = 16, **kwargs):
+        """Initialize the AsyncFileContentReader.
+
+        Takes the same arguments as FileContentReader, with more I/O workers
+        by default.
+        """
+        super().__init__(file_path, *args, io_workers=io_workers, **kwargs)
+        self._loop_executor = self._new_loop_executor()
+
+    @staticmethod
+    def _new_loop_executor() -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="probecode-index")
+
+    async def _run(self, function, *args):
+        """Run a blocking call on the reader's worker thread.
+
+        Args:
+            function: The function to call.
+            *args: Arguments passed to the function.
+
+        Returns:
+            What the function returns.
+        """
+        if self._loop_executor is None:
+            # shut down when the reader was last exited
+            self._loop_executor = self._new_loop_executor()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._loop_executor, function, *args)
+
+    async def get_content_async(self, update: bool = True) -> List[Tuple[str, str]]:
+        """Awaitable get_content().
+
+        Args:
+            update: Whether to re-index the project first.
+
+        Returns:
+            List of tuples containing (file_path, content).
+        """
+        return await self._run(self.get_content, update)
+
+    async def refresh_async(self, paths: Iterable[str]) -> List[IndexedFile]:
+        """Awaitable refresh().
+
+        Args:
+            paths: Absolute paths of files that were created, modified or deleted.
+
+        Returns:
+            The IndexedFile of every re-indexed file.
+        """
+        return await self._run(self.refresh, list(paths))
+
+    async def aiter_index(self, update: bool = True):
+        """Asynchronous iter_index(), yielding every file as soon as it is indexed.
+
+        The index lock is held until the iteration ends, so other calls of the
+        reader wait for it. Leaving the loop early releases the lock only when
+        the generator is finalized; close it explicitly, e.g. with
+        contextlib.aclosing, to release it at once.
+
+        Args:
+            update: Whether to refresh the environment before indexing.
+
+        Yields:
+            An IndexedFile for every indexed file.
+        """
+        items = self.iter_index(update=update)
+        # the paused generator holds the (reentrant) index lock, on the worker
+        # thread other calls would re-enter it and interleave with the run
+        executor = self._new_loop_executor()
+        loop = asyncio.get_running_loop()
+        done = object()
+        try:
+            while True:
+                item = await loop.run_in_executor(executor, next, items, done)
+                if item is done:
+                    break
+                yield item
+        finally:
+            # the lock is released by the thread that acquired it
+            await loop.run_in_executor(executor, items.close)
+            executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncFileContentReader":
+        """Enter the async context manager, indexing the project.
+
+        The reader can be entered again after it was exited.
+
+        Returns:
+            The AsyncFileContentReader instance.
+        """
+        await self._run(self.__enter__)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Exit the async context manager.
+
+        Args:
+            exc_type: Exception type if an exception occurred.
+            exc_val: Exception value if an exception occurred.
+            exc_tb: Exception traceback if an exception occurred.
+
+        Returns:
+            False to propagate exceptions.
+        """
+        try:
+            return await self._run(self.__exit__, exc_type, exc_val, exc_tb)
+        finally:
+            self._loop_executor.shutdown(wait=False)
+            self._loop_executor = None
+
+
 # A simple test
 if __name__ == "__main__":
     with FileContentReader(
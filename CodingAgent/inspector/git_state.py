@@ -0,0 +1,235 @@
+"""Git-aware change detection for the environment store.
+
+Checkouts, CI caches and container builds touch the mtime of every file, so
+stat data alone cannot tell which files changed since the last run. Instead
+the commit and a fingerprint of the working tree are stored with the parse
+cache, and on the next run git is asked which paths differ from that baseline.
+Files git reports as unchanged reuse their parse result without being hashed.
+"""
+
+import os
+import hashlib
+import subprocess
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+# seconds a single git command may take before git is given up on
+GIT_TIMEOUT = 60
+
+
+def _git(root: str, *args: str) -> Optional[bytes]:
+    """Run a git command in a directory.
+
+    Args:
+        root: Working directory of the command.
+        *args: Arguments passed to git.
+
+    Returns:
+        The standard output, or None if git is missing or the command failed.
+    """
+    try:
+        process = subprocess.run(
+            ["git", *args],
+            cwd=root,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=GIT_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if process.returncode != 0:
+        return None
+    return process.stdout
+
+
+def _split(output: bytes) -> List[str]:
+    """Split NUL-terminated git output into decoded fields."""
+    return [os.fsdecode(field) for field in output.split(b"\0") if field]
+
+
+def _name_status_paths(output: bytes) -> Dict[str, str]:
+    """Parse the output of `git diff --name-status -z --no-renames`.
+
+    Args:
+        output: Raw command output, alternating status and path fields.
+
+    Returns:
+        Mapping of relative path to status letter.
+    """
+    fields = _split(output)
+    return {path: status for status, path in zip(fields[::2], fields[1::2])}
+
+
+def _hash_file(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class GitState:
+    """Snapshot of the git state of a directory inside a work tree.
+
+    Paths are kept relative to the directory, with forward slashes as git
+    prints them.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        commit: str,
+        files: Set[str],
+        untracked: Set[str],
+        dirty: Dict[str, str],
+        relevant: Optional[Callable[[str], bool]] = None,
+    ):
+        """Initialize the GitState.
+
+        Args:
+            root: Directory the paths are relative to.
+            commit: Hash of the HEAD commit.
+            files: Tracked and untracked (not ignored) files below the directory.
+            untracked: Files unknown to git and not ignored.
+            dirty: Tracked files differing from HEAD, mapped to their status.
+            relevant: Tells by absolute path whether a file can be indexed;
+                only those are read for the working tree fingerprint. None
+                reads every modified and untracked file.
+        """
+        self.root = root
+        self.commit = commit
+        self.files = files
+        self.untracked = untracked
+        self.dirty = dirty
+        self.relevant = relevant
+        self.worktree = self._fingerprint()
+
+    @classmethod
+    def capture(
+        cls, root: str, relevant: Optional[Callable[[str], bool]] = None
+    ) -> Optional["GitState"]:
+        """Read the current git state of a directory.
+
+        Args:
+            root: Directory to inspect.
+            relevant: Tells by absolute path whether a file can be indexed,
+                see __init__.
+
+        Returns:
+            The GitState, or None if the directory is not inside a git work
+            tree with at least one commit, or git is not installed.
+        """
+        commit = _git(root, "rev-parse", "--verify", "--quiet", "HEAD")
+        if commit is None:
+            return None
+        listing = _git(root, "ls-files", "-z", "-t", "--cached", "--others", "--exclude-standard")
+        diff = _git(root, "diff", "--name-status", "-z", "--no-renames", "--relative", "HEAD", "--")
+        if listing is None or diff is None:
+            return None
+        files, untracked = set(), set()
+        for field in _split(listing):
+            # "H path" for cached files, "? path" for untracked ones
+            tag, path = field[0], field[2:]
+            files.add(path)
+            if tag == "?":
+                untracked.add(path)
+        return cls(
+            root, commit.decode().strip(), files, untracked, _name_status_paths(diff), relevant
+        )
+
+    def _fingerprint(self) -> str:
+        """Hash the commit together with the content of every modified file.
+
+        Two states with the same fingerprint have identical tracked and
+        untracked files, as far as they can be indexed, so all parse results
+        recorded in one are valid in the other. Files that can never be
+        indexed are left out, so large data files are not read on every run.
+        """
+        digest = hashlib.sha256(self.commit.encode())
+        for path in sorted(set(self.dirty) | self.untracked):
+            if self.relevant is not None and not self.relevant(self._absolute(path)):
+                continue
+            status = self.dirty.get(path, "?")
+            content = _hash_file(self._absolute(path)) or ""
+            digest.update(f"\0{status}\0{path}\0{content}".encode("utf-8", "surrogateescape"))
+        return digest.hexdigest()
+
+    def baseline(self) -> Dict[str, Any]:
+        """Get the record stored with the parse cache after a complete run.
+
+        Returns:
+            Commit, working tree fingerprint and the paths that differed from
+            the commit at the time.
+        """
+        return {
+            "root": self.root,
+            "commit": self.commit,
+            "worktree": self.worktree,
+            "dirty": sorted(set(self.dirty) | self.untracked),
+        }
+
+    def changed_since(self, baseline: Optional[Dict[str, Any]]) -> Optional[Set[str]]:
+        """Find the files that may differ from a stored baseline.
+
+        Args:
+            baseline: Record returned by baseline() on an earlier run.
+
+        Returns:
+            Relative paths that were added, modified or deleted since the
+            baseline, or None if git cannot tell (no baseline, or its commit
+            is no longer available, e.g. in a shallow clone, or the baseline
+            was taken for another directory).
+        """
+        if not baseline or baseline.get("root") != self.root or not baseline.get("commit"):
+            return None
+        if baseline["commit"] == self.commit and baseline.get("worktree") == self.worktree:
+            return set()
+        if baseline["commit"] == self.commit:
+            changed = set(self.dirty)
+        else:
+            diff = _git(
+                self.root, "diff", "--name-status", "-z", "--no-renames", "--relative",
+                baseline["commit"], "--",
+            )
+            if diff is None:
+                return None
+            changed = set(_name_status_paths(diff))
+        # untracked files never show up in a diff, and files dirty at the
+        # baseline may have been reverted to the committed content since
+        return changed | self.untracked | set(baseline.get("dirty", []))
+
+    def unchanged_files(self, baseline: Optional[Dict[str, Any]]) -> Set[str]:
+        """Get the absolute paths of files git guarantees to be unchanged.
+
+        Args:
+            baseline: Record returned by baseline() on an earlier run.
+
+        Returns:
+            Paths below the root whose content is the same as at the baseline,
+            empty if git cannot tell.
+        """
+        changed = self.changed_since(baseline)
+        if changed is None:
+            return set()
+        return {self._absolute(path) for path in self.files - changed}
+
+    def _absolute(self, path: str) -> str:
+        return os.path.join(self.root, path.replace("/", os.sep))
+
+
+def mark_dirty(baseline: Optional[Dict[str, Any]], root: str, paths: Iterable[str]) -> None:
+    """Record files re-indexed outside a complete run in a stored baseline.
+
+    The files are compared by content on the next run, as the fingerprint
+    of the baseline no longer describes what the cache holds for them.
+
+    Args:
+        baseline: Record returned by GitState.baseline(), updated in place.
+        root: Directory the baseline paths are relative to.
+        paths: Absolute paths of the re-indexed files.
+    """
+    if not baseline:
+        return
+    dirty = set(baseline.get("dirty", []))
+    dirty.update(os.path.relpath(path, root).replace(os.sep, "/") for path in paths)
+    baseline["dirty"] = sorted(dirty)
+    baseline["worktree"] = None
@@ -0,0 +1,394 @@
+"""Gitignore-style ignore files (.gitignore, .probecodeignore) for the inspector.
+
+Patterns follow the gitignore rules: blank lines and "#" comments are
+skipped, "!" re-includes, a trailing "/" only matches directories, a "/" at
+the start or in the middle anchors the pattern to the directory of the
+ignore file, "*", "?" and "[...]" do not match "/", and "**" matches across
+directories. The last matching pattern wins, and patterns of deeper ignore
+files take precedence over those of their parents. Inside a git work tree,
+the ignore files of the directories above the walk root and the repository's
+info/exclude apply as well.
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# read in this order, so .probecodeignore can override .gitignore
+IGNORE_FILE_NAMES = (".gitignore", ".probecodeignore")
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression.
+
+    Args:
+        pattern: Glob without negation, anchoring slash and trailing slash.
+
+    Returns:
+        Regular expression source matching the whole path.
+    """
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        i += 1
+        if char == "*":
+            if i < n and pattern[i] == "*" and (i == 1 or pattern[i - 2] == "/"):
+                if i + 1 == n:
+                    # trailing "/**": everything inside
+                    parts.append(".*")
+                    i += 1
+                    continue
+                if pattern[i + 1] == "/":
+                    # "**/": zero or more directories
+                    parts.append("(?:.*/)?")
+                    i += 2
+                    continue
+            while i < n and pattern[i] == "*":
+                i += 1
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = i
+            if end < n and pattern[end] in "!^":
+                end += 1
+            if end < n and pattern[end] == "]":
+                end += 1
+            end = pattern.find("]", end)
+            if end < 0:
+                parts.append("\\[")
+                continue
+            body = pattern[i:end].replace("\\", "\\\\")
+            i = end + 1
+            if body[:1] in ("!", "^"):
+                body = "^" + body[1:]
+            parts.append(f"(?!/)[{body}]")
+        elif char == "\\" and i < n:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+        else:
+            parts.append(re.escape(char))
+    return "".join(parts)
+
+
+def find_work_tree(path: str) -> Optional[str]:
+    """Find the top directory of the git work tree containing a directory.
+
+    Args:
+        path: Directory inside the work tree.
+
+    Returns:
+        The directory containing ".git" (a directory, or a file for linked
+        work trees and submodules), or None outside git.
+    """
+    path = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def git_common_dir(work_tree: str) -> Optional[str]:
+    """Find the git directory holding the shared files (e.g. info/exclude) of a work tree.
+
+    Args:
+        work_tree: Top directory of the work tree.
+
+    Returns:
+        The common git directory, or None if ".git" cannot be resolved.
+    """
+    git_dir = os.path.join(work_tree, ".git")
+    if os.path.isfile(git_dir):
+        # "gitdir: <path>" of linked work trees and submodules
+        try:
+            with open(git_dir, "r", encoding="utf-8") as file:
+                line = file.readline().strip()
+        except OSError:
+            return None
+        if not line.startswith("gitdir:"):
+            return None
+        git_dir = os.path.join(work_tree, line[len("gitdir:"):].strip())
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r", encoding="utf-8") as file:
+            # linked work trees share info/exclude with the main repository
+            git_dir = os.path.join(git_dir, file.readline().strip())
+    except OSError:
+        pass
+    return os.path.normpath(git_dir)
+
+
+class IgnorePattern:
+    """A single compiled line of an ignore file."""
+
+    __slots__ = ("negate", "dir_only", "anchored", "_match")
+
+    def __init__(self, line: str):
+        """Compile a pattern line.
+
+        Args:
+            line: Line of the ignore file, already checked not to be blank or a comment.
+        """
+        self.negate = line.startswith("!")
+        if self.negate:
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+        self.dir_only = line.endswith("/")
+        if self.dir_only:
+            line = line[:-1]
+        self.anchored = "/" in line
+        if line.startswith("/"):
+            line = line[1:]
+        self._match = re.compile(_translate(line) + r"\Z", re.DOTALL).match
+
+    def matches(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        """Check whether the pattern matches a path.
+
+        Args:
+            rel_path: Path relative to the directory of the ignore file, "/"-separated.
+            name: Last component of the path.
+            is_dir: Whether the path is a directory.
+
+        Returns:
+            True if the pattern matches.
+        """
+        if self.dir_only and not is_dir:
+            return False
+        return self._match(rel_path if self.anchored else name) is not None
+
+
+def parse_ignore_lines(lines: Iterable[str]) -> List[IgnorePattern]:
+    """Compile the lines of an ignore file.
+
+    Args:
+        lines: Lines of the file.
+
+    Returns:
+        The compiled patterns, in file order.
+    """
+    patterns = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        # trailing spaces are ignored unless escaped
+        stripped = line.rstrip(" ")
+        if stripped.endswith("\\") and len(stripped) < len(line):
+            stripped += " "
+        if not stripped or stripped.startswith("#"):
+            continue
+        patterns.append(IgnorePattern(stripped))
+    return patterns
+
+
+class IgnoreFile:
+    """The patterns of all ignore files of one directory."""
+
+    def __init__(self, base: str, patterns: List[IgnorePattern], outer: str = ""):
+        """Initialize the IgnoreFile.
+
+        Args:
+            base: Directory of the ignore files relative to the walk root,
+                "/"-separated, "" for the root itself.
+            patterns: Compiled patterns in precedence order (last wins).
+            outer: For ignore files above the walk root, the walk root
+                relative to their directory, "/"-separated; "" otherwise.
+        """
+        self.base = base
+        self.patterns = patterns
+        self._prefix = base + "/" if base else ""
+        self._outer = outer + "/" if outer else ""
+
+    @classmethod
+    def load(
+        cls,
+        directory: str,
+        base: str,
+        names: Iterable[str] = IGNORE_FILE_NAMES,
+        outer: str = "",
+    ) -> Optional["IgnoreFile"]:
+        """Read and compile the ignore files of a directory.
+
+        Args:
+            directory: Absolute path of the directory.
+            base: The directory relative to the walk root, "/"-separated.
+            names: Names of the ignore files to read, in precedence order.
+            outer: The walk root relative to the directory, if it lies above it.
+
+        Returns:
+            The IgnoreFile, or None if the directory has no usable patterns.
+        """
+        patterns = []
+        for name in names:
+            try:
+                with open(os.path.join(directory, name), "r", encoding="utf-8", errors="replace") as file:
+                    patterns += parse_ignore_lines(file)
+            except OSError:
+                continue
+        return cls(base, patterns, outer) if patterns else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Find the verdict of the last matching pattern.
+
+        Args:
+            rel_path: Path relative to the walk root, "/"-separated, below base.
+            is_dir: Whether the path is a directory.
+
+        Returns:
+            True if ignored, False if re-included by a negated pattern, None if
+            no pattern matches.
+        """
+        local = self._outer + rel_path[len(self._prefix):]
+        name = local.rsplit("/", 1)[-1]
+        for pattern in reversed(self.patterns):
+            if pattern.matches(local, name, is_dir):
+                return not pattern.negate
+        return None
+
+
+class IgnoreRules:
+    """The ignore files that apply inside one directory, outermost first."""
+
+    __slots__ = ("files",)
+
+    def __init__(self, files: Tuple[IgnoreFile, ...] = ()):
+        self.files = files
+
+    def extend(self, ignore_file: Optional[IgnoreFile]) -> "IgnoreRules":
+        """Get the rules of a subdirectory.
+
+        Args:
+            ignore_file: Ignore files of the subdirectory, if any.
+
+        Returns:
+            The rules including the subdirectory's patterns.
+        """
+        return IgnoreRules(self.files + (ignore_file,)) if ignore_file is not None else self
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Check whether a direct child of the directory is ignored.
+
+        Args:
+            rel_path: Path relative to the walk root, "/"-separated.
+            is_dir: Whether the path is a directory.
+
+        Returns:
+            True if the deepest matching pattern ignores the path.
+        """
+        for ignore_file in reversed(self.files):
+            verdict = ignore_file.match(rel_path, is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+
+class IgnoreTree:
+    """Loads and caches the ignore files below a root directory.
+
+    Every directory's ignore files are compiled once and reloaded only when
+    one of them changes on disk. If the root lies inside a git work tree, the
+    ignore files between the top of the work tree and the root and the
+    repository's info/exclude are applied before those of the root.
+    """
+
+    def __init__(self, root: str, names: Iterable[str] = IGNORE_FILE_NAMES):
+        """Initialize the IgnoreTree.
+
+        Args:
+            root: Directory the walk starts from.
+            names: Names of the ignore files, in precedence order.
+        """
+        self.root = root
+        self.names = tuple(names)
+        self._cache: Dict[str, Tuple[tuple, Optional[IgnoreFile]]] = {}
+        # (directory, walk root relative to it, names) of the ignore files above the root
+        self._outer: List[Tuple[str, str, Tuple[str, ...]]] = []
+        work_tree = find_work_tree(root)
+        if work_tree is not None:
+            common_dir = git_common_dir(work_tree)
+            inside = os.path.relpath(os.path.abspath(root), work_tree).replace(os.sep, "/")
+            inside = "" if inside == "." else inside
+            if common_dir is not None:
+                self._outer.append((os.path.join(common_dir, "info"), inside, ("exclude",)))
+            parts = inside.split("/") if inside else []
+            for depth in range(len(parts)):
+                directory = os.path.join(work_tree, *parts[:depth])
+                self._outer.append((directory, "/".join(parts[depth:]), self.names))
+
+    @property
+    def root_rules(self) -> IgnoreRules:
+        """The rules of the ignore files above the root, outermost first."""
+        files = [
+            self.load(directory, "", outer=outer, names=names)
+            for directory, outer, names in self._outer
+        ]
+        return IgnoreRules(tuple(file for file in files if file is not None))
+
+    def _state(self, directory: str, names: Tuple[str, ...]) -> tuple:
+        state = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(directory, name))
+                state.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                state.append(None)
+        return tuple(state)
+
+    def load(
+        self,
+        directory: str,
+        base: str,
+        listed: Optional[Iterable[str]] = None,
+        outer: str = "",
+        names: Optional[Tuple[str, ...]] = None,
+    ) -> Optional[IgnoreFile]:
+        """Get the compiled ignore files of a directory.
+
+        Args:
+            directory: Absolute path of the directory.
+            base: The directory relative to the root, "/"-separated.
+            listed: Names in the directory if already listed, which spares
+                the lookup in directories without ignore files.
+            outer: The root relative to the directory, if it lies above the root.
+            names: Names of the ignore files, defaults to those of the tree.
+
+        Returns:
+            The IgnoreFile, or None if the directory has none.
+        """
+        names = self.names if names is None else names
+        if listed is not None and not any(name in names for name in listed):
+            self._cache.pop(directory, None)
+            return None
+        state = self._state(directory, names)
+        cached = self._cache.get(directory)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+        ignore_file = IgnoreFile.load(directory, base, names, outer)
+        self._cache[directory] = (state, ignore_file)
+        return ignore_file
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """Check a path against all ignore files on its way from the root.
+
+        A path inside an ignored directory is ignored as well, as git does.
+
+        Args:
+            rel_path: Path relative to the root, "/"-separated.
+            is_dir: Whether the path is a directory.
+
+        Returns:
+            True if the path is ignored.
+        """
+        parts = rel_path.split("/")
+        if parts[0] == ".git":
+            return True
+        rules = self.root_rules.extend(self.load(self.root, ""))
+        for depth in range(1, len(parts)):
+            parent = "/".join(parts[:depth])
+            if rules.is_ignored(parent, True):
+                return True
+            directory = os.path.join(self.root, *parts[:depth])
+            rules = rules.extend(self.load(directory, parent))
+        return rules.is_ignored(rel_path, is_dir)
@@ -0,0 +1,359 @@
+"""Module-level import graph of a repository, built from parse results."""
+
+import os
+import ast
+import sys
+import json
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from CodingAgent.pyparser.parser import SourceRecord, expand_results
+from CodingAgent.inspector.locking import atomic_write
+
+IMPORT_GRAPH_FILE_NAME = "import_graph.json"
+
+# top-level directories that hold importable code without being a package
+# themselves, e.g. src/pkg/mod.py is imported as "pkg.mod"
+SOURCE_ROOTS = frozenset({"src", "lib"})
+
+# top-level statement types that may contain imports
+_IMPORT_STATEMENTS = {"Import", "ImportFrom", "If", "Try", "TryStar", "With"}
+
+# (module, level, names): "import a.b" -> ("a.b", 0, []),
+# "from ..a import b, c" -> ("a", 2, ["b", "c"])
+RawImport = Tuple[str, int, List[str]]
+
+
+def module_name(path: str, root: str) -> str:
+    """Get the dotted module name of a file relative to the repository root.
+
+    Args:
+        path: Absolute path of the Python file.
+        root: Repository root directory.
+
+    Returns:
+        Module name, packages are named after their directory.
+    """
+    parts = os.path.splitext(os.path.relpath(path, root))[0].split(os.sep)
+    if parts[-1] == "__init__" and len(parts) > 1:
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def extract_imports(result: Optional[Dict[str, Any]]) -> List[RawImport]:
+    """Collect the module-level imports of a parse result.
+
+    Imports nested in top-level if/try/with blocks are included, imports
+    inside functions and classes are not.
+
+    Args:
+        result: Parse result in the regular or compact shape.
+
+    Returns:
+        Raw imports in source order.
+    """
+    if not result:
+        return []
+    if "source" in result and not all(
+        isinstance(entry, SourceRecord) for entry in result["top_level_code"]
+    ):
+        # compact results loaded back from storage carry no lazy source
+        result = expand_results(result)
+    imports = []
+    for entry in result["top_level_code"]:
+        if entry["type"] not in _IMPORT_STATEMENTS:
+            continue
+        try:
+            tree = ast.parse(entry["source_code"])
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                imports.extend((alias.name, 0, []) for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                imports.append(
+                    (node.module or "", node.level, [alias.name for alias in node.names])
+                )
+    return imports
+
+
+class ImportGraph:
+    """Forward and reverse import dependencies between repository modules.
+
+    Imports are resolved against the modules of the repository; anything
+    that does not resolve is kept per module as an external dependency.
+    """
+
+    def __init__(self):
+        self.modules: Dict[str, str] = {}
+        self.packages: Set[str] = set()
+        self.forward: Dict[str, Set[str]] = {}
+        self.reverse: Dict[str, Set[str]] = {}
+        self.external: Dict[str, Set[str]] = {}
+        self.root_name = ""
+        self._raw: Dict[str, List[RawImport]] = {}
+        self._suffixes: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def build(
+        cls, root: str, files: Iterable[Tuple[str, Iterable[RawImport]]]
+    ) -> "ImportGraph":
+        """Build the graph of a repository.
+
+        Args:
+            root: Repository root directory.
+            files: Pairs of (absolute file path, raw imports of the file).
+
+        Returns:
+            The resolved ImportGraph.
+        """
+        graph = cls()
+        graph.root_name = os.path.basename(os.path.normpath(root))
+        for path, imports in files:
+            module = module_name(path, root)
+            graph.modules[module] = path
+            if os.path.basename(path) == "__init__.py":
+                graph.packages.add(module)
+            graph._raw[module] = [tuple(item) for item in imports]
+        graph._resolve_all()
+        return graph
+
+    def update(
+        self, root: str, files: Iterable[Tuple[str, Iterable[RawImport]]], removed: Iterable[str]
+    ) -> None:
+        """Apply changes of some files to a graph built by build().
+
+        Only the changed modules are resolved again, unless modules were added
+        or removed, which can change how the imports of any module resolve.
+
+        Args:
+            root: Repository root directory.
+            files: Pairs of (absolute file path, raw imports) of changed files.
+            removed: Absolute paths of files that left the index.
+        """
+        changed, modules_changed = [], False
+        for path in removed:
+            module = module_name(path, root)
+            if self.modules.pop(module, None) is not None:
+                modules_changed = True
+                self.packages.discard(module)
+                self._raw.pop(module, None)
+        for path, imports in files:
+            module = module_name(path, root)
+            if module not in self.modules:
+                modules_changed = True
+                self.modules[module] = path
+                if os.path.basename(path) == "__init__.py":
+                    self.packages.add(module)
+            self._raw[module] = [tuple(item) for item in imports]
+            changed.append(module)
+        if modules_changed:
+            self._resolve_all()
+            return
+        for module in changed:
+            for target in self.forward[module]:
+                self.reverse[target].discard(module)
+            self._resolve_module(module)
+
+    def _index_suffixes(self) -> None:
+        self._suffixes = {}
+        for module in self.modules:
+            parts = module.split(".")
+            if len(parts) > 1 and parts[0] in SOURCE_ROOTS and parts[0] not in self.packages:
+                self._suffixes.setdefault(".".join(parts[1:]), set()).add(module)
+
+    def _resolve_all(self) -> None:
+        self._index_suffixes()
+        self.forward, self.external = {}, {}
+        self.reverse = {module: set() for module in self.modules}
+        for module in self.modules:
+            self._resolve_module(module)
+
+    def _resolve_module(self, module: str) -> None:
+        """Resolve the imports of one module into forward and reverse edges."""
+        self.forward[module] = set()
+        self.external[module] = set()
+        for target, level, names in self._raw.get(module, []):
+            for name in self._targets(module, target, level, names):
+                resolved = self._lookup(name)
+                if resolved is None:
+                    if level == 0:
+                        self.external[module].add(name.split(".")[0])
+                elif resolved != module:
+                    self.forward[module].add(resolved)
+                    self.reverse[resolved].add(module)
+
+    def _targets(self, module: str, target: str, level: int, names: List[str]) -> List[str]:
+        if level > 0:
+            package = module if module in self.packages else module.rpartition(".")[0]
+            for _ in range(level - 1):
+                package = package.rpartition(".")[0]
+            base = ".".join(part for part in (package, target) if part)
+        else:
+            base = target
+        if not names:
+            return [base]
+        # "from a import b" imports the submodule a.b if there is one, else names from a
+        submodules = [f"{base}.{name}" if base else name for name in names if name != "*"]
+        found = [name for name in submodules if self._lookup(name, exact=True)]
+        return found if len(found) == len(submodules) and found else found + [base]
+
+    def _lookup(self, name: str, exact: bool = False) -> Optional[str]:
+        """Resolve a dotted name to a repository module."""
+        if not name:
+            return None
+        parts = name.split(".")
+        if len(parts) > 1 and parts[0] == self.root_name:
+            # absolute imports naming the indexed directory itself
+            resolved = self._lookup(".".join(parts[1:]), exact)
+            if resolved is not None:
+                return resolved
+        for i in range(len(parts), 0, -1):
+            candidate = ".".join(parts[:i])
+            if candidate in self.modules:
+                return candidate
+            # modules below a source directory, e.g. "src.pkg.mod" for "pkg.mod";
+            # standard library imports never resolve into the repository this way
+            suffix_matches = (
+                None if parts[0] in sys.stdlib_module_names else self._suffixes.get(candidate)
+            )
+            if suffix_matches is not None and len(suffix_matches) == 1:
+                return next(iter(suffix_matches))
+            if exact:
+                return None
+        return None
+
+    def _key(self, module_or_path: str) -> str:
+        if module_or_path in self.modules:
+            return module_or_path
+        for module, path in self.modules.items():
+            if path == os.path.abspath(module_or_path):
+                return module
+        raise KeyError(f"'{module_or_path}' is not a module of the import graph.")
+
+    def dependencies(self, module_or_path: str) -> List[str]:
+        """Modules directly imported by a module.
+
+        Args:
+            module_or_path: Module name or file path.
+
+        Returns:
+            Sorted module names.
+        """
+        return sorted(self.forward[self._key(module_or_path)])
+
+    def dependents(self, module_or_path: str) -> List[str]:
+        """Modules directly importing a module.
+
+        Args:
+            module_or_path: Module name or file path.
+
+        Returns:
+            Sorted module names.
+        """
+        return sorted(self.reverse[self._key(module_or_path)])
+
+    def _closure(self, start: str, edges: Dict[str, Set[str]]) -> List[str]:
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for neighbour in edges[queue.popleft()]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        seen.discard(start)
+        return sorted(seen)
+
+    def transitive_dependencies(self, module_or_path: str) -> List[str]:
+        """All modules a module depends on, directly or indirectly.
+
+        Args:
+            module_or_path: Module name or file path.
+
+        Returns:
+            Sorted module names, without the module itself.
+        """
+        return self._closure(self._key(module_or_path), self.forward)
+
+    def transitive_dependents(self, module_or_path: str) -> List[str]:
+        """All modules depending on a module, directly or indirectly.
+
+        Args:
+            module_or_path: Module name or file path.
+
+        Returns:
+            Sorted module names, without the module itself.
+        """
+        return self._closure(self._key(module_or_path), self.reverse)
+
+    def files_for(
+        self, module_or_path: str, reverse: bool = False, transitive: bool = True
+    ) -> List[str]:
+        """Files needed to understand a module: the module and its dependencies.
+
+        Args:
+            module_or_path: Module name or file path.
+            reverse: Follow dependents instead of dependencies.
+            transitive: Include indirect dependencies.
+
+        Returns:
+            File paths, starting with the module itself.
+        """
+        module = self._key(module_or_path)
+        if transitive:
+            related = (
+                self.transitive_dependents(module)
+                if reverse
+                else self.transitive_dependencies(module)
+            )
+        else:
+            related = self.dependents(module) if reverse else self.dependencies(module)
+        return [self.modules[module]] + [self.modules[name] for name in related]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the graph."""
+        return {
+            "root_name": self.root_name,
+            "modules": self.modules,
+            "packages": sorted(self.packages),
+            "imports": {module: [list(item) for item in raw] for module, raw in self._raw.items()},
+            "forward": {module: sorted(edges) for module, edges in self.forward.items()},
+            "external": {module: sorted(names) for module, names in self.external.items()},
+        }
+
+    def save(self, path: str) -> None:
+        """Write the graph as json.
+
+        Args:
+            path: Path of the json file.
+        """
+        with atomic_write(path, "w", encoding="utf-8") as file:
+            json.dump(
+                self.to_dict(), file, ensure_ascii=False, separators=(",", ":"), sort_keys=True
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "ImportGraph":
+        """Read a graph written by save().
+
+        Args:
+            path: Path of the json file.
+
+        Returns:
+            The ImportGraph.
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        graph = cls()
+        graph.root_name = data["root_name"]
+        graph.modules = data["modules"]
+        graph.packages = set(data["packages"])
+        graph._raw = {module: [tuple(item) for item in raw] for module, raw in data["imports"].items()}
+        graph.forward = {module: set(edges) for module, edges in data["forward"].items()}
+        graph.reverse = {module: set() for module in graph.modules}
+        for module, edges in graph.forward.items():
+            for target in edges:
+                graph.reverse[target].add(module)
+        graph.external = {module: set(names) for module, names in data["external"].items()}
+        graph._index_suffixes()
+        return graph
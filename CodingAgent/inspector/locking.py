@@ -0,0 +1,106 @@
+"""Atomic writes and an inter-process lock for a shared environment directory.
+
+Several processes may index the same checkout into the same environment.
+Every file is written to a temporary file next to it and renamed over the
+target, so readers see either the old or the new version and never a partly
+written one. Index generations run under an advisory lock on the directory,
+so a second process waits for the first and then reuses its parse results
+instead of parsing the same files again.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows, where only the writes are atomic
+    fcntl = None
+
+LOCK_FILE_NAME = ".lock"
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", encoding: Optional[str] = None) -> Iterator[IO]:
+    """Open a file for writing that replaces `path` only once it is complete.
+
+    If the block raises, the target is left untouched.
+
+    Args:
+        path: Path of the file to write.
+        mode: "w" for text or "wb" for binary.
+        encoding: Text encoding, only used in text mode.
+
+    Yields:
+        The open temporary file.
+    """
+    directory, name = os.path.split(path)
+    # unique per writing thread, and hidden from the environ_* file names
+    temp_path = os.path.join(
+        directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+    try:
+        with open(temp_path, mode, encoding=encoding) as file:
+            yield file
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class EnvironmentLock:
+    """Exclusive advisory lock on an environment directory, held across processes.
+
+    The lock is reentrant for its holder. It is not thread-safe by itself;
+    FileContentReader only takes it while holding its own index lock.
+    """
+
+    def __init__(self, environ_path: str):
+        """Initialize the EnvironmentLock.
+
+        Args:
+            environ_path: Path to the environment directory to lock.
+        """
+        self.environ_path = environ_path
+        self.path = os.path.join(environ_path, LOCK_FILE_NAME)
+        self._file = None
+        self._depth = 0
+
+    def acquire(self) -> None:
+        """Take the lock, waiting for another process that holds it."""
+        if self._depth == 0:
+            os.makedirs(self.environ_path, exist_ok=True)
+            file = open(self.path, "ab")
+            if fcntl is not None:
+                try:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    print(f"INFO: Waiting for another process indexing into {self.environ_path}...")
+                    try:
+                        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+                    except BaseException:
+                        file.close()
+                        raise
+            self._file = file
+        self._depth += 1
+
+    def release(self) -> None:
+        """Release the lock once every acquire() has been matched."""
+        self._depth -= 1
+        if self._depth == 0:
+            # closing the file drops the flock
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "EnvironmentLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+        return False
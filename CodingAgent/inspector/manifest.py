@@ -0,0 +1,188 @@
+"""Manifest of the environment: one record per indexed file.
+
+The manifest (config.json in the environment directory) holds everything
+needed to route a query without opening any parse result: per file the
+content hash, size, mtime, parse status, symbol counts, top-level names,
+token counts and the blob holding the parse result, plus a map from every
+top-level name to the files defining it.
+"""
+
+import os
+import json
+import bisect
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from CodingAgent.inspector.locking import atomic_write
+
+MANIFEST_FILE_NAME = "config.json"
+MANIFEST_VERSION = 1
+
+
+def summarize_symbols(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Count the symbols of a parse result and list its top-level names.
+
+    Args:
+        result: Parse result (full, compact or outline), None if parsing failed.
+
+    Returns:
+        Dict with the parse status ("parsed", "outline" or "failed"), the
+        number of classes, methods and functions, and the names of the
+        top-level classes and functions in source order.
+    """
+    if not result:
+        return {"status": "failed", "classes": 0, "methods": 0, "functions": 0, "names": []}
+    classes, functions = result.get("classes", []), result.get("functions", [])
+    return {
+        "status": "outline" if result.get("outline") else "parsed",
+        "classes": len(classes),
+        "methods": sum(len(cls.get("methods", [])) for cls in classes),
+        "functions": len(functions),
+        "names": [entry["name"] for entry in classes + functions],
+    }
+
+
+def build_manifest(root: str, files: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Assemble the manifest from parse cache entries.
+
+    Args:
+        root: Directory that was indexed.
+        files: (source path, cache entry) pairs; entries carry a "symbols"
+            summary from summarize_symbols().
+
+    Returns:
+        The manifest, ready to be dumped as json.
+    """
+    records, defined_in = {}, {}
+    for path, entry in files:
+        records[path] = _record(entry)
+        for name in records[path]["names"]:
+            defined_in.setdefault(name, []).append(path)
+    return {
+        "version": MANIFEST_VERSION,
+        "root": root,
+        "files": records,
+        "defined_in": {name: sorted(paths) for name, paths in defined_in.items()},
+    }
+
+
+def update_manifest(
+    manifest: Dict[str, Any], files: Iterable[Tuple[str, Dict[str, Any]]], removed: Iterable[str]
+) -> None:
+    """Apply changes of some files to a manifest, in place.
+
+    Args:
+        manifest: Manifest returned by build_manifest().
+        files: (source path, cache entry) pairs of the changed files.
+        removed: Source paths of files that left the index.
+    """
+    records, defined_in = manifest["files"], manifest["defined_in"]
+
+    def forget(path: str) -> None:
+        record = records.pop(path, None)
+        for name in record["names"] if record else []:
+            paths = defined_in[name]
+            paths.remove(path)
+            if not paths:
+                del defined_in[name]
+
+    for path in removed:
+        forget(path)
+    for path, entry in files:
+        forget(path)
+        records[path] = _record(entry)
+        for name in records[path]["names"]:
+            bisect.insort(defined_in.setdefault(name, []), path)
+
+
+def _record(entry: Dict[str, Any]) -> Dict[str, Any]:
+    symbols = entry.get("symbols") or summarize_symbols(None)
+    return {
+        "hash": entry["hash"],
+        "size": entry["size"],
+        "mtime_ns": entry["mtime_ns"],
+        # relative to the environment directory, see Manifest.blob_path
+        "blob": entry["environ_file"],
+        # per tokenizer, see CodingAgent.inspector.tokens
+        "tokens": entry.get("tokens", {}),
+        **symbols,
+    }
+
+
+def write_manifest(manifest: Dict[str, Any], environ_path: str) -> None:
+    """Write the manifest without whitespace, so it loads fast.
+
+    Args:
+        manifest: Manifest returned by build_manifest().
+        environ_path: Path to the environment directory.
+    """
+    with atomic_write(os.path.join(environ_path, MANIFEST_FILE_NAME), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+class Manifest:
+    """Read access to the manifest of an environment."""
+
+    def __init__(self, data: Dict[str, Any], environ_path: str = "."):
+        """Initialize the Manifest.
+
+        Args:
+            data: Manifest returned by build_manifest().
+            environ_path: Environment directory the blob paths are relative to.
+        """
+        self.environ_path = environ_path
+        self.root: Optional[str] = data.get("root")
+        self.files: Dict[str, Dict[str, Any]] = data.get("files", {})
+        self.defined_in: Dict[str, List[str]] = data.get("defined_in", {})
+
+    @classmethod
+    def load(cls, environ_path: str) -> Optional["Manifest"]:
+        """Load the manifest of an environment.
+
+        Args:
+            environ_path: Path to the environment directory.
+
+        Returns:
+            The Manifest, or None if there is none or it was written in an
+            older format.
+        """
+        try:
+            with open(os.path.join(environ_path, MANIFEST_FILE_NAME), "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return None
+        return cls(data, environ_path)
+
+    def file(self, path: str) -> Optional[Dict[str, Any]]:
+        """Get the record of a file.
+
+        Args:
+            path: Absolute path of the source file.
+
+        Returns:
+            The record, or None if the file is not indexed.
+        """
+        return self.files.get(path)
+
+    def blob_path(self, record: Dict[str, Any]) -> str:
+        """Get the path of the blob holding the parse result of a file.
+
+        Args:
+            record: Record of the file, see file().
+
+        Returns:
+            Path of the blob, below the directory the manifest was loaded from.
+        """
+        return os.path.join(self.environ_path, record["blob"])
+
+    def files_defining(self, name: str) -> List[str]:
+        """Find the files defining a top-level class or function.
+
+        Args:
+            name: Name of the class or function.
+
+        Returns:
+            Absolute paths of the defining files, sorted.
+        """
+        return self.defined_in.get(name, [])
@@ -0,0 +1,65 @@
+"""Compiled fnmatch-style pattern lists for include and exclude filtering."""
+
+import os
+import re
+import fnmatch
+from typing import Iterable
+
+_MAGIC = re.compile(r"[*?[]")
+
+
+class PathMatcher:
+    """Matches relative paths against a list of fnmatch patterns at once.
+
+    Gives the same answers as calling fnmatch.fnmatch for every pattern, but
+    the patterns are compiled once: literal patterns are looked up in a set,
+    "*<literal>" patterns (e.g. "*.py") become one str.endswith call,
+    "<literal>*" patterns (e.g. "dist/*") one str.startswith call, and all
+    remaining patterns are joined into a single regular expression.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """Initialize the PathMatcher.
+
+        Args:
+            patterns: fnmatch patterns; "*" also matches path separators.
+        """
+        self.patterns = list(patterns)
+        # fnmatch.fnmatch normalizes the case (and separators) on Windows
+        self._normcase = os.path.normcase("A/") != "A/"
+        exact, prefixes, suffixes, other = set(), [], [], []
+        for pattern in self.patterns:
+            pattern = os.path.normcase(pattern)
+            if not _MAGIC.search(pattern):
+                exact.add(pattern)
+            elif pattern.startswith("*") and not _MAGIC.search(pattern, 1):
+                suffixes.append(pattern[1:])
+            elif pattern.endswith("*") and not _MAGIC.search(pattern[:-1]):
+                prefixes.append(pattern[:-1])
+            else:
+                other.append(fnmatch.translate(pattern))
+        self._exact = exact
+        self._prefixes = tuple(prefixes)
+        self._suffixes = tuple(suffixes)
+        self._regex = re.compile("|".join(other)).match if other else None
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def match(self, rel_path: str) -> bool:
+        """Check whether a path matches any of the patterns.
+
+        Args:
+            rel_path: Path relative to the directory the patterns refer to.
+
+        Returns:
+            True if at least one pattern matches.
+        """
+        if self._normcase:
+            rel_path = os.path.normcase(rel_path)
+        return (
+            rel_path in self._exact
+            or (self._suffixes and rel_path.endswith(self._suffixes))
+            or (self._prefixes and rel_path.startswith(self._prefixes))
+            or (self._regex is not None and self._regex(rel_path) is not None)
+        )
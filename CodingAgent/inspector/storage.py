@@ -0,0 +1,211 @@
+"""Storage backends for the parsed environment."""
+
+import os
+import json
+import marshal
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+from CodingAgent.inspector.locking import atomic_write
+
+
+def to_plain(data: Any) -> Any:
+    """Convert dict and list subclasses (e.g. compact SourceRecord entries) to plain types.
+
+    Args:
+        data: Parse result or any nested part of it.
+
+    Returns:
+        The same data built from plain dicts and lists only.
+    """
+    if isinstance(data, dict):
+        return {key: to_plain(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [to_plain(value) for value in data]
+    return data
+
+
+class EnvironmentStorage(ABC):
+    """Abstract base class for environment storage backends."""
+
+    name: str = ""
+    suffix: str = ""
+
+    @abstractmethod
+    def dump(self, data: Any, path: str) -> None:
+        """Write data to a file.
+
+        Args:
+            data: Parse result to store.
+            path: Path of the file to write.
+        """
+        pass
+
+    @abstractmethod
+    def load(self, path: str) -> Any:
+        """Read data back from a file.
+
+        Args:
+            path: Path of the file to read.
+
+        Returns:
+            The stored parse result.
+        """
+        pass
+
+
+class JsonStorage(EnvironmentStorage):
+    """Human readable json, kept as the export format."""
+
+    name = "json"
+    suffix = ".json"
+
+    def __init__(self, pretty: bool = True):
+        """Initialize the JsonStorage.
+
+        Args:
+            pretty: Whether to indent and sort keys, otherwise write without whitespace.
+        """
+        self.pretty = pretty
+
+    def dump(self, data: Any, path: str) -> None:
+        with atomic_write(path, "w", encoding="utf-8") as file:
+            json.dump(
+                data,
+                file,
+                indent=2 if self.pretty else None,
+                separators=None if self.pretty else (",", ":"),
+                ensure_ascii=False,
+                sort_keys=True,
+            )
+
+    def load(self, path: str) -> Any:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+
+class OrjsonStorage(EnvironmentStorage):
+    """Unindented json written and read through orjson."""
+
+    name = "orjson"
+    suffix = ".json"
+
+    def __init__(self, pretty: bool = True):
+        try:
+            import orjson
+        except ImportError as e:
+            raise ImportError(
+                "The 'orjson' storage requires the orjson package: pip install orjson"
+            ) from e
+        self._orjson = orjson
+
+    def dump(self, data: Any, path: str) -> None:
+        with atomic_write(path, "wb") as file:
+            file.write(self._orjson.dumps(data))
+
+    def load(self, path: str) -> Any:
+        with open(path, "rb") as file:
+            return self._orjson.loads(file.read())
+
+
+class MarshalStorage(EnvironmentStorage):
+    """Binary encoding with the standard library marshal module.
+
+    The format depends on the Python version, so files are only meant to be
+    read back by the interpreter that wrote them.
+    """
+
+    name = "marshal"
+    suffix = ".marshal"
+
+    def __init__(self, pretty: bool = True):
+        pass
+
+    def dump(self, data: Any, path: str) -> None:
+        with atomic_write(path, "wb") as file:
+            marshal.dump(to_plain(data), file)
+
+    def load(self, path: str) -> Any:
+        with open(path, "rb") as file:
+            return marshal.load(file)
+
+
+class MsgpackStorage(EnvironmentStorage):
+    """Binary encoding with msgpack."""
+
+    name = "msgpack"
+    suffix = ".msgpack"
+
+    def __init__(self, pretty: bool = True):
+        try:
+            import msgpack
+        except ImportError as e:
+            raise ImportError(
+                "The 'msgpack' storage requires the msgpack package: pip install msgpack"
+            ) from e
+        self._msgpack = msgpack
+
+    def dump(self, data: Any, path: str) -> None:
+        with atomic_write(path, "wb") as file:
+            file.write(self._msgpack.packb(data, use_bin_type=True))
+
+    def load(self, path: str) -> Any:
+        with open(path, "rb") as file:
+            return self._msgpack.unpackb(file.read(), raw=False)
+
+
+STORAGE_BACKENDS: Dict[str, type] = {
+    backend.name: backend
+    for backend in (JsonStorage, OrjsonStorage, MarshalStorage, MsgpackStorage)
+}
+
+
+def get_storage(name: str = "json", pretty: bool = True) -> EnvironmentStorage:
+    """Create a storage backend by name.
+
+    Args:
+        name: One of the names in STORAGE_BACKENDS.
+        pretty: Whether the json backend indents its output.
+
+    Returns:
+        The storage backend instance.
+
+    Raises:
+        ValueError: If the name is unknown.
+        ImportError: If the backend needs a package that is not installed.
+    """
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(
+            f"Unknown storage '{name}', expected one of {sorted(STORAGE_BACKENDS)}."
+        )
+    return STORAGE_BACKENDS[name](pretty=pretty)
+
+
+def environ_file_candidates(base_path: str) -> List[str]:
+    """List the possible environment files for a path without suffix.
+
+    Args:
+        base_path: Environment file path without its suffix.
+
+    Returns:
+        Candidate paths, one per distinct storage suffix.
+    """
+    suffixes = dict.fromkeys(backend.suffix for backend in STORAGE_BACKENDS.values())
+    return [base_path + suffix for suffix in suffixes]
+
+
+def load_environ_file(path: str) -> Any:
+    """Load an environment file written by any storage backend.
+
+    Args:
+        path: Path to the environment file.
+
+    Returns:
+        The stored parse result.
+    """
+    suffix = os.path.splitext(path)[1]
+    if suffix == MarshalStorage.suffix:
+        return MarshalStorage().load(path)
+    if suffix == MsgpackStorage.suffix:
+        return MsgpackStorage().load(path)
+    return JsonStorage().load(path)
@@ -0,0 +1,321 @@
+"""SQLite symbol index over parsed environment files."""
+
+import os
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+SYMBOL_INDEX_FILE_NAME = "symbols.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    hash TEXT
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    qualname TEXT NOT NULL,
+    parent TEXT,
+    line_start INTEGER,
+    line_end INTEGER,
+    signature TEXT,
+    args TEXT,
+    returns TEXT,
+    bases TEXT,
+    docstring TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_symbols_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS idx_symbols_qualname ON symbols (qualname);
+CREATE INDEX IF NOT EXISTS idx_symbols_path ON symbols (path);
+CREATE VIRTUAL TABLE IF NOT EXISTS symbols_fts USING fts5 (name, docstring, signature);
+"""
+
+_COLUMNS = (
+    "id, path, kind, name, qualname, parent, line_start, line_end, "
+    "signature, args, returns, bases, docstring"
+)
+
+
+def _function_signature(func: Dict[str, Any]) -> str:
+    """Render the signature of a parsed function.
+
+    Args:
+        func: Function entry of a parse result.
+
+    Returns:
+        Signature such as "def name(a: int = 1) -> str".
+    """
+    args = []
+    for arg in func["args"]:
+        text = arg["name"]
+        if arg.get("annotation"):
+            text += f": {arg['annotation']}"
+        if arg.get("default") is not None:
+            text += f" = {arg['default']}" if arg.get("annotation") else f"={arg['default']}"
+        args.append(text)
+    signature = f"def {func['name']}({', '.join(args)})"
+    if func.get("returns"):
+        signature += f" -> {func['returns']}"
+    return signature
+
+
+def _class_signature(cls: Dict[str, Any]) -> str:
+    """Render the signature of a parsed class.
+
+    Args:
+        cls: Class entry of a parse result.
+
+    Returns:
+        Signature such as "class Name(Base)".
+    """
+    bases = cls.get("bases") or []
+    return f"class {cls['name']}({', '.join(bases)})" if bases else f"class {cls['name']}"
+
+
+def _fts_query(query: str, prefix: bool) -> str:
+    """Turn free text into an FTS5 query matching all of its terms.
+
+    Args:
+        query: Free text query.
+        prefix: Whether each term may match as a prefix.
+
+    Returns:
+        The quoted FTS5 query.
+    """
+    terms = []
+    for term in query.split():
+        quoted = '"' + term.replace('"', '""') + '"'
+        terms.append(quoted + "*" if prefix else quoted)
+    return " ".join(terms)
+
+
+class SymbolIndex:
+    """Classes, methods and functions of all parsed files in one SQLite database.
+
+    Names and paths are indexed columns, and names, docstrings and signatures
+    are searchable with FTS5. Files are replaced as a whole on upsert, so a
+    re-parsed file never leaves stale symbols behind.
+    """
+
+    def __init__(self, db_path: str):
+        """Initialize the SymbolIndex.
+
+        Args:
+            db_path: Path to the SQLite database, created if missing.
+        """
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+
+    def file_hash(self, path: str) -> Optional[str]:
+        """Get the content hash a file was indexed with.
+
+        Args:
+            path: Absolute path of the source file.
+
+        Returns:
+            The recorded hash, or None if the file is not indexed.
+        """
+        row = self.connection.execute(
+            "SELECT hash FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return row["hash"] if row is not None else None
+
+    def paths(self) -> List[str]:
+        """List all indexed source files."""
+        return [row["path"] for row in self.connection.execute("SELECT path FROM files")]
+
+    def _delete_symbols(self, path: str) -> None:
+        self.connection.execute(
+            "DELETE FROM symbols_fts WHERE rowid IN (SELECT id FROM symbols WHERE path = ?)",
+            (path,),
+        )
+        self.connection.execute("DELETE FROM symbols WHERE path = ?", (path,))
+
+    def _insert_symbol(
+        self,
+        path: str,
+        kind: str,
+        entry: Dict[str, Any],
+        signature: str,
+        parent: Optional[str] = None,
+    ) -> None:
+        qualname = f"{parent}.{entry['name']}" if parent else entry["name"]
+        cursor = self.connection.execute(
+            "INSERT INTO symbols (path, kind, name, qualname, parent, line_start, line_end, "
+            "signature, args, returns, bases, docstring) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                kind,
+                entry["name"],
+                qualname,
+                parent,
+                entry.get("line_start"),
+                entry.get("line_end"),
+                signature,
+                json.dumps(entry["args"]) if "args" in entry else None,
+                entry.get("returns"),
+                json.dumps(entry["bases"]) if "bases" in entry else None,
+                entry.get("docstring"),
+            ),
+        )
+        self.connection.execute(
+            "INSERT INTO symbols_fts (rowid, name, docstring, signature) VALUES (?, ?, ?, ?)",
+            (cursor.lastrowid, entry["name"], entry.get("docstring") or "", signature),
+        )
+
+    def upsert_file(
+        self,
+        path: str,
+        result: Optional[Dict[str, Any]],
+        content_hash: Optional[str] = None,
+    ) -> None:
+        """Replace all symbols of a file with those of a new parse result.
+
+        Changes become visible to other connections after commit().
+
+        Args:
+            path: Absolute path of the source file.
+            result: Parse result of the file, None if parsing failed.
+            content_hash: Hash of the parsed content.
+        """
+        self._delete_symbols(path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files (path, hash) VALUES (?, ?)", (path, content_hash)
+        )
+        if not result:
+            return
+        for cls in result["classes"]:
+            self._insert_symbol(path, "class", cls, _class_signature(cls))
+            for method in cls["methods"]:
+                self._insert_symbol(
+                    path, "method", method, _function_signature(method), parent=cls["name"]
+                )
+        for func in result["functions"]:
+            self._insert_symbol(path, "function", func, _function_signature(func))
+
+    def remove_file(self, path: str) -> None:
+        """Remove a file and its symbols from the index.
+
+        Args:
+            path: Absolute path of the source file.
+        """
+        self._delete_symbols(path)
+        self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def retain(self, keep: Iterable[str]) -> int:
+        """Remove all files that are not in the given set.
+
+        Args:
+            keep: Source paths that are still part of the index.
+
+        Returns:
+            Number of removed files.
+        """
+        keep = set(keep)
+        removed = [path for path in self.paths() if path not in keep]
+        for path in removed:
+            self.remove_file(path)
+        return len(removed)
+
+    def commit(self) -> None:
+        """Commit pending changes."""
+        self.connection.commit()
+
+    def _rows(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        rows = []
+        for row in self.connection.execute(sql, params):
+            symbol = dict(row)
+            for key in ("args", "bases"):
+                if symbol[key] is not None:
+                    symbol[key] = json.loads(symbol[key])
+            rows.append(symbol)
+        return rows
+
+    def lookup(self, name: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find symbols by exact name or qualified name (e.g. "Class.method").
+
+        Args:
+            name: Name or qualified name of the symbol.
+            kind: Optionally restrict to "class", "method" or "function".
+
+        Returns:
+            Matching symbols ordered by path and line.
+        """
+        sql = f"SELECT {_COLUMNS} FROM symbols WHERE (name = ? OR qualname = ?)"
+        params = (name, name)
+        if kind is not None:
+            sql += " AND kind = ?"
+            params += (kind,)
+        return self._rows(sql + " ORDER BY path, line_start", params)
+
+    def symbols_in(self, path: str) -> List[Dict[str, Any]]:
+        """List all symbols of a file.
+
+        Args:
+            path: Absolute path of the source file.
+
+        Returns:
+            Symbols of the file ordered by line.
+        """
+        return self._rows(
+            f"SELECT {_COLUMNS} FROM symbols WHERE path = ? ORDER BY line_start, id", (path,)
+        )
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> List[Dict[str, Any]]:
+        """Full-text search over symbol names, docstrings and signatures.
+
+        Args:
+            query: Free text; all terms have to match.
+            limit: Maximum number of results.
+            prefix: Whether terms may match as prefixes.
+
+        Returns:
+            Matching symbols, best matches first.
+        """
+        fts_query = _fts_query(query, prefix)
+        if not fts_query:
+            return []
+        columns = ", ".join(f"s.{column.strip()}" for column in _COLUMNS.split(","))
+        return self._rows(
+            f"SELECT {columns} FROM symbols_fts JOIN symbols AS s ON s.id = symbols_fts.rowid "
+            "WHERE symbols_fts MATCH ? ORDER BY bm25(symbols_fts, 10.0, 1.0, 2.0) LIMIT ?",
+            (fts_query, limit),
+        )
+
+    def close(self) -> None:
+        """Commit pending changes and close the database."""
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self) -> "SymbolIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+def open_symbol_index(environ_path: str) -> SymbolIndex:
+    """Open the symbol index stored in an environment directory.
+
+    Args:
+        environ_path: Path to the environment directory.
+
+    Returns:
+        The SymbolIndex instance.
+
+    Raises:
+        FileNotFoundError: If the environment has no symbol index.
+    """
+    db_path = os.path.join(environ_path, SYMBOL_INDEX_FILE_NAME)
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"No symbol index found at '{db_path}'.")
+    return SymbolIndex(db_path)
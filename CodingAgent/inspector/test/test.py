@@ -0,0 +1,442 @@
+"""
+Test the repository inspector on small generated trees
+"""
+
+import sys
+import os
+import json
+import random
+import fnmatch
+import shutil
+import tempfile
+import contextlib
+import threading
+import subprocess
+
+sys.path.append(os.getcwd())
+
+from CodingAgent.inspector.blob_store import collect_garbage
+from CodingAgent.inspector.context_assembler import make_context_builder
+import CodingAgent.inspector.context_manager as context_manager
+from CodingAgent.inspector.context_manager import FileContentReader
+from CodingAgent.inspector.ignore import IgnoreTree
+from CodingAgent.inspector.import_graph import ImportGraph
+from CodingAgent.inspector.matcher import PathMatcher
+
+
+def make_tree(root, files):
+    for name, content in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    # the environment is created in the current working directory
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def import_graph_test():
+    with tempfile.TemporaryDirectory() as root:
+        files = {
+            "app/main.py": "",
+            "app/helpers/json.py": "",
+            "app/helpers/typing.py": "",
+            "src/pkg/__init__.py": "",
+            "src/pkg/mod.py": "",
+        }
+        make_tree(root, files)
+        imports = {
+            # standard library names must not resolve to same-named repo modules
+            "app/main.py": [("json", 0, []), ("typing", 0, ["List"]), ("pkg.mod", 0, [])],
+            "app/helpers/json.py": [("helpers.typing", 0, [])],
+            "app/helpers/typing.py": [],
+            "src/pkg/__init__.py": [],
+            "src/pkg/mod.py": [],
+        }
+        graph = ImportGraph.build(
+            root, [(os.path.join(root, name), imports[name]) for name in files]
+        )
+        # modules below a source root are found by their import name
+        assert graph.dependencies("app.main") == ["src.pkg.mod"]
+        assert graph.external["app.main"] == {"json", "typing"}
+        # only source roots are stripped, not arbitrary leading directories
+        assert graph.dependencies("app.helpers.json") == []
+        assert graph.external["app.helpers.json"] == {"helpers"}
+
+
+def refresh_test():
+    # a refresh patches manifest and import graph to what a full rebuild gives
+    with tempfile.TemporaryDirectory() as work, working_directory(work):
+        root = os.path.join(work, "proj")
+        make_tree(
+            root,
+            {
+                "pkg/__init__.py": "",
+                "pkg/a.py": "from pkg import b\ndef fa(): pass\n",
+                "pkg/b.py": "def fb(): pass\n",
+                "pkg/c.py": "import json\nclass C: pass\n",
+            },
+        )
+        reader = FileContentReader(
+            root, include_list=["*.py"], incremental=True, symbol_index=True, import_graph=True
+        )
+        with reader:
+            make_tree(root, {"pkg/b.py": "def fb2(): pass\n", "pkg/d.py": "from pkg.b import fb2\n"})
+            os.remove(os.path.join(root, "pkg/c.py"))
+            paths = [os.path.join(root, name) for name in ("pkg/b.py", "pkg/c.py", "pkg/d.py")]
+            assert sorted(item.path for item in reader.refresh(paths)) == [paths[0], paths[2]]
+            assert reader.manifest == reader._build_manifest()
+            assert reader.import_graph.to_dict() == reader._build_import_graph().to_dict()
+            assert reader.manifest["defined_in"]["fb2"] == [paths[0]]
+            assert "C" not in reader.manifest["defined_in"]
+            assert reader.import_graph.dependents("pkg.b") == ["pkg.a", "pkg.d"]
+            assert sorted(reader.symbol_index.paths()) == sorted(reader.cache.entries)
+        # held back changes are written when the reader is closed
+        with open(os.path.join(work, ".environment", "config.json")) as file:
+            assert sorted(json.load(file)["files"]) == sorted(reader.cache.entries)
+
+
+def ignore_above_root_test():
+    # a project inside a git work tree obeys the ignore files above it
+    with tempfile.TemporaryDirectory() as top:
+        make_tree(
+            top,
+            {
+                ".git/info/exclude": "*.tmp.py\n",
+                ".gitignore": "proj/gen/\n",
+                "proj/.gitignore": "!keep.tmp.py\n",
+                "proj/ok.py": "",
+                "proj/keep.tmp.py": "",
+                "proj/gen/out.py": "",
+                "proj/sub/a.tmp.py": "",
+            },
+        )
+        tree = IgnoreTree(os.path.join(top, "proj"))
+        assert tree.is_ignored("gen", True)
+        assert tree.is_ignored("gen/out.py")
+        assert tree.is_ignored("sub/a.tmp.py")
+        assert not tree.is_ignored("keep.tmp.py")
+        assert not tree.is_ignored("ok.py")
+
+
+def gitignore_test():
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(
+            root,
+            {
+                ".gitignore": "\n".join(
+                    [
+                        "# comment",
+                        "*.log",
+                        "!keep.log",
+                        "/top.py",
+                        "build/",
+                        "docs/*.md",
+                        "**/cache/*.py",
+                        "\\#hash.py",
+                        "\\!bang.py",
+                    ]
+                ),
+                "sub/.gitignore": "!*.log\nlocal.py\n",
+            },
+        )
+        tree = IgnoreTree(root)
+        expected = {
+            # negation re-includes, the last match wins
+            "a.log": True,
+            "keep.log": False,
+            "x/keep.log": False,
+            # a deeper ignore file takes precedence
+            "sub/b.log": False,
+            "sub/local.py": True,
+            "local.py": False,
+            # a leading or middle slash anchors the pattern to its directory
+            "top.py": True,
+            "sub/top.py": False,
+            "docs/a.md": True,
+            "x/docs/a.md": False,
+            "docs/x/a.md": False,
+            # "**/" matches in any directory
+            "cache/a.py": True,
+            "x/y/cache/a.py": True,
+            "x/cache/y/a.py": False,
+            # escaped comment and negation characters are literal
+            "#hash.py": True,
+            "!bang.py": True,
+            "# comment": False,
+        }
+        for rel_path, ignored in expected.items():
+            assert tree.is_ignored(rel_path) == ignored, rel_path
+        # directory-only patterns match directories and everything below them
+        assert tree.is_ignored("build", True)
+        assert not tree.is_ignored("build", False)
+        assert tree.is_ignored("build/a.py")
+        assert tree.is_ignored("x/build/a.py")
+        # nothing below an ignored directory can be re-included
+        assert tree.is_ignored("build/keep.log")
+
+        if shutil.which("git") is None:
+            return
+        make_tree(root, {name: "" for name in expected})
+        make_tree(root, {"build/a.py": "", "x/build/a.py": "", "build/keep.log": ""})
+        subprocess.run(["git", "init", "-q", root], check=True)
+        paths = list(expected) + ["build/a.py", "x/build/a.py", "build/keep.log"]
+        result = subprocess.run(
+            ["git", "check-ignore", "--no-index", "--stdin"],
+            cwd=root,
+            input="\n".join(paths),
+            capture_output=True,
+            text=True,
+        )
+        # git agrees on every path
+        assert set(result.stdout.split("\n")) - {""} == {
+            path for path in paths if tree.is_ignored(path)
+        }
+
+
+def matcher_test():
+    # the compiled matcher answers like fnmatch.fnmatch over all patterns
+    rng = random.Random(0)
+    pattern_pieces = ["a", "b", ".py", "/", "*", "?", "[ab]", "[!a]", "dist/", "*.py"]
+    path_pieces = ["a", "b", "c", ".py", "/", "dist/", ".", "ab"]
+    for _ in range(2000):
+        patterns = [
+            "".join(rng.choice(pattern_pieces) for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(0, 4))
+        ]
+        matcher = PathMatcher(patterns)
+        assert bool(matcher) == bool(patterns)
+        for _ in range(20):
+            path = "".join(rng.choice(path_pieces) for _ in range(rng.randint(1, 5)))
+            expected = any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+            assert matcher.match(path) == expected, (patterns, path)
+
+
+def cache_stats_test():
+    # the incremental cache parses only what changed between runs
+    with tempfile.TemporaryDirectory() as work, working_directory(work):
+        root = os.path.join(work, "proj")
+        make_tree(root, {"a.py": "def a(): pass\n", "b.py": "def b(): pass\n"})
+
+        def run():
+            with FileContentReader(root, include_list=["*.py"], incremental=True) as reader:
+                return reader.cache.stats.as_dict()
+
+        def counts(hits=0, misses=0, reparsed=0, shared=0, deleted=0):
+            return {
+                "hits": hits,
+                "misses": misses,
+                "reparsed": reparsed,
+                "shared": shared,
+                "deleted": deleted,
+            }
+
+        assert run() == counts(misses=2)
+        assert run() == counts(hits=2)
+        make_tree(root, {"a.py": "def a2(): pass\n"})
+        assert run() == counts(hits=1, reparsed=1)
+        # an identical file reuses the parse result of the other
+        make_tree(root, {"c.py": "def b(): pass\n"})
+        assert run() == counts(hits=2, shared=1)
+        os.remove(os.path.join(root, "b.py"))
+        assert run() == counts(hits=2, deleted=1)
+        make_tree(root, {"d.py": "def d(): pass\n"})
+        assert run() == counts(hits=2, misses=1)
+
+
+def context_builder_test():
+    # queries are answered while a watcher refreshes the index on its own thread
+    with tempfile.TemporaryDirectory() as work, working_directory(work):
+        root = os.path.join(work, "proj")
+        files = {f"pkg/m{i}.py": f"from pkg import m{i + 1}\ndef f{i}(): pass\n" for i in range(200)}
+        files["pkg/m0.py"] = "def locate_target(): pass\n"
+        make_tree(root, dict(files, **{"pkg/__init__.py": ""}))
+        reader = FileContentReader(
+            root, include_list=["*.py"], incremental=True, symbol_index=True, import_graph=True
+        )
+        errors = []
+        with reader:
+            build = make_context_builder(reader, token_budget=2000)
+            done = threading.Event()
+
+            def refresh():
+                try:
+                    # adding and removing modules rebuilds the import graph
+                    for i in range(300):
+                        extra = os.path.join(root, "pkg", f"extra{i % 3}.py")
+                        if os.path.exists(extra):
+                            os.remove(extra)
+                        else:
+                            make_tree(root, {f"pkg/extra{i % 3}.py": "from pkg import m0\n"})
+                        reader.refresh([extra])
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    done.set()
+
+            # switch threads often so the two interleave within a build
+            interval = sys.getswitchinterval()
+            sys.setswitchinterval(1e-5)
+            thread = threading.Thread(target=refresh)
+            thread.start()
+            try:
+                while not done.is_set():
+                    try:
+                        assert "def locate_target" in build("where is locate_target defined")
+                    except Exception as e:
+                        errors.append(e)
+            finally:
+                thread.join()
+                sys.setswitchinterval(interval)
+        assert not errors, errors
+
+
+def crashing_parse_worker(path, *args):
+    if path.endswith("crash.py"):
+        # dies like a worker killed for running out of memory
+        os._exit(1)
+    return parse_file_worker(path, *args)
+
+
+parse_file_worker = context_manager._parse_file_worker
+
+
+def crashed_worker_test():
+    # a dying worker process fails only the file it was parsing
+    with tempfile.TemporaryDirectory() as work, working_directory(work):
+        root = os.path.join(work, "proj")
+        files = {f"m{i}.py": f"def f{i}(): pass\n" for i in range(40)}
+        files["m20crash.py"] = "def crash(): pass\n"
+        make_tree(root, files)
+        # forked workers run the replaced function
+        context_manager._parse_file_worker = crashing_parse_worker
+        try:
+            reader = FileContentReader(root, include_list=["*.py"], incremental=True, workers=4)
+            statuses = {os.path.basename(item.path): item.status for item in reader.iter_index()}
+        finally:
+            context_manager._parse_file_worker = parse_file_worker
+        assert statuses.pop("m20crash.py") == "failed"
+        assert set(statuses.values()) == {"parsed"} and len(statuses) == 40
+        assert sorted(reader.cache.entries) == [
+            os.path.join(root, name) for name in sorted(files) if name != "m20crash.py"
+        ]
+
+
+def size_budget_test():
+    with tempfile.TemporaryDirectory() as work, working_directory(work):
+        root = os.path.join(work, "proj")
+        line = "x = 1\n"
+        make_tree(
+            root,
+            {
+                "a.py": line * 16,
+                "b.py": line * 16,
+                "c.py": line * 16,
+                # walked last, when the total budget is spent
+                "z_big.py": line * 50,
+            },
+        )
+        reader = FileContentReader(
+            root, include_list=["*.py"], max_file_size=200, max_total_size=250
+        )
+        with reader:
+            contents = {
+                os.path.basename(path): content for path, content in reader.get_content(update=False)
+            }
+            assert contents["a.py"] == contents["b.py"] == line * 16
+            # cut to what is left of the total budget
+            assert contents["c.py"] == (line * 16)[:58]
+            # files above max_file_size keep nothing, but are still indexed
+            assert contents["z_big.py"] == ""
+            assert len(reader.cache.entries) == 4
+            report = {
+                kind: [
+                    (os.path.basename(entry["path"]), entry["kept"], entry["reasons"])
+                    for entry in entries
+                ]
+                for kind, entries in reader.size_report.items()
+            }
+            assert report == {
+                "truncated": [("c.py", 58, ["total_budget"])],
+                "skipped": [("z_big.py", 0, ["file_limit", "total_budget"])],
+            }
+        with open(os.path.join(work, ".environment", "size_report.json")) as file:
+            assert json.load(file) == reader.size_report
+
+        # a file that shrinks below the limit between stat and read is kept whole
+        path = os.path.join(root, "z_big.py")
+        make_tree(root, {"z_big.py": line * 10})
+        real_fstat = os.fstat
+
+        def stale_fstat(fd):
+            stat = real_fstat(fd)
+            if stat.st_ino == os.stat(path).st_ino and not stale_fstat.called:
+                stale_fstat.called = True
+                # the size before the file was rewritten
+                return os.stat_result((*stat[:6], 300, *stat[7:]))
+            return stat
+
+        stale_fstat.called = False
+        os.fstat = stale_fstat
+        try:
+            with FileContentReader(root, include_list=["*.py"], max_file_size=200) as reader:
+                contents = dict(reader.get_content(update=False))
+        finally:
+            os.fstat = real_fstat
+        assert stale_fstat.called
+        assert contents[path] == line * 10
+        assert reader.size_report == {"truncated": [], "skipped": []}
+
+
+def collect_garbage_test():
+    with tempfile.TemporaryDirectory() as work, working_directory(work):
+        root = os.path.join(work, "proj")
+        environ_path = os.path.join(work, ".environment")
+        make_tree(
+            root,
+            {"a.py": "def a(): pass\n", "copy.py": "def a(): pass\n", "c.py": "def c(): pass\n"},
+        )
+
+        def run():
+            with FileContentReader(root, include_list=["*.py"], incremental=True) as reader:
+                entries = reader.cache.entries
+                return {path: reader.cache.environ_file(entry) for path, entry in entries.items()}
+
+        blobs = run()
+        # identical files share one blob
+        assert len(set(blobs.values())) == 2
+        stale = blobs[os.path.join(root, "c.py")]
+        make_tree(root, {"c.py": "def c2(): pass\n"})
+        # the blob of a.py stays referenced by its copy
+        os.remove(os.path.join(root, "a.py"))
+        blobs = run()
+        size = os.path.getsize(stale)
+        assert collect_garbage(environ_path, dry_run=True) == (1, size)
+        assert os.path.exists(stale)
+        assert collect_garbage(environ_path) == (1, size)
+        assert not os.path.exists(stale)
+        assert all(os.path.exists(blob) for blob in blobs.values())
+        assert collect_garbage(environ_path) == (0, 0)
+        with FileContentReader(root, include_list=["*.py"], incremental=True) as reader:
+            assert reader.cache.stats.hits == 2
+
+
+if __name__ == "__main__":
+    import_graph_test()
+    refresh_test()
+    ignore_above_root_test()
+    gitignore_test()
+    matcher_test()
+    cache_stats_test()
+    context_builder_test()
+    crashed_worker_test()
+    size_budget_test()
+    collect_garbage_test()
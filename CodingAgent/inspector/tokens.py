@@ -0,0 +1,100 @@
+"""Token counting for files, symbols and prompts.
+
+Counting is approximate by default: a fast estimate from word and
+punctuation runs that is close to BPE tokenizers on source code. With the
+optional tiktoken package the exact count of an OpenAI encoding is available
+instead. Exact counts are cached by content hash, and the counts of indexed
+files are kept in the parse cache, so unchanged files are never counted again.
+"""
+
+import re
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+TOKENIZER_MODES = ("approximate", "exact", "auto")
+DEFAULT_ENCODING = "cl100k_base"
+# number of distinct texts whose exact count is kept in memory
+TOKEN_CACHE_SIZE = 4096
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def approximate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text.
+
+    Every punctuation character counts as one token and every word as one
+    token per four characters, which is how BPE vocabularies tend to split
+    source code.
+
+    Args:
+        text: Text to measure.
+
+    Returns:
+        Estimated token count.
+    """
+    return sum((len(piece) + 3) // 4 for piece in _PIECES.findall(text))
+
+
+class TokenCounter:
+    """Counts tokens approximately or, with tiktoken installed, exactly."""
+
+    def __init__(self, mode: str = "approximate", encoding: str = DEFAULT_ENCODING):
+        """Initialize the TokenCounter.
+
+        Args:
+            mode: "approximate", "exact" (requires tiktoken), or "auto" to
+                count exactly whenever tiktoken is installed.
+            encoding: Name of the tiktoken encoding used for exact counts.
+
+        Raises:
+            ValueError: If the mode is unknown.
+            ImportError: If the mode is "exact" and tiktoken is not installed.
+        """
+        if mode not in TOKENIZER_MODES:
+            raise ValueError(f"Unknown tokenizer mode '{mode}', expected one of {TOKENIZER_MODES}.")
+        self._encoding = None
+        if mode != "approximate":
+            try:
+                import tiktoken
+            except ImportError as e:
+                if mode == "exact":
+                    raise ImportError(
+                        "Exact token counts require the tiktoken package: pip install tiktoken"
+                    ) from e
+            else:
+                self._encoding = tiktoken.get_encoding(encoding)
+        self.exact = self._encoding is not None
+        # identifies the counts, so counts of another tokenizer are not reused
+        self.name = f"tiktoken:{encoding}" if self.exact else "approximate"
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+
+    def count(self, text: str, content_hash: Optional[str] = None) -> int:
+        """Count the tokens of a text.
+
+        Args:
+            text: Text to measure.
+            content_hash: Hash identifying the text, if already known.
+
+        Returns:
+            Number of tokens.
+        """
+        if not self.exact:
+            return approximate_tokens(text)
+        key = (
+            content_hash.encode()
+            if content_hash is not None
+            else hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        )
+        count = self._cache.get(key)
+        if count is not None:
+            self._cache.move_to_end(key)
+            return count
+        count = len(self._encoding.encode(text, disallowed_special=()))
+        self._cache[key] = count
+        if len(self._cache) > TOKEN_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return count
+
+    def __call__(self, text: str) -> int:
+        return self.count(text)
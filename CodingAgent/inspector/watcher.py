@@ -0,0 +1,368 @@
+"""Watch a directory tree for file changes, with inotify on Linux and polling elsewhere."""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Set, Tuple
+
+# inotify event masks, see inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# directories never worth watching
+IGNORED_DIRS = {".git", ".hg", ".svn", "__pycache__", ".mypy_cache", ".pytest_cache"}
+
+# paths reported by a backend, or None if events were lost and everything may have changed
+Changes = Optional[Set[str]]
+
+
+class WatchBackend(ABC):
+    """Abstract base class for change notification backends."""
+
+    def __init__(self, root: str, ignore_dir: Optional[Callable[[str], bool]] = None):
+        """Initialize the backend.
+
+        Args:
+            root: Directory to watch recursively.
+            ignore_dir: Returns True for directories that should not be watched.
+        """
+        self.root = os.path.abspath(root)
+        self.ignore_dir = ignore_dir
+
+    def _ignored(self, path: str) -> bool:
+        if os.path.basename(path) in IGNORED_DIRS:
+            return True
+        return self.ignore_dir is not None and self.ignore_dir(path)
+
+    @abstractmethod
+    def read(self, timeout: float) -> Changes:
+        """Wait for changes.
+
+        Args:
+            timeout: Maximum number of seconds to wait.
+
+        Returns:
+            Changed file paths (empty if none arrived in time), or None if
+            changes were lost and the whole tree has to be rescanned.
+        """
+        pass
+
+    def close(self) -> None:
+        """Release the resources of the backend."""
+        pass
+
+
+class InotifyBackend(WatchBackend):
+    """Change notifications from the Linux kernel through inotify.
+
+    Every directory of the tree gets a watch; directories created later are
+    added as their events arrive. No work is done while nothing changes.
+    """
+
+    def __init__(self, root: str, ignore_dir: Optional[Callable[[str], bool]] = None):
+        """Initialize the InotifyBackend.
+
+        Args:
+            root: Directory to watch recursively.
+            ignore_dir: Returns True for directories that should not be watched.
+
+        Raises:
+            OSError: If inotify is not available.
+        """
+        super().__init__(root, ignore_dir)
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._dirs: Dict[int, str] = {}
+        self._watch_tree(self.root)
+
+    def _watch_tree(self, top: str) -> Set[str]:
+        """Add watches for a directory and all directories below it.
+
+        Args:
+            top: Directory to start from.
+
+        Returns:
+            Files found below the directory.
+        """
+        files = set()
+        for root, dirs, names in os.walk(top):
+            dirs[:] = [d for d in dirs if not self._ignored(os.path.join(root, d))]
+            wd = self._add_watch(self._fd, os.fsencode(root), _WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise OSError(error, "inotify watch limit reached, see fs.inotify.max_user_watches")
+                # vanished in the meantime
+                continue
+            self._dirs[wd] = root
+            files.update(os.path.join(root, name) for name in names)
+        return files
+
+    def read(self, timeout: float) -> Changes:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and not self._ignored(path):
+                        # files may have been created before the watch was added
+                        changed.update(self._watch_tree(path))
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        # every file below is gone, the caller cannot list them
+                        return None
+                elif name:
+                    changed.add(path)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingBackend(WatchBackend):
+    """Portable fallback comparing mtime and size snapshots of the tree."""
+
+    def __init__(
+        self,
+        root: str,
+        ignore_dir: Optional[Callable[[str], bool]] = None,
+        interval: float = 1.0,
+    ):
+        """Initialize the PollingBackend.
+
+        Args:
+            root: Directory to watch recursively.
+            ignore_dir: Returns True for directories that should not be watched.
+            interval: Seconds between two scans of the tree.
+        """
+        super().__init__(root, ignore_dir)
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if not self._ignored(entry.path):
+                                    stack.append(entry.path)
+                            elif entry.is_file():
+                                stat = entry.stat()
+                                snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return snapshot
+
+    def read(self, timeout: float) -> Changes:
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        if wait > 0:
+            time.sleep(wait)
+        self._next_scan = time.monotonic() + self.interval
+        snapshot = self._scan()
+        previous = self._snapshot
+        self._snapshot = snapshot
+        changed = {path for path, state in snapshot.items() if previous.get(path) != state}
+        changed.update(path for path in previous if path not in snapshot)
+        return changed
+
+
+def create_backend(
+    root: str,
+    ignore_dir: Optional[Callable[[str], bool]] = None,
+    backend: Optional[str] = None,
+    poll_interval: float = 1.0,
+) -> WatchBackend:
+    """Create a watch backend.
+
+    Args:
+        root: Directory to watch recursively.
+        ignore_dir: Returns True for directories that should not be watched.
+        backend: "inotify", "poll", or None to use inotify where available.
+        poll_interval: Seconds between two scans of the polling backend.
+
+    Returns:
+        The backend instance.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if backend not in (None, "inotify", "poll"):
+        raise ValueError(f"Unknown watch backend '{backend}', expected 'inotify' or 'poll'.")
+    if backend != "poll":
+        try:
+            return InotifyBackend(root, ignore_dir)
+        except (OSError, AttributeError) as e:
+            if backend == "inotify":
+                raise
+            print(f"INFO: inotify unavailable ({e}), polling for file changes instead.")
+    return PollingBackend(root, ignore_dir, interval=poll_interval)
+
+
+class FileWatcher:
+    """Collects file changes below a directory and reports them in batches.
+
+    Changes are debounced: the callback runs once no new change arrived for
+    `debounce` seconds (but at the latest after `max_delay` seconds), with
+    all paths touched in the meantime. The callback runs on the watcher
+    thread, so a slow callback delays the next batch instead of piling up.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        callback: Callable[[Optional[Set[str]]], None],
+        debounce: float = 0.5,
+        max_delay: float = 5.0,
+        backend: Optional[str] = None,
+        poll_interval: float = 1.0,
+        ignore_dir: Optional[Callable[[str], bool]] = None,
+    ):
+        """Initialize the FileWatcher.
+
+        Args:
+            root: Directory to watch recursively.
+            callback: Called with the set of changed paths, or None if changes
+                were lost and the whole tree has to be rescanned.
+            debounce: Seconds without changes before a batch is reported.
+            max_delay: Maximum seconds a change waits while changes keep coming.
+            backend: "inotify", "poll", or None to use inotify where available.
+            poll_interval: Seconds between two scans of the polling backend.
+            ignore_dir: Returns True for directories that should not be watched.
+        """
+        self.root = os.path.abspath(root)
+        self.callback = callback
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.backend = create_backend(self.root, ignore_dir, backend, poll_interval)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FileWatcher":
+        """Start watching on a background thread.
+
+        Returns:
+            The FileWatcher instance.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="probecode-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop watching and release the backend."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.backend.close()
+
+    def _report(self, changes: Changes) -> None:
+        try:
+            self.callback(changes)
+        except Exception as e:
+            print(f"Error: Failed to process file changes: {e}")
+
+    def _run(self) -> None:
+        pending: Set[str] = set()
+        rescan = False
+        first = last = 0.0
+        while not self._stop.is_set():
+            if pending or rescan:
+                now = time.monotonic()
+                timeout = max(0.0, min(last + self.debounce, first + self.max_delay) - now)
+            else:
+                timeout = 0.5
+            changes = self.backend.read(timeout)
+            now = time.monotonic()
+            if changes is None or changes:
+                if not pending and not rescan:
+                    first = now
+                last = now
+                if changes is None:
+                    rescan = True
+                else:
+                    pending.update(changes)
+            if (pending or rescan) and now >= min(last + self.debounce, first + self.max_delay):
+                batch, pending = (None if rescan else pending), set()
+                rescan = False
+                self._report(batch)
+
+    def __enter__(self) -> "FileWatcher":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
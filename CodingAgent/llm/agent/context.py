@@ -1,26 +1,60 @@
 from jinja2 import Template
 
+from CodingAgent.inspector.tokens import TokenCounter
+
 
 class BaseContextManager:
     # todo write history into json file
     # todo add more advanced features
 
-    def __init__(self, chat_template: str):
+    def __init__(self, chat_template: str, token_counter: TokenCounter = None):
         self.chat_template: Template = Template(chat_template)
+        self.token_counter = token_counter if token_counter is not None else TokenCounter()
+        # tokens of the template rendered without any logs
+        self.template_tokens = self.token_counter.count(
+            self.chat_template.render(tool_logs=[])
+        )
+        self.log_tokens = 0
+        self.last_prompt_tokens = 0
         self.agent_logs = []
 
+    @property
+    def agent_logs(self):
+        return self._agent_logs
+
+    @agent_logs.setter
+    def agent_logs(self, logs):
+        self._agent_logs = logs
+        self.log_tokens = sum(self._entry_tokens(entry) for entry in logs)
+
+    @property
+    def prompt_tokens(self) -> int:
+        """Running size of the prompt in tokens, estimated without rendering it."""
+        return self.template_tokens + self.log_tokens
+
+    def _entry_tokens(self, entry: dict) -> int:
+        content = entry["content"]
+        if not isinstance(content, str):
+            content = str(content)
+        return self.token_counter.count(entry["role"]) + self.token_counter.count(content)
+
+    def _append(self, entry: dict):
+        self._agent_logs.append(entry)
+        self.log_tokens += self._entry_tokens(entry)
+
     def build_input_prompt(self):
         result = self.chat_template.render(tool_logs=self.agent_logs)
+        self.last_prompt_tokens = self.token_counter.count(result)
         return result
 
     def log_agent(self, agent_action: str):
-        self.agent_logs.append({"role": "assistant", "content": agent_action})
+        self._append({"role": "assistant", "content": agent_action})
 
     def log_tool_call(self, tool_call_content: str):
-        self.agent_logs.append({"role": "tool_call", "content": tool_call_content})
+        self._append({"role": "tool_call", "content": tool_call_content})
 
     def log_tool_call_result(self, tool_call_result_content: str):
-        self.agent_logs.append(
+        self._append(
             {"role": "tool_call_result", "content": tool_call_result_content}
         )
 
@@ -2,6 +2,7 @@ import os
 import sys
 import json
 import warnings
+from typing import Callable, Optional
 
 from CodingAgent.llm.agent.context import BaseContextManager
 from CodingAgent.llm.agent.base_agent import BaseAgent
@@ -40,8 +41,19 @@ class ProbeCodeAgent(BaseChat):
     和异步工具执行 (AsyncToolManager) 的异步对话 Agent。
     """
 
-    def __init__(self, config_file: str = "config.json"):
+    def __init__(
+        self,
+        config_file: str = "config.json",
+        project_context: Optional[Callable[[str], str]] = None,
+    ):
+        """
+        Args:
+            config_file: Agent 配置文件。
+            project_context: 根据用户查询组装项目上下文（system message）的函数，
+                例如 context_assembler.make_context_builder 的返回值；为 None 时不附带项目代码。
+        """
         super().__init__(config_file)
+        self.project_context = project_context
         llm_config = self.config.get("llm_config", {})
         tool_server_url = self.config.get("tool_server_url")
         chat_template_path = self.config.get("chat_template_path")
@@ -94,8 +106,13 @@ Now, let me analyze the user's question.</think>"""
         with open(prompt_path, encoding="utf-8") as file:
             user_prompt = (file.read()).format(problem=user_query)
 
+        system_message = "You are a helpful assistant."
+        if self.project_context is not None:
+            # the project files most relevant to this query, within the token budget
+            system_message = self.project_context(user_query)
+
         self.context_manager.agent_logs = [
-            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "system", "content": system_message},
             {"role": "user", "content": user_prompt},
             {"role": "assistant", "content": self.assistant_prefix},
         ]
@@ -109,6 +126,9 @@ Now, let me analyze the user's question.</think>"""
 
         while True:
             prompt = self.context_manager.build_input_prompt()
+            self.logger.info(
+                f"[AGENT]: prompt size {self.context_manager.last_prompt_tokens} tokens"
+            )
 
             print("\n[AGENT]: ", end="")
             result = await self.agent.async_step_with_callback(prompt)
@@ -12,17 +12,33 @@ ENVIRONMENT_FILE_PATH = os.path.join(DOCKER_FILE_PATH, ".environment")
 
 # mcp settings
 from mcp.server.fastmcp import FastMCP
+from CodingAgent.pyparser.parser import expand_results
+from CodingAgent.inspector.storage import environ_file_candidates, load_environ_file
+from CodingAgent.inspector.blob_store import load_blob
+from CodingAgent.inspector.manifest import Manifest
+from CodingAgent.inspector.symbol_index import open_symbol_index
+from CodingAgent.inspector.import_graph import IMPORT_GRAPH_FILE_NAME, ImportGraph
 
 mcp = FastMCP("code-parser")
 
 
 # several utility functions
-def _get_file_data(file_path: str):
-    file_path = str(os.path.abspath(file_path)).replace(os.sep, "@").replace(".py", ".json")
-    file_path = f"environ_{file_path}"
-    with open(f"./.environment/{file_path}", "r", encoding="utf-8") as file:
-        json_data = json.load(file)
-    return json_data
+def _get_file_data(file_path: str, expand: bool = True):
+    file_path = str(os.path.abspath(file_path))
+    # parse results are shared blobs, looked up through the manifest
+    manifest = Manifest.load("./.environment")
+    record = manifest.file(file_path) if manifest is not None else None
+    if record is not None:
+        json_data = load_blob(manifest.blob_path(record), file_path)
+    else:
+        # environments written before parse results were shared
+        legacy_path = "./.environment/environ_" + file_path[:-3].replace(os.sep, "@")
+        # the environment may have been written by any storage backend
+        candidates = environ_file_candidates(legacy_path)
+        environ_file = next((c for c in candidates if os.path.exists(c)), candidates[0])
+        json_data = load_environ_file(environ_file)
+    # compact environments reference source by span, expand them unless asked not to
+    return expand_results(json_data) if expand else json_data
 
 
 # for file
@@ -32,6 +48,82 @@ def read_all_file_content():
     pass
 
 
+# for symbols, answered from the SQLite symbol index instead of scanning json files
+@mcp.tool()
+def find_symbol(name: str, kind: str = None) -> list:
+    """Find classes, methods or functions by name.
+
+    Args:
+        name (str): Symbol name, or qualified name such as "Class.method".
+        kind (str): Optionally one of "class", "method" or "function".
+
+    Returns:
+        list: Matching symbols with path, line range, signature and docstring.
+    """
+    try:
+        with open_symbol_index("./.environment") as index:
+            return index.lookup(name, kind=kind)
+    except Exception as e:
+        return [f"Error: {e}"]
+
+
+@mcp.tool()
+def search_symbols(query: str, limit: int = 20) -> list:
+    """Full-text search over symbol names, docstrings and signatures.
+
+    Args:
+        query (str): Search terms, all of them have to match.
+        limit (int): Maximum number of results.
+
+    Returns:
+        list: Matching symbols, best matches first.
+    """
+    try:
+        with open_symbol_index("./.environment") as index:
+            return index.search(query, limit=limit)
+    except Exception as e:
+        return [f"Error: {e}"]
+
+
+@mcp.tool()
+def file_summary(file_path: str) -> dict:
+    """Summarize an indexed file without loading its parse result.
+
+    Args:
+        file_path (str): Path of the Python file.
+
+    Returns:
+        dict: Content hash, size, mtime, parse status, symbol counts and
+            top-level class and function names of the file.
+    """
+    manifest = Manifest.load("./.environment")
+    if manifest is None:
+        return {"error": "The project has not been indexed yet."}
+    record = manifest.file(str(os.path.abspath(file_path)))
+    if record is None:
+        return {"error": f"'{file_path}' is not indexed."}
+    return {key: value for key, value in record.items() if key != "blob"}
+
+
+@mcp.tool()
+def file_dependencies(file_path: str, reverse: bool = False, transitive: bool = True) -> list:
+    """List the files a file depends on through imports, or the files depending on it.
+
+    Args:
+        file_path (str): Path of the Python file.
+        reverse (bool): Return the files importing this file instead.
+        transitive (bool): Include indirect dependencies.
+
+    Returns:
+        list: File paths, starting with the file itself.
+    """
+    try:
+        graph = ImportGraph.load(os.path.join("./.environment", IMPORT_GRAPH_FILE_NAME))
+        return graph.files_for(file_path, reverse=reverse, transitive=transitive)
+    except Exception as e:
+        return [f"Error: {e}"]
+
+
 if __name__ == "__main__":
     data = _get_file_data("./CodingAgent/main.py")
     print(json.dumps(data, ensure_ascii=False, indent=2))
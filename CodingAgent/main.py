@@ -3,7 +3,6 @@ import sys
 import argparse
 import asyncio
 
-from typing import List, Tuple
 from rich.console import Console
 from contextlib import redirect_stderr
 
@@ -11,7 +10,14 @@ from contextlib import redirect_stderr
 
 sys.path.append(os.getcwd())
 
-from CodingAgent.inspector.context_manager import FileContentReader
+from CodingAgent.inspector.context_manager import (
+    AsyncFileContentReader,
+    FileContentReader,
+)
+from CodingAgent.inspector.blob_store import collect_garbage
+from CodingAgent.inspector.context_assembler import DEFAULT_TOKEN_BUDGET, make_context_builder
+from CodingAgent.inspector.storage import STORAGE_BACKENDS
+from CodingAgent.inspector.tokens import TOKENIZER_MODES, TokenCounter
 from CodingAgent.config import load_config
 from CodingAgent.utils.log import setup_logging_config
 from CodingAgent.utils.greetings import welcome, goodbye
@@ -42,35 +48,99 @@ def parsing_arguments():
         default=False,
         help="Whether enhancing debug mode for getting information",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used for parsing the project.",
+    )
+    parser.add_argument(
+        "--storage",
+        type=str,
+        default="json",
+        choices=sorted(STORAGE_BACKENDS),
+        help="Storage backend for the parsed environment.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        default=False,
+        help="Whether re-indexing changed files in the background during the chat",
+    )
+    parser.add_argument(
+        "--context_tokens",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help="Token budget for the project context given to the model.",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        type=str,
+        default="approximate",
+        choices=TOKENIZER_MODES,
+        help="How tokens are counted; 'exact' requires the tiktoken package.",
+    )
+    parser.add_argument(
+        "--gc",
+        action="store_true",
+        default=False,
+        help="Remove parse results no indexed file refers to any more, then exit.",
+    )
     args = parser.parse_args()
     return vars(args)
 
 
-def get_project_context(project_path: str) -> str:
+def create_reader(
+    project_path: str,
+    workers: int = 1,
+    storage: str = "json",
+    asynchronous: bool = False,
+    tokenizer: str = "approximate",
+) -> FileContentReader:
     """
-    Reads project files and returns their content as a single string.
+    Creates the file reader indexing the project with the default settings.
 
     Args:
         project_path: The root path of the project.
+        workers: Number of worker processes used for parsing.
+        storage: Storage backend for the parsed environment.
+        asynchronous: Whether to create an AsyncFileContentReader, for use
+            with `async with` inside the event loop.
+        tokenizer: Token counting mode, see CodingAgent.inspector.tokens.
 
     Returns:
-        str: A formatted string containing the content of all relevant files.
+        FileContentReader: The reader, not entered yet.
     """
-    system_message = "You are good at coding."
-    with FileContentReader(
+    reader_class = AsyncFileContentReader if asynchronous else FileContentReader
+    return reader_class(
         file_path=project_path,
         # todo initialize a small LLM to automatically change this
         # this is just for the default settings
         include_list=["*.py"],
-        exclude_list=[".venv/*.*", "*/log/*", "*/build/*", "dist/*"],
-    ) as context_manager:
-        contents: List[Tuple[str, str]] = context_manager._contents
-
-    for path, content in contents:
-        system_message += (
-            f"\n\nFile: {path}\n\n=====BEGIN=====\n{content}\n=====END=====\n"
-        )
-    return str(system_message), contents
+        # "dir/*" patterns prune the whole directory from the walk
+        exclude_list=[
+            ".git/*",
+            ".venv/*",
+            "*/.venv/*",
+            "node_modules/*",
+            "*/node_modules/*",
+            "*/__pycache__/*",
+            "*/log/*",
+            "build/*",
+            "*/build/*",
+            "dist/*",
+            ".environment/*",
+        ],
+        incremental=True,
+        workers=workers,
+        storage=storage,
+        symbol_index=True,
+        import_graph=True,
+        gitignore=True,
+        # keeps generated files and data dumps from flooding the system message
+        max_total_size=32 << 20,
+        token_counter=TokenCounter(tokenizer),
+    )
 
 
 async def main_():
@@ -82,28 +152,51 @@ async def main_():
     # section1: parse args
     # todo remove argparse, we recommend you to run this file in current working directory
     args_dict = parsing_arguments()
+    if args_dict["gc"]:
+        removed, freed = collect_garbage(os.path.join(os.getcwd(), ".environment"))
+        print(f"INFO: Removed {removed} unreferenced blob(s), {freed} bytes freed.")
+        return
     console.print(f"[purple]{welcome()}[/purple]")
 
     # section2: data preprocessing for environment setup
     console.print("[purple]Loading environments for ProbeCode...[/purple]")
-    project_context = get_project_context(args_dict["project_path"],)
+    reader = create_reader(
+        args_dict["project_path"],
+        workers=args_dict["workers"],
+        storage=args_dict["storage"],
+        asynchronous=True,
+        tokenizer=args_dict["tokenizer"],
+    )
+
+    async with reader:
+        # the context is assembled per query, ranked against the user's question
+        project_context = make_context_builder(
+            reader, args_dict["context_tokens"], preamble="You are a helpful assistant."
+        )
+
+        # section3: initializing MCP chatbot
+        console.print("[purple]ProbeCode Agent is coming...[/purple]")
 
-    # section3: initializing MCP chatbot
-    console.print("[purple]ProbeCode Agent is coming...[/purple]")
+        # keeps the environment index current while files change during the chat
+        watcher = reader.watch() if args_dict["watch"] else None
 
-    if not args_dict["debug"]:
         try:
-            with open(os.devnull, "w") as dev_null_file:
-                with redirect_stderr(dev_null_file):
-                    chatbox = ProbeCodeAgent()
-                    chatbox.chat_loop()
-
-        except Exception as e:
-            print(f"Error: {e}")
-    else:
-        print("Debugging mode")
-        chatbox = ProbeCodeAgent()
-        chatbox.chat_loop()
+            if not args_dict["debug"]:
+                try:
+                    with open(os.devnull, "w") as dev_null_file:
+                        with redirect_stderr(dev_null_file):
+                            chatbox = ProbeCodeAgent(project_context=project_context)
+                            chatbox.chat_loop()
+
+                except Exception as e:
+                    print(f"Error: {e}")
+            else:
+                print("Debugging mode")
+                chatbox = ProbeCodeAgent(project_context=project_context)
+                chatbox.chat_loop()
+        finally:
+            if watcher is not None:
+                watcher.stop()
 
     # section4: ending chat
     console.print(f"[purple]{goodbye()}[/purple]")
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Python File Outline Parser
+Extracts only the names, signatures, docstrings and line ranges of top-level
+classes and functions, class methods and top-level imports. Files are scanned
+line by line in a single pass instead of being parsed into a full AST, so time
+is linear in the file size and memory stays flat, which suits huge generated
+modules such as protobuf stubs or vendored tables.
+"""
+
+import ast
+import io
+import os
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+sys.path.append(os.getcwd())
+
+from CodingAgent.pyparser.parser import PythonStructureParser
+
+# Files at least this large are parsed in outline mode by the inspector
+OUTLINE_THRESHOLD = 1 << 20
+
+# Characters that can change the string or bracket state of a line
+_SPECIAL = re.compile(r'[#\'"()\[\]{}\\]')
+_DEFINITION = re.compile(r'(class|def)[ \t]+\w')
+_IMPORT = re.compile(r'(import|from)\b')
+_STRING_START = re.compile(r'[rRbBuUfF]{0,2}[\'"]')
+
+
+class PythonOutlineParser(PythonStructureParser):
+    """
+    Scans Python files for an outline of their classes, functions and
+    imports without parsing whole files.
+
+    Results have the regular shape without 'source_code' on classes and
+    functions, and carry 'outline': True. Only def and class headers (plus
+    their docstring) are parsed with ast, so names, arguments, annotations
+    and docstrings come out exactly as with PythonStructureParser. Other
+    top-level statements are left out.
+    """
+
+    def __init__(self, file_path: str, source: Optional[Union[str, bytes]] = None):
+        """
+        Initializes the parser with a file path.
+
+        Args:
+            file_path (str): Path to the Python file to parse.
+            source (Optional[Union[str, bytes]]): Already loaded content of the
+                file. If not given, the file is streamed from disk line by line.
+        """
+        super().__init__(file_path, source=source)
+        self._quote = None
+        self._depth = 0
+        self._continued = False
+        self._blocks = []
+        self._pending = None
+        self._class_indent = None
+        self._last_line = 0
+        self._line_offset = 0
+
+    def parse_file(self) -> bool:
+        """
+        Scans the Python file and collects its outline.
+
+        Returns:
+            bool: True if scanning was successful, False otherwise.
+        """
+        try:
+            if self.source is None:
+                with open(self.file_path, 'rb') as file:
+                    self._scan(file)
+            elif isinstance(self.source, bytes):
+                self._scan(io.BytesIO(self.source))
+            else:
+                self._scan(io.StringIO(self.source))
+            return True
+        except FileNotFoundError:
+            print(f"Error: File '{self.file_path}' not found")
+            return False
+        except UnicodeDecodeError as e:
+            print(f"Error: File '{self.file_path}' is not valid UTF-8: {e}")
+            return False
+        except SyntaxError as e:
+            print(f"Error: Syntax error in file '{self.file_path}': {e}")
+            return False
+
+    def extract_classes_and_functions(self) -> None:
+        """
+        Does nothing, the outline is collected while scanning in parse_file().
+        """
+        pass
+
+    def _scan(self, lines: Iterable[Union[str, bytes]]) -> None:
+        """
+        Walks the lines of a file, grouping them into logical lines.
+
+        Args:
+            lines (Iterable[Union[str, bytes]]): The physical lines of the file.
+        """
+        statement = []
+        start = 0
+        for number, line in enumerate(lines, 1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            line = line.rstrip('\r\n')
+            if not statement:
+                stripped = line.lstrip(' \t\f')
+                if not stripped or stripped[0] == '#':
+                    continue
+                start = number
+            statement.append(line)
+            self._scan_line(line)
+            if self._quote is None and self._depth == 0 and not self._continued:
+                self._statement(statement, start, number)
+                statement = []
+        if statement:
+            self._statement(statement, start, start + len(statement) - 1)
+        self._close_blocks(-1)
+
+    def _scan_line(self, line: str) -> None:
+        """
+        Updates the string, bracket and continuation state after a line.
+
+        Args:
+            line (str): A physical line without its line ending.
+        """
+        self._continued = False
+        pos = 0
+        if self._quote is not None:
+            pos = self._string_end(line, 0, self._quote)
+            if pos < 0:
+                return
+            self._quote = None
+        while True:
+            match = _SPECIAL.search(line, pos)
+            if match is None:
+                return
+            char = match.group()
+            pos = match.end()
+            if char == '#':
+                return
+            if char in '([{':
+                self._depth += 1
+            elif char in ')]}':
+                self._depth = max(self._depth - 1, 0)
+            elif char == '\\':
+                if pos == len(line):
+                    self._continued = True
+                pos += 1
+            else:
+                quote = line[match.start():match.start() + 3]
+                if quote != char * 3:
+                    quote = char
+                pos = self._string_end(line, match.start() + len(quote), quote)
+                if pos < 0:
+                    # single-quoted strings only continue after a backslash
+                    if len(quote) == 3 or line.endswith('\\'):
+                        self._quote = quote
+                    return
+
+    @staticmethod
+    def _string_end(line: str, pos: int, quote: str) -> int:
+        """
+        Finds the end of a string literal on a line.
+
+        Args:
+            line (str): A physical line.
+            pos (int): Position after the opening quote.
+            quote (str): The quote the string started with.
+
+        Returns:
+            int: Position after the closing quote, or -1 if the string
+                 continues on the next line.
+        """
+        while True:
+            end = line.find(quote, pos)
+            if end < 0:
+                return -1
+            backslashes = 0
+            while end - backslashes > pos and line[end - backslashes - 1] == '\\':
+                backslashes += 1
+            if backslashes % 2 == 0:
+                return end + len(quote)
+            pos = end + 1
+
+    def _statement(self, lines: List[str], start: int, end: int) -> None:
+        """
+        Handles a complete logical line.
+
+        Args:
+            lines (List[str]): Physical lines of the statement.
+            start (int): One-based number of the first line.
+            end (int): One-based number of the last line.
+        """
+        first = lines[0]
+        stripped = first.lstrip(' \t\f')
+        indent = len(first) - len(stripped)
+        if self._pending is not None:
+            pending = self._pending
+            self._pending = None
+            is_docstring = indent > pending['indent'] and _STRING_START.match(stripped)
+            self._define(pending, lines if is_docstring else None)
+        self._close_blocks(indent)
+        self._last_line = end
+        if indent == 0:
+            self._class_indent = None
+        elif self._class_indent is None and self._blocks and self._blocks[-1]['kind'] == 'class':
+            # the first statement of a class body sets the method indentation
+            self._class_indent = indent
+        if _DEFINITION.match(stripped):
+            kind = stripped.split(None, 1)[0]
+            if indent == 0 or (kind == 'def' and indent == self._class_indent):
+                self._pending = {'kind': kind, 'indent': indent, 'lines': lines, 'start': start}
+        elif indent == 0 and _IMPORT.match(stripped):
+            self.top_level_code.append({
+                'type': 'Import' if stripped.startswith('import') else 'ImportFrom',
+                'line_start': start,
+                'line_end': end,
+                'source_code': '\n'.join(lines),
+            })
+
+    def _define(self, pending: Dict[str, Any], docstring_lines: Optional[List[str]]) -> None:
+        """
+        Parses the header of a class or function, with its docstring if any.
+
+        Args:
+            pending (Dict[str, Any]): The collected definition header.
+            docstring_lines (Optional[List[str]]): Lines of the first statement
+                of the body if it may be a docstring.
+        """
+        header = list(pending['lines'])
+        header[0] = header[0][pending['indent']:]
+        snippet = header + (docstring_lines or [' ' * (pending['indent'] + 1) + 'pass'])
+        try:
+            tree = ast.parse('\n'.join(snippet))
+        except SyntaxError:
+            # one-line bodies such as "def f(): return 1" take no extra statement
+            tree = ast.parse('\n'.join(header))
+        node = tree.body[0]
+        self.source_lines = snippet
+        # a lone carriage return would be a line break to ast but not to the scanner
+        self.lines_match_ast = not any('\r' in line for line in snippet)
+        self._line_offset = pending['start'] - 1
+        if pending['kind'] == 'class':
+            info = self._extract_class_info(node)
+            self.classes.append(info)
+        else:
+            info = self._extract_function_info(node)
+            if pending['indent'] == 0:
+                self.functions.append(info)
+            elif self._blocks and self._blocks[-1]['kind'] == 'class':
+                self._blocks[-1]['info']['methods'].append(info)
+        self.source_lines = []
+        self._blocks.append({'kind': pending['kind'], 'indent': pending['indent'], 'info': info})
+
+    def _close_blocks(self, indent: int) -> None:
+        """
+        Ends the classes and functions that a statement at the given
+        indentation is no longer part of.
+
+        Args:
+            indent (int): Indentation of the new statement, -1 at the end of file.
+        """
+        if indent < 0 and self._pending is not None:
+            pending = self._pending
+            self._pending = None
+            self._define(pending, None)
+        while self._blocks and self._blocks[-1]['indent'] >= indent:
+            self._blocks.pop()['info']['line_end'] = self._last_line
+
+    def _with_source(self, info: Dict[str, Any], node: ast.AST, check_docstring: bool = True, docstring_node: Optional[ast.AST] = None) -> Dict[str, Any]:
+        """
+        Moves the line numbers of a header snippet to the file and leaves the
+        source code out.
+
+        Args:
+            info (Dict[str, Any]): Information dictionary of the node.
+            node (ast.AST): The AST node the information belongs to.
+            check_docstring (bool): Unused, kept for the parent signature.
+            docstring_node (Optional[ast.AST]): Unused, kept for the parent signature.
+
+        Returns:
+            Dict[str, Any]: The information dictionary.
+        """
+        info['line_start'] += self._line_offset
+        info['line_end'] += self._line_offset
+        return info
+
+    def get_results(self) -> Dict[str, Any]:
+        """
+        Gets the outline as a structured dictionary.
+
+        Returns:
+            Dict[str, Any]: Dictionary containing classes, functions and
+                            top-level imports, marked with 'outline': True.
+        """
+        results = super().get_results()
+        results['outline'] = True
+        return results
+
+
+def parse_python_outline(file_path: str, source: Optional[Union[str, bytes]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Scans a Python file and returns the outline of its classes, functions
+    and top-level imports.
+
+    Args:
+        file_path (str): Path to the Python file to parse.
+        source (Optional[Union[str, bytes]]): Already loaded content of the
+            file, to avoid reading it again.
+
+    Returns:
+        Optional[Dict[str, Any]]: Dictionary with the outline or None if
+                                   scanning failed.
+    """
+    parser = PythonOutlineParser(file_path, source=source)
+    if parser.parse_file():
+        return parser.get_results()
+    return None
+
+
+def CLI():
+    """Main function for command-line usage."""
+    if len(sys.argv) != 2:
+        print("Usage: python outline.py <input_file.py>")
+        sys.exit(1)
+
+    parser = PythonOutlineParser(sys.argv[1])
+    if parser.parse_file():
+        parser.print_results()
+
+
+if __name__ == "__main__":
+    CLI()
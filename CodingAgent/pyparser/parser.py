@@ -8,9 +8,184 @@ Supports both programmatic access and console output.
 """
 
 import ast
+import keyword
+import mmap
 import os
+import re
 import sys
-from typing import List, Dict, Any, Optional
+from array import array
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+try:
+    from CodingAgent.pyparser.records import ModuleRecord, make_record
+except ImportError:
+    # run as a script from this directory
+    from records import ModuleRecord, make_record
+
+# Files at least this large are read through a memory map
+MMAP_THRESHOLD = 1 << 20
+
+# Expressions whose source text is exactly what ast.unparse would produce:
+# dotted names, integers, '...', plain single-quoted strings and empty
+# literals, combined by subscripts, ', ' and ' | ' without extra whitespace
+_KEYWORDS = '|'.join(k for k in keyword.kwlist if k not in ('False', 'None', 'True'))
+_ATOM = rf"(?:(?!(?:{_KEYWORDS})\b|(?:False|None|True)\.)[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*|-?(?:0|[1-9][0-9]*)|\.\.\.|'[ -&(-\[\]-~]*'|\[\]|\{{\}}|\(\))"
+_CANONICAL_EXPRESSION = re.compile(rf"\[*{_ATOM}(?:(?:\[|, | \| )\[*{_ATOM}|\])*", re.ASCII)
+
+# Characters str.splitlines() breaks on but the Python tokenizer does not
+_EXTRA_LINE_BREAKS = re.compile('[\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+def load_source(file_path: str, mmap_threshold: int = MMAP_THRESHOLD) -> Tuple[bytes, os.stat_result]:
+    """
+    Reads the raw bytes of a file in a single pass, using a memory map for
+    large files.
+    
+    Args:
+        file_path (str): Path to the file to read.
+        mmap_threshold (int): Size in bytes from which the file is memory mapped.
+        
+    Returns:
+        Tuple[bytes, os.stat_result]: The file content and the stat result
+                                      taken from the same open handle.
+    """
+    with open(file_path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        if stat.st_size and stat.st_size >= mmap_threshold:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[:], stat
+        return file.read(), stat
+
+
+class SourceBlob:
+    """
+    Holds the source text of a file once and materializes line ranges of it,
+    so parse results can reference code by span instead of copying it.
+    """
+    __slots__ = ('source', '_line_starts', '_byte_starts')
+
+    def __init__(self, source: str):
+        """
+        Initializes the blob with the decoded source text of a file.
+        
+        Args:
+            source (str): Source text of the file.
+        """
+        self.source = source
+        self._line_starts = None
+        self._byte_starts = None
+
+    def _compute_offsets(self) -> None:
+        """
+        Computes character and UTF-8 byte offsets of every line start, using
+        the same line splitting as the parser.
+        """
+        line_starts = array('q', [0])
+        is_ascii = self.source.isascii()
+        byte_starts = line_starts if is_ascii else array('q', [0])
+        for line in self.source.splitlines(keepends=True):
+            line_starts.append(line_starts[-1] + len(line))
+            if not is_ascii:
+                byte_starts.append(byte_starts[-1] + len(line.encode('utf-8')))
+        self._line_starts = line_starts
+        self._byte_starts = byte_starts
+
+    def release(self) -> None:
+        """
+        Drops the offset tables; they are rebuilt on the next access.
+        """
+        self._line_starts = None
+        self._byte_starts = None
+
+    def byte_offset(self, line: int) -> int:
+        """
+        Gets the UTF-8 byte offset at which a line starts.
+        
+        Args:
+            line (int): Zero-based line index, may be the number of lines.
+            
+        Returns:
+            int: Byte offset in the encoded source.
+        """
+        if self._byte_starts is None:
+            self._compute_offsets()
+        return self._byte_starts[min(line, len(self._byte_starts) - 1)]
+
+    def text(self, start: int, end: int, skip: Optional[List[int]] = None) -> str:
+        """
+        Materializes the source code of a range of lines.
+        
+        Args:
+            start (int): Zero-based index of the first line.
+            end (int): Zero-based index after the last line.
+            skip (Optional[List[int]]): Half-open range of lines to leave out.
+            
+        Returns:
+            str: The lines joined with newlines.
+        """
+        if skip:
+            return '\n'.join(self._lines(start, skip[0]) + self._lines(skip[1], end))
+        return '\n'.join(self._lines(start, end))
+
+    def line(self, index: int) -> str:
+        """
+        Gets a single line without its line ending.
+        
+        Args:
+            index (int): Zero-based line index.
+            
+        Returns:
+            str: The line.
+        """
+        lines = self._lines(index, index + 1)
+        return lines[0] if lines else ''
+
+    def _lines(self, start: int, end: int) -> List[str]:
+        """
+        Gets a range of lines without line endings.
+        """
+        if self._line_starts is None:
+            self._compute_offsets()
+        last = len(self._line_starts) - 1
+        return self.source[self._line_starts[min(start, last)]:self._line_starts[min(end, last)]].splitlines()
+
+
+class SourceRecord(dict):
+    """
+    A parse result entry in compact form. Instead of 'source_code' it stores
+    'source_span' as [first line, end line, first byte, end byte] (zero-based,
+    half-open) plus an optional 'source_skip' line range holding the docstring,
+    and materializes the source code from the file blob only when accessed.
+    """
+    __slots__ = ('_blob',)
+
+    def __init__(self, blob: SourceBlob, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._blob = blob
+
+    def __missing__(self, key):
+        if key == 'source_code':
+            return _span_text(self._blob, self)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key == 'source_code' and key not in self:
+            return self[key]
+        return super().get(key, default)
+
+    def __reduce__(self):
+        return (_make_source_record, (self._blob, dict(self)))
+
+
+def _span_text(blob: SourceBlob, entry: Dict[str, Any]) -> str:
+    """Materializes the source code of a compact entry."""
+    span = entry['source_span']
+    return blob.text(span[0], span[1], entry.get('source_skip'))
+
+
+def _make_source_record(blob: SourceBlob, data: Dict[str, Any]) -> SourceRecord:
+    """Rebuilds a SourceRecord when unpickling."""
+    return SourceRecord(blob, data)
 
 
 class PythonStructureParser:
@@ -19,16 +194,27 @@ class PythonStructureParser:
     along with top-level statements.
     """
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, source: Optional[Union[str, bytes]] = None, compact: bool = False, records: bool = False):
         """
         Initializes the parser with a file path.
         
         Args:
             file_path (str): Path to the Python file to parse.
+            source (Optional[Union[str, bytes]]): Already loaded content of the
+                file. If given, the file is not read again.
+            compact (bool): If True, entries reference the file source by line
+                and byte spans instead of storing their own 'source_code'.
+            records (bool): If True, results are built from the __slots__
+                record types of records.py instead of dictionaries.
         """
         self.file_path = os.path.abspath(file_path) if not os.path.isabs(file_path) else file_path
+        self.source = source
+        self.compact = compact
+        self.records = records
+        self.blob = None
         self.tree = None
         self.source_lines = []
+        self.lines_match_ast = False
         self.classes = []
         self.functions = []
         self.top_level_code = []
@@ -41,15 +227,26 @@ class PythonStructureParser:
             bool: True if parsing was successful, False otherwise.
         """
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as file:
-                source_code = file.read()
+            source_code = self.source
+            if source_code is None:
+                source_code, _ = load_source(self.file_path)
+            if isinstance(source_code, bytes):
+                source_code = source_code.decode('utf-8')
+            if self.compact or self.records:
+                self.blob = SourceBlob(source_code)
+            else:
                 self.source_lines = source_code.splitlines()
-                # Use ast to parse the file
-                self.tree = ast.parse(source_code)
+            # otherwise line numbers of the AST do not index the split lines
+            self.lines_match_ast = _EXTRA_LINE_BREAKS.search(source_code) is None
+            # Use ast to parse the file
+            self.tree = ast.parse(source_code)
             return True
         except FileNotFoundError:
             print(f"Error: File '{self.file_path}' not found")
             return False
+        except UnicodeDecodeError as e:
+            print(f"Error: File '{self.file_path}' is not valid UTF-8: {e}")
+            return False
         except SyntaxError as e:
             print(f"Error: Syntax error in file '{self.file_path}': {e}")
             return False
@@ -71,14 +268,75 @@ class PythonStructureParser:
                 self.functions.append(func_info)
             else:
                 # This is a top-level statement (not a class or function)
-                code_info = {
+                code_info = self._with_source({
                     'type': type(node).__name__,
                     'line_start': node.lineno,
                     'line_end': node.end_lineno,
-                    'source_code': self._extract_source_code(node, check_docstring=False)
-                }
+                }, node, check_docstring=False)
                 self.top_level_code.append(code_info)
+        if self.blob is not None:
+            self.blob.release()
                     
+    @staticmethod
+    def _is_docstring_node(node: ast.AST) -> bool:
+        """
+        Checks whether a statement is a string expression, i.e. a docstring
+        candidate.
+        """
+        return isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
+
+    def _node_text(self, node: ast.expr) -> str:
+        """
+        Gets the source text of an expression as ast.unparse would render it.
+        
+        Simple single-line expressions are sliced directly out of the source
+        line by their column offsets; anything whose text might differ from
+        the unparsed form falls back to ast.unparse.
+        
+        Args:
+            node (ast.expr): The expression node, e.g. an annotation or default.
+            
+        Returns:
+            str: The expression source.
+        """
+        # a bare tuple is the one canonical-looking text unparse parenthesizes
+        if self.lines_match_ast and node.lineno == node.end_lineno and not isinstance(node, ast.Tuple):
+            index = node.lineno - 1
+            line = self.blob.line(index) if self.blob is not None else self.source_lines[index]
+            # column offsets count UTF-8 bytes, which equal characters only for ASCII
+            if line.isascii():
+                text = line[node.col_offset:node.end_col_offset]
+                if _CANONICAL_EXPRESSION.fullmatch(text):
+                    return text
+        return ast.unparse(node)
+
+    def _source_lines(self, node: ast.AST, check_docstring: bool = True, docstring_node: Optional[ast.AST] = None) -> Tuple[int, int, Optional[List[int]]]:
+        """
+        Computes the line range of the source code of a given AST node.
+        
+        Args:
+            node (ast.AST): The AST node to extract code for.
+            check_docstring (bool): If True, also returns the line range of the
+                                     docstring, which is left out of the code.
+            docstring_node (Optional[ast.AST]): The docstring statement if the
+                caller already found it while walking the body.
+        
+        Returns:
+            Tuple[int, int, Optional[List[int]]]: Zero-based, half-open start
+                and end line, and the docstring lines to skip if any.
+        """
+        start_line = node.lineno - 1
+        end_line = node.end_lineno
+        
+        # Remove the docstring from the source code to avoid duplication
+        if check_docstring:
+            if docstring_node is None:
+                docstring_node = next((n for n in node.body if self._is_docstring_node(n)), None)
+            if docstring_node:
+                return start_line, end_line, [docstring_node.lineno - 1, docstring_node.end_lineno]
+            
+        return start_line, end_line, None
+
     def _extract_source_code(self, node: ast.AST, check_docstring: bool = True) -> str:
         """
         Extracts the source code snippet for a given AST node.
@@ -94,22 +352,46 @@ class PythonStructureParser:
         if not hasattr(node, 'lineno') or not hasattr(node, 'end_lineno'):
             return ""
 
-        start_line = node.lineno - 1
-        end_line = node.end_lineno
+        start_line, end_line, skip = self._source_lines(node, check_docstring)
+        if self.blob is not None:
+            return self.blob.text(start_line, end_line, skip)
         lines = self.source_lines[start_line:end_line]
+        if skip:
+            # Create a new list of lines without the docstring
+            return '\n'.join(lines[:skip[0] - start_line] + lines[skip[1] - start_line:])
+        return '\n'.join(lines)
+
+    def _with_source(self, info: Dict[str, Any], node: ast.AST, check_docstring: bool = True, docstring_node: Optional[ast.AST] = None) -> Dict[str, Any]:
+        """
+        Attaches the source code of a node to its information dictionary,
+        either as a copy or, in compact mode, as a span into the file source.
         
-        # Remove the docstring from the source code to avoid duplication
-        if check_docstring:
-            docstring_node = next((n for n in node.body if isinstance(n, ast.Expr) and isinstance(n.value, ast.Constant) and isinstance(n.value.value, str)), None)
-            if docstring_node:
-                doc_start_line = docstring_node.lineno - 1
-                doc_end_line = docstring_node.end_lineno
+        Args:
+            info (Dict[str, Any]): Information dictionary of the node.
+            node (ast.AST): The AST node the information belongs to.
+            check_docstring (bool): If True, the docstring is left out of the
+                                     source code.
+            docstring_node (Optional[ast.AST]): The docstring statement if
+                already known.
+        
+        Returns:
+            Dict[str, Any]: The information dictionary including its source.
+        """
+        start_line, end_line, skip = self._source_lines(node, check_docstring, docstring_node)
+        if self.records:
+            return make_record(self.blob, info, skip)
+        if not self.compact:
+            lines = self.source_lines[start_line:end_line]
+            if skip:
                 # Create a new list of lines without the docstring
-                lines_without_doc = lines[:doc_start_line - start_line] + lines[doc_end_line - start_line:]
-                return '\n'.join(lines_without_doc)
-            
-        return '\n'.join(lines)
-            
+                lines = lines[:skip[0] - start_line] + lines[skip[1] - start_line:]
+            info['source_code'] = '\n'.join(lines)
+            return info
+        info['source_span'] = [start_line, end_line, self.blob.byte_offset(start_line), self.blob.byte_offset(end_line)]
+        if skip:
+            info['source_skip'] = skip
+        return SourceRecord(self.blob, info)
+
     def _extract_class_info(self, node: ast.ClassDef) -> Dict[str, Any]:
         """
         Extracts information about a class.
@@ -121,21 +403,23 @@ class PythonStructureParser:
             Dict[str, Any]: Dictionary containing class information.
         """
         methods = []
+        docstring_node = None
         for item in node.body:
             if isinstance(item, ast.FunctionDef):
                 methods.append(self._extract_function_info(item))
+            elif docstring_node is None and self._is_docstring_node(item):
+                docstring_node = item
                 
         docstring = ast.get_docstring(node)
                 
-        return {
+        return self._with_source({
             'name': node.name,
             'line_start': node.lineno,
             'line_end': node.end_lineno,
             'methods': methods,
-            'bases': [ast.unparse(base) for base in node.bases],
+            'bases': [self._node_text(base) for base in node.bases],
             'docstring': docstring,
-            'source_code': self._extract_source_code(node)
-        }
+        }, node, docstring_node=docstring_node)
         
     def _extract_function_info(self, node: ast.FunctionDef) -> Dict[str, Any]:
         """
@@ -156,13 +440,13 @@ class PythonStructureParser:
         for i, arg in enumerate(node.args.args):
             arg_info = {
                 'name': arg.arg,
-                'annotation': ast.unparse(arg.annotation) if arg.annotation else None
+                'annotation': self._node_text(arg.annotation) if arg.annotation else None
             }
             
             # Add default value information
             if i >= args_count - num_defaults:
                 default_index = i - (args_count - num_defaults)
-                arg_info['default'] = ast.unparse(defaults[default_index])
+                arg_info['default'] = self._node_text(defaults[default_index])
             else:
                 arg_info['default'] = None
                 
@@ -170,30 +454,41 @@ class PythonStructureParser:
             
         docstring = ast.get_docstring(node)
             
-        return {
+        return self._with_source({
             'name': node.name,
             'line_start': node.lineno,
             'line_end': node.end_lineno,
             'args': args,
-            'returns': ast.unparse(node.returns) if node.returns else None,
+            'returns': self._node_text(node.returns) if node.returns else None,
             'docstring': docstring,
-            'source_code': self._extract_source_code(node)
-        }
+        }, node)
         
     def get_results(self) -> Dict[str, Any]:
         """
         Gets the parsed results as a structured dictionary without printing.
         
+        In compact mode the file source is included once under 'source' and
+        entries carry a 'source_span' instead of a 'source_code' copy; use
+        expand_results() to get the regular shape.
+        
+        In records mode a ModuleRecord is returned instead; its to_dict()
+        gives either shape.
+        
         Returns:
             Dict[str, Any]: Dictionary containing parsed classes, functions,
                             and top-level code.
         """
-        return {
+        if self.records:
+            return ModuleRecord(self.blob, self.file_path, self.classes, self.functions, self.top_level_code)
+        results = {
             'file_path': self.file_path,
             'classes': self.classes,
             'functions': self.functions,
             'top_level_code': self.top_level_code
         }
+        if self.compact:
+            results['source'] = self.blob.source
+        return results
         
     def print_results(self) -> None:
         """
@@ -253,9 +548,12 @@ class PythonStructureParser:
         if func_info['returns']:
             print(f"{spaces}  Return type: {func_info['returns']}")
         
-        # Print the source code
+        # Print the source code, outline results have none
+        source_code = func_info.get('source_code')
+        if source_code is None:
+            return
         print(f"{spaces}  Source Code:\n{spaces}---")
-        for line in func_info['source_code'].splitlines():
+        for line in source_code.splitlines():
             print(f"{spaces}  {line}")
         print(f"{spaces}---")
 
@@ -277,19 +575,55 @@ class PythonStructureParser:
         print(f"{spaces}---")
 
 
-def parse_python_file(file_path: str) -> Optional[Dict[str, Any]]:
+def expand_results(results: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Converts compact parse results, either fresh from the parser or loaded
+    back from json, into the regular shape with a 'source_code' per entry.
+    
+    Args:
+        results (Optional[Dict[str, Any]]): Parse results in any shape.
+        
+    Returns:
+        Optional[Dict[str, Any]]: Parse results in the regular shape. Results
+                                   that are not compact are returned as is.
+    """
+    if not results or 'source' not in results:
+        return results
+    blob = SourceBlob(results['source'])
+
+    def expand(entry: Dict[str, Any]) -> Dict[str, Any]:
+        expanded = {key: value for key, value in entry.items() if key not in ('source_span', 'source_skip')}
+        expanded['source_code'] = _span_text(blob, entry)
+        if 'methods' in entry:
+            expanded['methods'] = [expand(method) for method in entry['methods']]
+        return expanded
+
+    return {
+        'file_path': results['file_path'],
+        'classes': [expand(cls) for cls in results['classes']],
+        'functions': [expand(func) for func in results['functions']],
+        'top_level_code': [expand(code) for code in results['top_level_code']]
+    }
+
+
+def parse_python_file(file_path: str, source: Optional[Union[str, bytes]] = None, compact: bool = False, records: bool = False) -> Optional[Union[Dict[str, Any], ModuleRecord]]:
     """
     Parses a Python file and returns structured information about its classes,
     functions, and top-level statements.
     
     Args:
         file_path (str): Path to the Python file to parse.
+        source (Optional[Union[str, bytes]]): Already loaded content of the
+            file, to avoid reading it again.
+        compact (bool): If True, returns the compact, span-based result format.
+        records (bool): If True, returns a memory-lean ModuleRecord, see
+            records.py; its to_dict() gives the dictionary result.
         
     Returns:
-        Optional[Dict[str, Any]]: Dictionary with parsed information or None
-                                   if parsing failed.
+        Optional[Union[Dict[str, Any], ModuleRecord]]: Dictionary (or record)
+            with parsed information or None if parsing failed.
     """
-    parser = PythonStructureParser(file_path)
+    parser = PythonStructureParser(file_path, source=source, compact=compact, records=records)
     if parser.parse_file():
         parser.extract_classes_and_functions()
         return parser.get_results()
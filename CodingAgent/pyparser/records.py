@@ -0,0 +1,296 @@
+"""
+Record Types for Parse Results
+Memory-lean alternatives to the nested dictionaries built by the parser.
+Every record declares __slots__, so instances carry no per-object dict, and
+all entries of a file share one source blob instead of holding their own
+copy of the source code. Use to_dict() to get the regular (or compact)
+result shape expected by the json consumers.
+"""
+
+import sys
+from typing import Any, Dict, List, Optional
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Interns short strings such as annotations, which repeat across files."""
+    return sys.intern(value) if value is not None and len(value) <= 64 else value
+
+
+class ArgRecord:
+    """
+    A positional argument of a function.
+    """
+    __slots__ = ('name', 'annotation', 'default')
+
+    def __init__(self, name: str, annotation: Optional[str] = None, default: Optional[str] = None):
+        """
+        Initializes the argument record.
+
+        Args:
+            name (str): Name of the argument.
+            annotation (Optional[str]): Annotation source, if any.
+            default (Optional[str]): Default value source, if any.
+        """
+        self.name = name
+        self.annotation = _intern(annotation)
+        self.default = _intern(default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converts the record into the regular result dictionary.
+
+        Returns:
+            Dict[str, Any]: Dictionary with name, annotation and default.
+        """
+        return {'name': self.name, 'annotation': self.annotation, 'default': self.default}
+
+
+class SpanRecord:
+    """
+    Base class of entries whose source code is a line range of the file.
+    The range is given by line_start and line_end; source_skip optionally
+    holds the zero-based, half-open line range of a docstring to leave out.
+    """
+    __slots__ = ('_blob', 'line_start', 'line_end', 'source_skip')
+
+    def __init__(self, blob, line_start: int, line_end: int, source_skip: Optional[List[int]] = None):
+        """
+        Initializes the span of the record.
+
+        Args:
+            blob (SourceBlob): Source of the file the entry belongs to.
+            line_start (int): One-based first line.
+            line_end (int): One-based last line.
+            source_skip (Optional[List[int]]): Docstring lines to leave out.
+        """
+        self._blob = blob
+        self.line_start = line_start
+        self.line_end = line_end
+        self.source_skip = tuple(source_skip) if source_skip else None
+
+    @property
+    def source_code(self) -> str:
+        """
+        str: Source code of the entry, materialized on access.
+        """
+        return self._blob.text(self.line_start - 1, self.line_end, self.source_skip)
+
+    def _base_dict(self, compact: bool) -> Dict[str, Any]:
+        """
+        Builds the dictionary entries shared by all span records.
+
+        Args:
+            compact (bool): If True, uses the compact 'source_span' form.
+
+        Returns:
+            Dict[str, Any]: Line range and source of the entry.
+        """
+        result = {'line_start': self.line_start, 'line_end': self.line_end}
+        if not compact:
+            result['source_code'] = self.source_code
+            return result
+        start, end = self.line_start - 1, self.line_end
+        result['source_span'] = [start, end, self._blob.byte_offset(start), self._blob.byte_offset(end)]
+        if self.source_skip:
+            result['source_skip'] = list(self.source_skip)
+        return result
+
+
+class StatementRecord(SpanRecord):
+    """
+    A top-level statement that is neither a class nor a function.
+    """
+    __slots__ = ('type',)
+
+    def __init__(self, blob, type: str, line_start: int, line_end: int, source_skip: Optional[List[int]] = None):
+        """
+        Initializes the statement record.
+
+        Args:
+            blob (SourceBlob): Source of the file.
+            type (str): AST node type of the statement, e.g. 'Import'.
+            line_start (int): One-based first line.
+            line_end (int): One-based last line.
+            source_skip (Optional[List[int]]): Unused for statements.
+        """
+        super().__init__(blob, line_start, line_end, source_skip)
+        self.type = sys.intern(type)
+
+    def to_dict(self, compact: bool = False) -> Dict[str, Any]:
+        """
+        Converts the record into a result dictionary.
+
+        Args:
+            compact (bool): If True, returns the compact, span-based shape.
+
+        Returns:
+            Dict[str, Any]: Dictionary of the statement.
+        """
+        result = self._base_dict(compact)
+        result['type'] = self.type
+        return result
+
+
+class FunctionRecord(SpanRecord):
+    """
+    A function or method.
+    """
+    __slots__ = ('name', 'args', 'returns', 'docstring')
+
+    def __init__(self, blob, name: str, line_start: int, line_end: int, args: List[Dict[str, Any]],
+                 returns: Optional[str] = None, docstring: Optional[str] = None,
+                 source_skip: Optional[List[int]] = None):
+        """
+        Initializes the function record.
+
+        Args:
+            blob (SourceBlob): Source of the file.
+            name (str): Name of the function.
+            line_start (int): One-based first line.
+            line_end (int): One-based last line.
+            args (List[Dict[str, Any]]): Argument dictionaries as built by the parser.
+            returns (Optional[str]): Return annotation source, if any.
+            docstring (Optional[str]): Cleaned docstring, if any.
+            source_skip (Optional[List[int]]): Docstring lines to leave out.
+        """
+        super().__init__(blob, line_start, line_end, source_skip)
+        self.name = name
+        self.args = tuple(ArgRecord(**arg) for arg in args)
+        self.returns = _intern(returns)
+        self.docstring = docstring
+
+    def to_dict(self, compact: bool = False) -> Dict[str, Any]:
+        """
+        Converts the record into a result dictionary.
+
+        Args:
+            compact (bool): If True, returns the compact, span-based shape.
+
+        Returns:
+            Dict[str, Any]: Dictionary of the function.
+        """
+        result = self._base_dict(compact)
+        result['name'] = self.name
+        result['args'] = [arg.to_dict() for arg in self.args]
+        result['returns'] = self.returns
+        result['docstring'] = self.docstring
+        return result
+
+
+class ClassRecord(SpanRecord):
+    """
+    A class with its methods.
+    """
+    __slots__ = ('name', 'methods', 'bases', 'docstring')
+
+    def __init__(self, blob, name: str, line_start: int, line_end: int, methods: List[FunctionRecord],
+                 bases: List[str], docstring: Optional[str] = None,
+                 source_skip: Optional[List[int]] = None):
+        """
+        Initializes the class record.
+
+        Args:
+            blob (SourceBlob): Source of the file.
+            name (str): Name of the class.
+            line_start (int): One-based first line.
+            line_end (int): One-based last line.
+            methods (List[FunctionRecord]): Records of the methods.
+            bases (List[str]): Sources of the base class expressions.
+            docstring (Optional[str]): Cleaned docstring, if any.
+            source_skip (Optional[List[int]]): Docstring lines to leave out.
+        """
+        super().__init__(blob, line_start, line_end, source_skip)
+        self.name = name
+        self.methods = tuple(methods)
+        self.bases = tuple(_intern(base) for base in bases)
+        self.docstring = docstring
+
+    def to_dict(self, compact: bool = False) -> Dict[str, Any]:
+        """
+        Converts the record into a result dictionary.
+
+        Args:
+            compact (bool): If True, returns the compact, span-based shape.
+
+        Returns:
+            Dict[str, Any]: Dictionary of the class including its methods.
+        """
+        result = self._base_dict(compact)
+        result['name'] = self.name
+        result['methods'] = [method.to_dict(compact) for method in self.methods]
+        result['bases'] = list(self.bases)
+        result['docstring'] = self.docstring
+        return result
+
+
+class ModuleRecord:
+    """
+    The parse result of a whole file.
+    """
+    __slots__ = ('file_path', 'classes', 'functions', 'top_level_code', '_blob')
+
+    def __init__(self, blob, file_path: str, classes: List[ClassRecord], functions: List[FunctionRecord],
+                 top_level_code: List[StatementRecord]):
+        """
+        Initializes the module record.
+
+        Args:
+            blob (SourceBlob): Source of the file.
+            file_path (str): Absolute path of the file.
+            classes (List[ClassRecord]): Records of the top-level classes.
+            functions (List[FunctionRecord]): Records of the top-level functions.
+            top_level_code (List[StatementRecord]): Records of the other statements.
+        """
+        self._blob = blob
+        self.file_path = file_path
+        self.classes = tuple(classes)
+        self.functions = tuple(functions)
+        self.top_level_code = tuple(top_level_code)
+
+    @property
+    def source(self) -> str:
+        """
+        str: Source text of the file.
+        """
+        return self._blob.source
+
+    def to_dict(self, compact: bool = False) -> Dict[str, Any]:
+        """
+        Converts the record into the result dictionary of parse_python_file().
+
+        Args:
+            compact (bool): If True, returns the compact shape including the
+                            file source under 'source'.
+
+        Returns:
+            Dict[str, Any]: Dictionary containing parsed classes, functions,
+                            and top-level code.
+        """
+        result = {
+            'file_path': self.file_path,
+            'classes': [cls.to_dict(compact) for cls in self.classes],
+            'functions': [func.to_dict(compact) for func in self.functions],
+            'top_level_code': [code.to_dict(compact) for code in self.top_level_code],
+        }
+        if compact:
+            result['source'] = self._blob.source
+        return result
+
+
+def make_record(blob, info: Dict[str, Any], source_skip: Optional[List[int]] = None) -> SpanRecord:
+    """
+    Builds the record for an entry dictionary of the parser.
+
+    Args:
+        blob (SourceBlob): Source of the file.
+        info (Dict[str, Any]): Entry dictionary without source information.
+        source_skip (Optional[List[int]]): Docstring lines to leave out.
+
+    Returns:
+        SpanRecord: A ClassRecord, FunctionRecord or StatementRecord.
+    """
+    if 'methods' in info:
+        return ClassRecord(blob, source_skip=source_skip, **info)
+    if 'args' in info:
+        return FunctionRecord(blob, source_skip=source_skip, **info)
+    return StatementRecord(blob, source_skip=source_skip, **info)
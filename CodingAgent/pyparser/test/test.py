@@ -8,7 +8,8 @@ import json
 
 sys.path.append(os.getcwd())
 
-from CodingAgent.pyparser.parser import parse_python_file
+from CodingAgent.pyparser.parser import parse_python_file, expand_results
+from CodingAgent.pyparser.outline import parse_python_outline
 
 def simple_test():
     results = parse_python_file("./CodingAgent/pyparser/example/simple.py")
@@ -47,9 +48,42 @@ def example_test():
             print(f"  Docstring: {func['docstring']}")
 
 
+def compact_test():
+    # the compact format must expand back to exactly the regular results
+    for name in ["simple", "empty", "example"]:
+        file_path = f"./CodingAgent/pyparser/example/{name}.py"
+        results = parse_python_file(file_path)
+        compact = parse_python_file(file_path, compact=True)
+        assert expand_results(json.loads(json.dumps(compact))) == results
+        for func in compact["functions"]:
+            assert func["source_code"] == func.get("source_code")
+
+
+def outline_test():
+    # the outline must agree with the full parser apart from source code
+    def strip(entry):
+        entry = {key: value for key, value in entry.items() if key != "source_code"}
+        if "methods" in entry:
+            entry["methods"] = [strip(method) for method in entry["methods"]]
+        return entry
+
+    for name in ["simple", "empty", "example"]:
+        file_path = f"./CodingAgent/pyparser/example/{name}.py"
+        results = parse_python_file(file_path)
+        outline = parse_python_outline(file_path)
+        assert outline["outline"]
+        assert outline["classes"] == [strip(cls) for cls in results["classes"]]
+        assert outline["functions"] == [strip(func) for func in results["functions"]]
+        imports = [code for code in results["top_level_code"] if code["type"] in ("Import", "ImportFrom")]
+        assert outline["top_level_code"] == imports
+
+
 def another_test():
-    file_path = "/home/xiyuanyang/anaconda3/lib/python3.12/site-packages/camel/agents/chat_agent.py"
-    # switch to yours for testing
+    # set PROBECODE_TEST_FILE to any Python file on your machine for testing
+    file_path = os.environ.get("PROBECODE_TEST_FILE")
+    if not file_path:
+        print("Skipping another_test: PROBECODE_TEST_FILE is not set")
+        return
     result = parse_python_file(file_path)
 
     with open("./CodingAgent/pyparser/example/another_result.json", "w") as file:
@@ -60,4 +94,6 @@ if __name__ == "__main__":
     simple_test()
     empty_test()
     example_test()
+    compact_test()
+    outline_test()
     another_test()
@@ -0,0 +1,104 @@
+"""
+Micro-benchmark of include/exclude filtering.
+
+Filters a synthetic list of file paths with a set of include and exclude
+patterns, once the way FileContentReader used to (every pattern against
+every file, with os.path.relpath and fnmatch.fnmatch per call) and once with
+the compiled PathMatcher in a single pass, and checks both agree.
+
+Usage:
+    python benchmarks/matcher_benchmark.py [--files N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import random
+import fnmatch
+import argparse
+
+sys.path.append(os.getcwd())
+
+from CodingAgent.inspector.matcher import PathMatcher
+
+ROOT = os.path.join(os.sep, "project")
+INCLUDE = ["*.py", "*.pyi", "*.md", "*.toml", "*.cfg", "Makefile", "*/requirements*.txt"]
+EXCLUDE = [
+    ".git/*", ".venv/*", "*/.venv/*", "node_modules/*", "*/node_modules/*",
+    "*/__pycache__/*", "*/log/*", "build/*", "*/build/*", "dist/*", ".environment/*",
+    "*.egg-info/*", ".tox/*", ".mypy_cache/*", ".pytest_cache/*", "*/migrations/0*.py",
+    "*_pb2.py", "*_pb2_grpc.py", "*/vendor/*", "docs/_build/*", "*.min.js", "*/fixtures/*",
+    "*/test_data/*", "site/*", "htmlcov/*", "*.lock", "*/generated/*", "tmp/*",
+]
+DIRS = ["src", "src/app", "src/app/api", "tests", "docs", "build/lib", ".venv/lib", "node_modules/pkg",
+        "src/app/__pycache__", "src/app/migrations", "tools/generated", "src/vendor/six"]
+NAMES = ["module.py", "types.pyi", "README.md", "index.js", "0001_initial.py", "api_pb2.py",
+         "setup.cfg", "data.json", "style.min.js", "requirements-dev.txt", "Makefile", "cache.pyc"]
+
+
+def synthetic_files(count, seed=0):
+    rng = random.Random(seed)
+    files = []
+    for i in range(count):
+        directory = rng.choice(DIRS)
+        name = rng.choice(NAMES)
+        files.append(os.path.join(ROOT, directory, f"d{i % 97}", f"{i}_{name}"))
+    return files
+
+
+def match_patterns(files, patterns):
+    # the nested loop FileContentReader._match_patterns used before
+    matched = set()
+    for pat in patterns:
+        for f in files:
+            if fnmatch.fnmatch(os.path.relpath(f, ROOT), pat):
+                matched.add(f)
+    return list(matched)
+
+
+def filter_nested(files):
+    included = set(match_patterns(files, INCLUDE))
+    excluded = set(match_patterns(files, EXCLUDE))
+    return sorted(f for f in included if f not in excluded)
+
+
+def filter_compiled(files):
+    include, exclude = PathMatcher(INCLUDE), PathMatcher(EXCLUDE)
+    prefix = os.path.join(ROOT, "")
+    result = []
+    for f in files:
+        rel_path = f[len(prefix):]
+        if include.match(rel_path) and not exclude.match(rel_path):
+            result.append(f)
+    return sorted(result)
+
+
+def best_of(function, files, repeat):
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(files)
+        seconds = min(seconds, time.perf_counter() - start)
+    return seconds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark include/exclude filtering.")
+    parser.add_argument("--files", type=int, default=50000, help="Number of synthetic paths.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per variant, the best is kept.")
+    args = parser.parse_args()
+
+    files = synthetic_files(args.files)
+    patterns = len(INCLUDE) + len(EXCLUDE)
+    print(f"Filtering {len(files)} paths with {patterns} patterns\n")
+    nested, expected = best_of(filter_nested, files, args.repeat)
+    compiled, result = best_of(filter_compiled, files, args.repeat)
+    assert result == expected, "compiled matcher disagrees with fnmatch"
+    print(f"{'variant':<28}{'seconds':>10}{'paths/s':>14}")
+    print(f"{'relpath + fnmatch per pair':<28}{nested:>10.3f}{len(files) / nested:>14.0f}")
+    print(f"{'compiled PathMatcher':<28}{compiled:>10.3f}{len(files) / compiled:>14.0f}")
+    print(f"\n{len(result)} paths kept, speedup {nested / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Throughput benchmark of the Python structure parser.
+
+Parses the local CPython standard library and a set of generated corpora
+(many small functions, deep nesting, huge docstrings, heavily typed code)
+and reports files/s, lines/s, MB/s and the peak traced memory per corpus.
+Each corpus is measured end to end through parse_python_file ("file") and
+with the sources already in memory ("preloaded"), which isolates parsing
+from disk access.
+
+Results can be written as json, tagged with the current git commit, and a
+previous result file can be passed to --compare to print relative changes.
+
+Usage:
+    python benchmarks/parser_benchmark.py [--corpus NAME ...] [--compact]
+        [--repeat N] [--output result.json] [--compare baseline.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import sysconfig
+import subprocess
+import tracemalloc
+import contextlib
+from datetime import datetime, timezone
+
+sys.path.append(os.getcwd())
+
+from CodingAgent.pyparser.parser import PythonStructureParser, parse_python_file
+
+SYNTHETIC_CORPORA = ["many_functions", "deep_nesting", "huge_docstrings", "typed"]
+CORPORA = ["stdlib"] + SYNTHETIC_CORPORA
+
+
+def generate_many_functions(count=10000):
+    lines = ['"""Module with many small functions."""', "", "import os", ""]
+    for i in range(count):
+        lines += [
+            f"def function_{i}(a, b=1, *args, c=None, **kwargs):",
+            f'    """Return a value computed from a and b ({i})."""',
+            f"    value = a + b * {i}",
+            "    return value",
+            "",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def generate_deep_nesting(depth=60, copies=20):
+    lines = []
+    for copy in range(copies):
+        for level in range(depth):
+            indent = "    " * level
+            if level % 2 == 0:
+                lines.append(f"{indent}class Outer{copy}_{level}:")
+                lines.append(f'{indent}    """Class at level {level}."""')
+            else:
+                lines.append(f"{indent}def inner_{copy}_{level}(self, x):")
+                lines.append(f'{indent}    """Function at level {level}."""')
+        lines.append("    " * depth + "pass")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def generate_huge_docstrings(count=20, doc_lines=5000):
+    paragraph = "    Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod."
+    lines = []
+    for i in range(count):
+        lines += [f"class Documented{i}:", '    """Class with a huge docstring.', ""]
+        lines += [paragraph] * doc_lines
+        lines += ['    """', "", f"    def method_{i}(self):", '        """', "        Short."]
+        lines += ["    " + paragraph] * (doc_lines // 10)
+        lines += ['        """', "        return None", ""]
+    return "\n".join(lines) + "\n"
+
+
+def generate_typed(count=3000):
+    lines = [
+        "from typing import Any, Callable, Dict, List, Optional, Tuple, Union",
+        "",
+    ]
+    for i in range(count):
+        lines += [
+            f"class Model{i}(Base, Generic[T], metaclass=Meta):",
+            f'    """Typed model {i}."""',
+            "",
+            f"    def method_{i}(self, items: List[Dict[str, Any]], key: Optional[str] = None,"
+            " *args: int, flag: bool = False, mode: str = 'fast',"
+            " callback: Callable[[int, str], None] = print, **kwargs: Any)"
+            " -> Tuple[int, Union[str, None]]:",
+            '        """Process items."""',
+            "        return len(items), key",
+            "",
+            f"def helper_{i}(values: list[int] | None = None, limit: int = -1,"
+            " scale: float = 1.5, names: tuple[str, ...] = ()) -> dict[str, list[int]]:",
+            "    return {}",
+            "",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+GENERATORS = {
+    "many_functions": generate_many_functions,
+    "deep_nesting": generate_deep_nesting,
+    "huge_docstrings": generate_huge_docstrings,
+    "typed": generate_typed,
+}
+
+
+def stdlib_files():
+    stdlib = sysconfig.get_paths()["stdlib"]
+    files = []
+    for root, dirs, names in os.walk(stdlib):
+        dirs[:] = sorted(d for d in dirs if d not in ("site-packages", "__pycache__"))
+        files += [os.path.join(root, name) for name in sorted(names) if name.endswith(".py")]
+    return files
+
+
+def corpus_files(name, tmp_dir):
+    if name == "stdlib":
+        return stdlib_files()
+    path = os.path.join(tmp_dir, f"{name}.py")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(GENERATORS[name]())
+    return [path]
+
+
+def load_sources(files):
+    sources = []
+    for path in files:
+        with open(path, "rb") as file:
+            sources.append((path, file.read()))
+    return sources
+
+
+def parse_preloaded(path, source, compact):
+    parser = PythonStructureParser(path, source=source, compact=compact)
+    if parser.parse_file():
+        parser.extract_classes_and_functions()
+        return parser.get_results()
+    return None
+
+
+def run_once(mode, sources, compact):
+    parsed = 0
+    # the stdlib contains files with deliberate syntax errors, keep their messages quiet
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for path, source in sources:
+            if mode == "file":
+                result = parse_python_file(path, compact=compact)
+            else:
+                result = parse_preloaded(path, source, compact)
+            if result is not None:
+                parsed += 1
+    return parsed
+
+
+def benchmark_corpus(files, compact, repeat):
+    sources = load_sources(files)
+    total_bytes = sum(len(source) for _, source in sources)
+    total_lines = sum(source.count(b"\n") for _, source in sources)
+    report = {"files": len(files), "lines": total_lines, "bytes": total_bytes, "modes": {}}
+    for mode in ("file", "preloaded"):
+        seconds = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parsed = run_once(mode, sources, compact)
+            seconds = min(seconds, time.perf_counter() - start)
+        # separate pass, tracing slows parsing down considerably
+        tracemalloc.start()
+        run_once(mode, sources, compact)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report["modes"][mode] = {
+            "parsed": parsed,
+            "seconds": seconds,
+            "files_per_s": len(files) / seconds,
+            "lines_per_s": total_lines / seconds,
+            "mb_per_s": total_bytes / seconds / 1e6,
+            "peak_mb": peak / 1e6,
+        }
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(report, baseline):
+    print(f"\nCompared to {baseline.get('commit') or 'baseline'} (seconds, lower is better)")
+    for name, corpus in report["corpora"].items():
+        old_corpus = baseline.get("corpora", {}).get(name)
+        if old_corpus is None:
+            continue
+        for mode, stats in corpus["modes"].items():
+            old = old_corpus["modes"].get(mode)
+            if old is None:
+                continue
+            change = (stats["seconds"] / old["seconds"] - 1) * 100
+            memory = (stats["peak_mb"] / old["peak_mb"] - 1) * 100 if old["peak_mb"] else 0.0
+            print(f"{name:<17}{mode:<11}time {change:+7.1f}%   peak memory {memory:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python structure parser.")
+    parser.add_argument(
+        "--corpus",
+        nargs="*",
+        choices=CORPORA,
+        default=CORPORA,
+        help="Corpora to run, defaults to all of them.",
+    )
+    parser.add_argument("--compact", action="store_true", help="Use the compact result format.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per corpus, the best is kept.")
+    parser.add_argument("--output", type=str, default=None, help="Write results as json to this file.")
+    parser.add_argument("--compare", type=str, default=None, help="Json result of an earlier run to compare with.")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "compact": args.compact,
+        "repeat": args.repeat,
+        "corpora": {},
+    }
+    print(
+        f"{'corpus':<17}{'mode':<11}{'files':>7}{'seconds':>10}{'files/s':>10}"
+        f"{'lines/s':>12}{'MB/s':>8}{'peak MB':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in args.corpus:
+            corpus = benchmark_corpus(corpus_files(name, tmp_dir), args.compact, args.repeat)
+            report["corpora"][name] = corpus
+            for mode, stats in corpus["modes"].items():
+                print(
+                    f"{name:<17}{mode:<11}{corpus['files']:>7}{stats['seconds']:>10.3f}"
+                    f"{stats['files_per_s']:>10.1f}{stats['lines_per_s']:>12.0f}"
+                    f"{stats['mb_per_s']:>8.2f}{stats['peak_mb']:>10.2f}"
+                )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            print_comparison(report, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Memory benchmark of holding parse results of a whole corpus.
+
+Parses every Python file under the given directories and keeps all results
+in memory, once as regular dictionaries, once in the compact format and once
+as __slots__ records, then reports the memory retained by the results as
+measured with tracemalloc.
+
+Usage:
+    python benchmarks/records_benchmark.py [DIR ...] [--output result.json]
+"""
+
+import os
+import gc
+import io
+import sys
+import json
+import time
+import argparse
+import sysconfig
+import contextlib
+import tracemalloc
+
+sys.path.append(os.getcwd())
+
+from CodingAgent.pyparser.parser import parse_python_file
+
+MODES = {
+    "dict": {},
+    "compact": {"compact": True},
+    "records": {"records": True},
+}
+
+
+def collect_files(directories):
+    files = []
+    for directory in directories:
+        for root, dirs, names in os.walk(directory):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            files += [os.path.join(root, name) for name in sorted(names) if name.endswith(".py")]
+    return files
+
+
+def measure(files, options):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    # the stdlib contains files with deliberate syntax errors, keep their messages quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [parse_python_file(path, **options) for path in files]
+    seconds = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    parsed = sum(result is not None for result in results)
+    del results
+    return {"parsed": parsed, "seconds": seconds, "retained_mb": retained / 1e6, "peak_mb": peak / 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory held by parse results.")
+    parser.add_argument(
+        "directories",
+        nargs="*",
+        default=[sysconfig.get_paths()["stdlib"]],
+        help="Directories to parse, defaults to the stdlib.",
+    )
+    parser.add_argument("--output", type=str, default=None, help="Write results as json to this file.")
+    args = parser.parse_args()
+
+    files = collect_files(args.directories)
+    print(f"Holding parse results of {len(files)} files (seconds include tracing overhead)\n")
+    print(f"{'mode':<10}{'retained MB':>13}{'KB/file':>10}{'vs dict':>9}{'peak MB':>10}{'seconds':>10}")
+    report = {}
+    for name, options in MODES.items():
+        stats = measure(files, options)
+        report[name] = stats
+        ratio = stats["retained_mb"] / report["dict"]["retained_mb"]
+        print(
+            f"{name:<10}{stats['retained_mb']:>13.1f}{stats['retained_mb'] * 1e3 / len(files):>10.1f}"
+            f"{ratio:>9.2f}{stats['peak_mb']:>10.1f}{stats['seconds']:>10.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"files": len(files), "modes": report}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark of the environment storage backends.
+
+Parses every Python file under the given directories once, then dumps and
+loads all results with each available backend, reporting throughput and
+on-disk size. Backends whose optional package is missing are skipped.
+
+Usage:
+    python benchmarks/storage_benchmark.py [DIR ...] [--compact] [--output result.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import sysconfig
+
+sys.path.append(os.getcwd())
+
+from CodingAgent.pyparser.parser import parse_python_file
+from CodingAgent.inspector.storage import STORAGE_BACKENDS, get_storage
+
+
+def collect_results(directories, compact):
+    results = []
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(".py"):
+                    result = parse_python_file(os.path.join(root, name), compact=compact)
+                    if result is not None:
+                        results.append(result)
+    return results
+
+
+def benchmark_backend(storage, results, repeat):
+    dump_time = load_time = float("inf")
+    size = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = [
+            os.path.join(tmp_dir, f"{i}{storage.suffix}") for i in range(len(results))
+        ]
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for result, path in zip(results, paths):
+                storage.dump(result, path)
+            dump_time = min(dump_time, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for path in paths:
+                storage.load(path)
+            load_time = min(load_time, time.perf_counter() - start)
+        size = sum(os.path.getsize(path) for path in paths)
+    return {
+        "dump_seconds": dump_time,
+        "load_seconds": load_time,
+        "bytes": size,
+        "dump_mb_per_s": size / dump_time / 1e6,
+        "load_mb_per_s": size / load_time / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark environment storage backends.")
+    parser.add_argument(
+        "directories",
+        nargs="*",
+        default=[os.path.join(os.getcwd(), "CodingAgent"), sysconfig.get_paths()["stdlib"]],
+        help="Directories to parse, defaults to this repository and the stdlib.",
+    )
+    parser.add_argument("--compact", action="store_true", help="Use the compact result format.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend, the best is kept.")
+    parser.add_argument("--output", type=str, default=None, help="Write results as json to this file.")
+    args = parser.parse_args()
+
+    results = collect_results(args.directories, args.compact)
+    print(f"Parsed {len(results)} files (compact={args.compact})\n")
+
+    variants = [("json", True), ("json", False)] + [
+        (name, True) for name in STORAGE_BACKENDS if name != "json"
+    ]
+    report = {}
+    print(f"{'backend':<14}{'dump s':>10}{'load s':>10}{'size MB':>10}{'dump MB/s':>12}{'load MB/s':>12}")
+    for name, pretty in variants:
+        label = name if name != "json" else ("json" if pretty else "json-compact")
+        try:
+            storage = get_storage(name, pretty=pretty)
+        except ImportError as e:
+            print(f"{label:<14}skipped: {e}")
+            continue
+        stats = benchmark_backend(storage, results, args.repeat)
+        report[label] = stats
+        print(
+            f"{label:<14}{stats['dump_seconds']:>10.3f}{stats['load_seconds']:>10.3f}"
+            f"{stats['bytes'] / 1e6:>10.2f}{stats['dump_mb_per_s']:>12.1f}{stats['load_mb_per_s']:>12.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(
+                {"files": len(results), "compact": args.compact, "backends": report},
+                file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()